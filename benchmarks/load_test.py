@@ -0,0 +1,322 @@
+"""
+Навантажувальний тест API: зважені сценарії з кількома паралельними клієнтами.
+
+    DATABASE_URL=sqlite:////tmp/load.db python -m benchmarks.load_test --concurrency 20 --duration 30
+    python -m benchmarks.load_test --url http://localhost:8000 --output report.json
+
+Без --url застосунок з main.py запускається в процесі через ASGI-транспорт,
+з --url — навантажується вже запущений uvicorn (наприклад, `uvicorn main:app --workers 4`).
+БД варто наповнити генератором (python -m src.database.generate): сценарій
+обміну створює обміни й відгуки, тож запускати на окремій БД.
+
+Звіт — JSON з пропускною здатністю та p50/p95/p99 на маршрут. З --baseline звіт
+порівнюється зі збереженим, і регресія понад --tolerance завершує процес з кодом 1.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+
+CATEGORIES = ["programming", "music", "sports", "languages", "art", "science", "cooking", "other"]
+SEARCHES = ["python", "гітара", "англійська", "йога", "малювання", "математика", "випічка"]
+
+
+class Recorder:
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[dict]:
+        """Виконати запит і записати затримку під назвою маршруту; None — якщо відповідь з помилкою."""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.timings[name].append((time.perf_counter() - started) * 1000)
+            self.errors[name] += 1
+            return None
+        self.timings[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response.json() if response.content else {}
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for name, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            routes[name] = {
+                "requests": len(timings),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(timings) / elapsed, 2),
+                "p50_ms": round(percentile(timings, 0.50), 2),
+                "p95_ms": round(percentile(timings, 0.95), 2),
+                "p99_ms": round(percentile(timings, 0.99), 2),
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(route["errors"] for route in routes.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+def percentile(timings: List[float], q: float) -> float:
+    return timings[min(int(len(timings) * q), len(timings) - 1)] if timings else 0.0
+
+
+class Dataset(NamedTuple):
+    user_ids: List[int]
+    # (skill_id, id власника) для навичок, яких навчають
+    teach_skills: List[Tuple[int, int]]
+    exchange_ids: List[int]
+
+
+async def discover(client: httpx.AsyncClient, sample: int = 200) -> Dataset:
+    """Ідентифікатори для сценаріїв — через сам API, тож працює і з віддаленим сервером."""
+    users = (await client.get("/api/users/", params={"limit": sample})).json()
+    skills = (await client.get("/api/skills/", params={"limit": sample, "can_teach": True})).json()
+    exchanges = (await client.get("/api/exchanges/", params={"limit": sample})).json()
+    dataset = Dataset(
+        user_ids=[user["id"] for user in users],
+        teach_skills=[(skill["id"], skill["users"][0]["id"]) for skill in skills if skill["users"]],
+        exchange_ids=[exchange["id"] for exchange in exchanges],
+    )
+    if len(dataset.user_ids) < 2 or not dataset.teach_skills:
+        raise SystemExit("У БД замало даних: спершу python -m src.database.generate")
+    return dataset
+
+
+# --- Сценарії: (клієнт, recorder, дані, rng) -> один або кілька запитів ---
+
+async def browse_skills(client, recorder, data, rng):
+    await recorder.call(client, "GET /skills", "GET", "/api/skills/",
+                        params={"category": rng.choice(CATEGORIES), "limit": 20})
+
+
+async def search_skills(client, recorder, data, rng):
+    await recorder.call(client, "GET /skills?search", "GET", "/api/skills/",
+                        params={"search": rng.choice(SEARCHES), "limit": 20})
+
+
+async def read_skill(client, recorder, data, rng):
+    skill_id, _ = rng.choice(data.teach_skills)
+    await recorder.call(client, "GET /skills/{id}", "GET", f"/api/skills/{skill_id}")
+
+
+async def skill_matches(client, recorder, data, rng):
+    skill_id, _ = rng.choice(data.teach_skills)
+    await recorder.call(client, "GET /skills/{id}/matches", "GET", f"/api/skills/{skill_id}/matches",
+                        params={"limit": 10})
+
+
+async def read_user(client, recorder, data, rng):
+    user_id = rng.choice(data.user_ids)
+    await recorder.call(client, "GET /users/{id}", "GET", f"/api/users/{user_id}")
+    await recorder.call(client, "GET /users/{id}/skills", "GET", f"/api/users/{user_id}/skills")
+
+
+async def leaderboard(client, recorder, data, rng):
+    await recorder.call(client, "GET /users/leaderboard", "GET", "/api/users/leaderboard",
+                        params={"category": rng.choice(CATEGORIES), "limit": 20})
+
+
+async def list_exchanges(client, recorder, data, rng):
+    await recorder.call(client, "GET /exchanges?user_id", "GET", "/api/exchanges/",
+                        params={"user_id": rng.choice(data.user_ids), "limit": 20})
+
+
+async def read_exchange(client, recorder, data, rng):
+    if data.exchange_ids:
+        await recorder.call(client, "GET /exchanges/{id}", "GET", f"/api/exchanges/{rng.choice(data.exchange_ids)}")
+
+
+async def user_reviews(client, recorder, data, rng):
+    user_id = rng.choice(data.user_ids)
+    await recorder.call(client, "GET /reviews/user/{id}/rating", "GET", f"/api/reviews/user/{user_id}/rating")
+    await recorder.call(client, "GET /reviews?user_id", "GET", "/api/reviews/",
+                        params={"user_id": user_id, "limit": 20})
+
+
+async def stats(client, recorder, data, rng):
+    route = rng.choice(["top-skills", "active-users", "exchange-success-rate", "timeseries"])
+    await recorder.call(client, f"GET /stats/{route}", "GET", f"/api/stats/{route}")
+
+
+async def exchange_lifecycle(client, recorder, data, rng):
+    """Запит на обмін, прийняття, завершення та відгук відправника."""
+    skill_id, receiver = rng.choice(data.teach_skills)
+    sender = rng.choice(data.user_ids)
+    if sender == receiver:
+        return
+    exchange = await recorder.call(
+        client, "POST /exchanges", "POST", "/api/exchanges/", params={"sender_id": sender},
+        json={"receiver_id": receiver, "skill_id": skill_id, "hours_proposed": rng.randint(1, 5)}
+    )
+    if exchange is None:
+        return
+    for status in ("accepted", "completed"):
+        if await recorder.call(
+            client, "PUT /exchanges/{id}", "PUT", f"/api/exchanges/{exchange['id']}",
+            params={"current_user_id": receiver}, json={"status": status}
+        ) is None:
+            return
+    await recorder.call(
+        client, "POST /reviews", "POST", "/api/reviews/", params={"reviewer_id": sender},
+        json={"exchange_id": exchange["id"], "rating": rng.randint(3, 5), "comment": "Навантажувальний тест"}
+    )
+
+
+Scenario = Callable[..., object]
+
+# Частки сценаріїв: переважно читання, як у реальному трафіку
+SCENARIOS: Dict[str, Tuple[Scenario, int]] = {
+    "browse_skills": (browse_skills, 20),
+    "search_skills": (search_skills, 15),
+    "read_skill": (read_skill, 10),
+    "skill_matches": (skill_matches, 10),
+    "read_user": (read_user, 10),
+    "leaderboard": (leaderboard, 5),
+    "list_exchanges": (list_exchanges, 8),
+    "read_exchange": (read_exchange, 5),
+    "user_reviews": (user_reviews, 7),
+    "stats": (stats, 5),
+    "exchange_lifecycle": (exchange_lifecycle, 5),
+}
+
+
+async def worker(client, recorder, data, rng, deadline: float, budget: List[int]) -> None:
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][1] for name in names]
+    while time.perf_counter() < deadline and budget[0] != 0:
+        budget[0] -= 1
+        scenario = SCENARIOS[rng.choices(names, weights)[0]][0]
+        await scenario(client, recorder, data, rng)
+
+
+async def run(args) -> dict:
+    if args.url:
+        transport, base_url, app = None, args.url, None
+    else:
+        # Імпорт лише в режимі в процесі: main.py під'єднується до БД одразу при імпорті
+        from main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://load-test"
+        await app.router.startup()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url=base_url, limits=limits, timeout=args.timeout
+        ) as client:
+            data = await discover(client)
+            warmup = Recorder()
+            await asyncio.gather(*(
+                worker(client, warmup, data, random.Random(args.seed - i - 1), time.perf_counter() + args.warmup, [-1])
+                for i in range(args.concurrency)
+            ))
+
+            recorder = Recorder()
+            # Спільний лічильник сценаріїв: -1 — без обмеження, лише за часом
+            budget = [args.scenarios or -1]
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                worker(client, recorder, data, random.Random(args.seed + i), started + args.duration, budget)
+                for i in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+            from src.database.db import async_engine
+            await async_engine.dispose()
+
+    report = recorder.report(elapsed)
+    report["config"] = {
+        "target": args.url or "asgi",
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seed": args.seed,
+    }
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Регресії відносно baseline: p95 чи p99 маршруту або загальна пропускна здатність гірші за допуск."""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput: {report['throughput_rps']} rps < {baseline['throughput_rps']} rps"
+        )
+    for name, route in report["routes"].items():
+        base = baseline["routes"].get(name)
+        if base is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if route[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {route[metric]} > {base[metric]}")
+    return regressions
+
+
+def print_table(report: dict, baseline: Optional[dict]) -> None:
+    print(f"{'маршрут':<32}{'запитів':>9}{'помилок':>9}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'p95 base':>10}",
+          file=sys.stderr)
+    for name, route in report["routes"].items():
+        base = (baseline or {}).get("routes", {}).get(name, {}).get("p95_ms", "")
+        print(
+            f"{name:<32}{route['requests']:>9}{route['errors']:>9}{route['throughput_rps']:>9.1f}"
+            f"{route['p50_ms']:>9.2f}{route['p95_ms']:>9.2f}{route['p99_ms']:>9.2f}{base:>10}",
+            file=sys.stderr
+        )
+    print(f"усього: {report['requests']} запитів, {report['throughput_rps']} rps, помилок {report['errors']}",
+          file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Навантажувальний тест SkillSwap API")
+    parser.add_argument("--url", help="адреса запущеного сервера; без неї — застосунок у процесі")
+    parser.add_argument("--concurrency", type=int, default=10, help="кількість паралельних клієнтів")
+    parser.add_argument("--duration", type=float, default=30, help="тривалість вимірювання, с")
+    parser.add_argument("--scenarios", type=int, help="зупинитися після стількох сценаріїв")
+    parser.add_argument("--warmup", type=float, default=3, help="прогрів перед вимірюванням, с")
+    parser.add_argument("--timeout", type=float, default=30, help="таймаут одного запиту, с")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="куди записати JSON-звіт (інакше stdout)")
+    parser.add_argument("--baseline", help="JSON-звіт попереднього запуску для порівняння")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустиме погіршення, частка")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_table(report, baseline)
+
+    if baseline is not None:
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        for regression in report["regressions"]:
+            print(f"РЕГРЕСІЯ {regression}", file=sys.stderr)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
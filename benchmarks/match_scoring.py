@@ -0,0 +1,47 @@
+"""
+Бенчмарк векторного ранжування збігів.
+
+    python -m benchmarks.match_scoring [кількість кандидатів]
+"""
+import sys
+import time
+
+import numpy as np
+
+from src.services.ranking import CandidateFeatures, score_candidates, top_k
+
+
+def synthetic_features(size: int, seed: int = 42) -> CandidateFeatures:
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    rating_count = rng.integers(0, 50, size).astype(np.float64)
+    return CandidateFeatures(
+        text_score=rng.random(size),
+        rating_sum=rating_count * rng.uniform(1, 5, size),
+        rating_count=rating_count,
+        level=rng.integers(0, 4, size).astype(np.int8),
+        completed=rng.integers(0, 200, size).astype(np.float64),
+        last_active=np.where(rng.random(size) < 0.1, np.nan, now - rng.uniform(0, 365 * 86400, size)),
+        location=rng.integers(-1, 500, size).astype(np.int32),
+        places={f"місто {i}": i for i in range(500)},
+    )
+
+
+def main(size: int = 100_000, rounds: int = 50) -> None:
+    features = synthetic_features(size)
+    now = time.time()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        scores = score_candidates(features, level="intermediate", teacher_wanted=True, location="Місто 7", now=now)
+        top_k(scores, 50)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"{size} кандидатів: медіана {timings[len(timings) // 2]:.2f} мс, "
+        f"p95 {timings[int(len(timings) * 0.95)]:.2f} мс, max {timings[-1]:.2f} мс"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,237 @@
+"""
+Мікробенчмарк функцій src/repository: час і кількість SQL-запитів на виклик
+для наборів даних кількох розмірів.
+
+    DATABASE_URL=sqlite:////tmp/unused.db python -m benchmarks.repository --sizes 1000,10000 \\
+        --baseline benchmarks/repository_baseline.json
+
+Для кожного розміру (кількість користувачів; навичок утричі, обмінів удесятеро більше)
+генератор src.database.generate один раз створює SQLite-файл у --workdir, далі файл
+перевикористовується. Функції викликаються з окремою сесією на виклик.
+
+З --baseline результат порівнюється зі збереженим: медіана часу понад --margin
+або будь-яке зростання кількості SQL-запитів (N+1) — регресія, код виходу 1.
+--save записує поточний результат як новий baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.models import ExchangeStatus, Skill, User
+from src.repository import exchanges as repository_exchanges
+from src.repository import reviews as repository_reviews
+from src.repository import skills as repository_skills
+from src.repository import stats as repository_stats
+from src.repository import users as repository_users
+from src.services import leaderboard, matching
+from src.utils.sql_profiler import instrument_engine, start_profile, stop_profile
+
+
+# Кінець періоду для генератора: фіксований, щоб файл набору даних був відтворюваним
+DATASET_UNTIL = "2026-01-01"
+
+SEARCHES = ["python", "гітара", "англійська", "йога", "малювання", "математика", "випічка"]
+CATEGORIES = ["programming", "music", "sports", "languages", "art", "science", "cooking", "other"]
+
+
+class Sample(NamedTuple):
+    user_ids: List[int]
+    skill_ids: List[int]
+
+
+Target = Callable[[AsyncSession, Sample, random.Random], Awaitable[object]]
+
+
+def _until() -> date:
+    return date.fromisoformat(DATASET_UNTIL)
+
+
+# Функції, що вимірюються; аргументи обираються rng з вибірки ідентифікаторів
+TARGETS: Dict[str, Target] = {
+    "skills.get_skills[search]": lambda db, sample, rng: repository_skills.get_skills(
+        db, limit=20, search=rng.choice(SEARCHES)
+    ),
+    "skills.get_skills[category]": lambda db, sample, rng: repository_skills.get_skills(
+        db, limit=20, category=rng.choice(CATEGORIES)
+    ),
+    "skills.find_skill_matches": lambda db, sample, rng: repository_skills.find_skill_matches(
+        db, rng.choice(sample.skill_ids), limit=20
+    ),
+    "reviews.get_user_rating": lambda db, sample, rng: repository_reviews.get_user_rating(
+        db, rng.choice(sample.user_ids)
+    ),
+    "reviews.get_users_ratings": lambda db, sample, rng: repository_reviews.get_users_ratings(
+        db, rng.sample(sample.user_ids, min(50, len(sample.user_ids)))
+    ),
+    "exchanges.get_exchanges[user]": lambda db, sample, rng: repository_exchanges.get_exchanges(
+        db, limit=20, user_id=rng.choice(sample.user_ids)
+    ),
+    "exchanges.get_filtered_exchanges": lambda db, sample, rng: repository_exchanges.get_filtered_exchanges(
+        db, from_date=_until() - timedelta(days=90), status=ExchangeStatus.completed,
+        user_id=rng.choice(sample.user_ids)
+    ),
+    "users.get_leaderboard": lambda db, sample, rng: repository_users.get_leaderboard(
+        db, rng.choice(CATEGORIES), 0, 20
+    ),
+    "stats.get_top_skills": lambda db, sample, rng: repository_stats.get_top_skills(db, 10),
+    "stats.get_active_users": lambda db, sample, rng: repository_stats.get_active_users(db, 10),
+    "stats.get_exchange_success_rate": lambda db, sample, rng: repository_stats.get_exchange_success_rate(db),
+    "stats.get_timeseries": lambda db, sample, rng: repository_stats.get_timeseries(
+        db, _until() - timedelta(days=180), _until(), "week", rng.choice([None, *CATEGORIES])
+    ),
+}
+
+
+def ensure_dataset(workdir: Path, size: int, seed: int) -> Path:
+    """SQLite-файл з size користувачами; генерується окремим процесом, бо двигун БД задається через env."""
+    path = workdir / f"repository_{size}_{seed}.db"
+    if not path.exists():
+        workdir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        subprocess.run(
+            [sys.executable, "-m", "src.database.generate", "--users", str(size),
+             "--seed", str(seed), "--until", DATASET_UNTIL],
+            env={**os.environ, "DATABASE_URL": f"sqlite:///{partial}"},
+            check=True, stdout=subprocess.DEVNULL
+        )
+        partial.rename(path)
+    return path
+
+
+async def _sample(db: AsyncSession, rng: random.Random, size: int = 200) -> Sample:
+    max_user = (await db.execute(select(func.max(User.id)))).scalar_one()
+    teach_skills = (await db.execute(
+        select(Skill.id).where(Skill.can_teach.is_(True)).order_by(Skill.id).limit(size * 10)
+    )).scalars().all()
+    return Sample(
+        user_ids=[rng.randint(1, max_user) for _ in range(size)],
+        skill_ids=rng.sample(list(teach_skills), min(size, len(teach_skills))),
+    )
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+async def bench_dataset(path: Path, rounds: int, seed: int, only: List[str]) -> Dict[str, dict]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    instrument_engine(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    results = {}
+    try:
+        async with sessions() as db:
+            # Індекси в пам'яті, на які спираються збіги та рейтинги вчителів
+            await matching.build_index(db)
+            await leaderboard.build_leaderboards(db)
+            sample = await _sample(db, random.Random(seed))
+
+        for name, target in TARGETS.items():
+            if only and name not in only:
+                continue
+            rng = random.Random(seed)
+            timings, statements = [], []
+            for round_number in range(rounds + 2):
+                async with sessions() as db:
+                    profile, token = start_profile()
+                    started = time.perf_counter()
+                    try:
+                        await target(db, sample, rng)
+                    finally:
+                        elapsed = (time.perf_counter() - started) * 1000
+                        stop_profile(token)
+                # Перші два виклики — прогрів кешу компіляції SQL і сторінок SQLite
+                if round_number >= 2:
+                    timings.append(elapsed)
+                    statements.append(profile.count)
+            results[name] = {
+                "median_ms": round(_percentile(timings, 0.5), 3),
+                "p95_ms": round(_percentile(timings, 0.95), 3),
+                "statements": max(statements),
+            }
+    finally:
+        await engine.dispose()
+    return results
+
+
+def compare(results: dict, baseline: dict, margin: float) -> List[str]:
+    regressions = []
+    for size, functions in results.items():
+        for name, current in functions.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if current["median_ms"] > base["median_ms"] * (1 + margin):
+                regressions.append(f"[{size}] {name}: {current['median_ms']} мс > {base['median_ms']} мс")
+            if current["statements"] > base["statements"]:
+                regressions.append(f"[{size}] {name}: {current['statements']} SQL > {base['statements']} SQL")
+    return regressions
+
+
+def print_table(results: dict, baseline: dict) -> None:
+    print(f"{'розмір':>8}  {'функція':<36}{'медіана, мс':>12}{'p95, мс':>10}{'SQL':>5}{'baseline, мс':>14}")
+    for size, functions in results.items():
+        for name, current in functions.items():
+            base = baseline.get(size, {}).get(name, {}).get("median_ms", "")
+            print(
+                f"{size:>8}  {name:<36}{current['median_ms']:>12.3f}{current['p95_ms']:>10.3f}"
+                f"{current['statements']:>5}{base:>14}"
+            )
+
+
+async def run(args) -> dict:
+    results = {}
+    for size in args.sizes:
+        path = ensure_dataset(Path(args.workdir), size, args.seed)
+        results[str(size)] = await bench_dataset(path, args.rounds, args.seed, args.only)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Мікробенчмарк функцій репозиторіїв")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[1000, 10000], help="кількості користувачів через кому")
+    parser.add_argument("--rounds", type=int, default=30, help="викликів кожної функції")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default="/tmp/skillswap-bench", help="де зберігати файли наборів даних")
+    parser.add_argument("--only", action="append", default=[], help="лише ця функція (можна кілька)")
+    parser.add_argument("--baseline", help="JSON попереднього запуску для порівняння")
+    parser.add_argument("--margin", type=float, default=0.25, help="допустиме зростання медіани, частка")
+    parser.add_argument("--save", help="записати результат як JSON (новий baseline)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+            file.write("\n")
+
+    regressions = compare(results, baseline, args.margin)
+    for regression in regressions:
+        print(f"РЕГРЕСІЯ {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
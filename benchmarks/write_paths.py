@@ -0,0 +1,104 @@
+"""
+Бенчмарк записів через API: затримка та кількість SQL-запитів на ендпоінт.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.write_paths [кількість раундів]
+
+Створює власних користувачів, навички, обміни й відгуки — запускати на окремій БД.
+Кількість запитів береться із заголовка X-DB-Query-Count (SQL_PROFILER_ENABLED=true).
+"""
+import asyncio
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from main import app
+from src.database.db import async_engine
+
+
+SKILL = {
+    "title": "Бенчмарк навички",
+    "description": "Навичка, створена бенчмарком записів",
+    "category": "programming",
+    "level": "beginner",
+    "can_teach": True,
+    "want_learn": False,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> dict:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.timings[name].append((time.perf_counter() - started) * 1000)
+        self.queries[name].append(int(response.headers.get("x-db-query-count", -1)))
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    def report(self) -> None:
+        print(f"{'ендпоінт':<32}{'медіана, мс':>12}{'p95, мс':>10}{'SQL':>6}")
+        for name, timings in self.timings.items():
+            timings = sorted(timings)
+            queries = sorted(self.queries[name])
+            print(
+                f"{name:<32}{timings[len(timings) // 2]:>12.2f}"
+                f"{timings[int(len(timings) * 0.95)]:>10.2f}{queries[len(queries) // 2]:>6}"
+            )
+
+
+async def one_round(client: httpx.AsyncClient, recorder: Recorder) -> None:
+    users = []
+    for _ in range(2):
+        tag = uuid.uuid4().hex[:12]
+        users.append(await recorder.call(
+            client, "POST /users", "POST", "/api/users/",
+            json={"username": f"bench_{tag}", "email": f"{tag}@bench.example.com", "location": "Київ"}
+        ))
+    sender, receiver = users[0]["id"], users[1]["id"]
+    await recorder.call(client, "PUT /users/{id}", "PUT", f"/api/users/{sender}", json={"bio": "Бенчмарк"})
+
+    skill = await recorder.call(client, "POST /skills", "POST", f"/api/skills/?user_id={receiver}", json=SKILL)
+    await recorder.call(
+        client, "PUT /skills/{id}", "PUT", f"/api/skills/{skill['id']}", json={"level": "advanced"}
+    )
+    spare = await recorder.call(client, "POST /skills", "POST", f"/api/skills/?user_id={receiver}", json=SKILL)
+    await recorder.call(client, "DELETE /skills/{id}", "DELETE", f"/api/skills/{spare['id']}")
+
+    exchange = await recorder.call(
+        client, "POST /exchanges", "POST", f"/api/exchanges/?sender_id={sender}",
+        json={"receiver_id": receiver, "skill_id": skill["id"], "hours_proposed": 2}
+    )
+    for status in ("accepted", "completed"):
+        await recorder.call(
+            client, "PUT /exchanges/{id}", "PUT", f"/api/exchanges/{exchange['id']}?current_user_id={receiver}",
+            json={"status": status}
+        )
+    await recorder.call(
+        client, "POST /reviews", "POST", f"/api/reviews/?reviewer_id={sender}",
+        json={"exchange_id": exchange["id"], "rating": 5, "comment": "Дякую"}
+    )
+
+
+async def main(rounds: int = 50) -> None:
+    await app.router.startup()
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await one_round(client, Recorder())  # прогрів: пули, кеші компіляції SQL
+            for _ in range(rounds):
+                await one_round(client, recorder)
+    finally:
+        await async_engine.dispose()
+    recorder.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
@@ -1,13 +1,19 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 import uvicorn
 from fastapi.staticfiles import StaticFiles
 
-from src.database.db import engine, get_db
+from src.database.db import engine, async_engine, replica_engines, get_db, AsyncSessionLocal
 from src.database.models import Base
+from src.database.pool import pool_status
+from src.database.routing import ReadYourWritesMiddleware
+from src.utils.idempotency import IdempotencyMiddleware
+from src.utils.sql_profiler import SQL_PROFILER_ENABLED, SQLProfilerMiddleware, instrument_engine
 from src.routes import users, skills, exchanges, reviews, categories, stats
 from src.routes.photos import router as photos_router
+from src.services import autocomplete, geo, leaderboard, matching, swap_graph
 
 
 # Створюємо таблиці (якщо вони не існують)
@@ -22,6 +28,14 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Після запису клієнт отримує підписану cookie, і його читання йдуть на основну БД
+# з будь-якого воркера, поки репліки наздоганяють
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Повтори POST з Idempotency-Key повертають збережену першу відповідь.
+# Додається раніше за CORS, тож CORS і профілювання обгортають і повторені відповіді
+app.add_middleware(IdempotencyMiddleware)
+
 # Налаштування CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,8 +43,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Профілювання SQL: кількість запитів і час у БД на кожен HTTP-запит
+if SQL_PROFILER_ENABLED:
+    for db_engine in [async_engine, *replica_engines]:
+        instrument_engine(db_engine)
+    app.add_middleware(SQLProfilerMiddleware)
+
 # Підключаємо маршрути
 app.include_router(users.router, prefix="/api")
 app.include_router(skills.router, prefix="/api")
@@ -55,11 +76,11 @@ def read_root():
     }
 
 @app.get("/health")
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     """Перевірка стану застосунку та БД."""
     try:
 # Простий запит для перевірки з'єднання з БД
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -70,13 +91,33 @@ def health_check(db: Session = Depends(get_db)):
         "version": "2.0.0"
     }
 
+@app.get("/health/pool")
+def pool_health():
+    """Стан пулів з'єднань: зайняті, вільні, overflow та час очікування."""
+    return {"pools": pool_status()}
+
 @app.on_event("startup")
 async def startup_event():
     """Дії при запуску застосунку."""
+    # Будуємо індекси в пам'яті
+    async with AsyncSessionLocal() as db:
+        await autocomplete.build_index(db)
+        await matching.build_index(db)
+        await swap_graph.build_graph(db)
+        await leaderboard.build_leaderboards(db)
+        await geo.geocode_missing(db)
     print("🚀 SkillSwap API запущено!")
     print("📚 Документація доступна на: <http://localhost:8000/docs>")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Закриваємо з'єднання пулу при зупинці застосунку."""
+    await async_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,74 @@
+"""Add full-text search for skills
+
+Revision ID: 3f1c9a7b2d40
+Revises: 924484f46e26
+Create Date: 2026-10-18 10:12:41.215307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d40'
+down_revision: Union[str, None] = '924484f46e26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("""
+            ALTER TABLE skills ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX IF NOT EXISTS ix_skills_search_vector ON skills USING GIN (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS skills_fts USING fts5(
+                title, description, category,
+                content='skills', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS skills_fts_ai AFTER INSERT ON skills BEGIN
+                INSERT INTO skills_fts(rowid, title, description, category)
+                VALUES (new.id, new.title, new.description, new.category);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS skills_fts_ad AFTER DELETE ON skills BEGIN
+                INSERT INTO skills_fts(skills_fts, rowid, title, description, category)
+                VALUES ('delete', old.id, old.title, old.description, old.category);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS skills_fts_au AFTER UPDATE ON skills BEGIN
+                INSERT INTO skills_fts(skills_fts, rowid, title, description, category)
+                VALUES ('delete', old.id, old.title, old.description, old.category);
+                INSERT INTO skills_fts(rowid, title, description, category)
+                VALUES (new.id, new.title, new.description, new.category);
+            END
+        """)
+        # Індексуємо вже наявні навички
+        op.execute("INSERT INTO skills_fts(skills_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_skills_search_vector")
+        op.execute("ALTER TABLE skills DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS skills_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS skills_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS skills_fts_ai")
+        op.execute("DROP TABLE IF EXISTS skills_fts")
@@ -0,0 +1,67 @@
+"""Add exchange statistics rollup tables
+
+Revision ID: 5a9f3c1e7d62
+Revises: c41d8e2f6a07
+Create Date: 2026-10-18 16:02:44.180927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9f3c1e7d62'
+down_revision: Union[str, None] = 'c41d8e2f6a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('skill_exchange_stats',
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.Column('exchanges_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('skill_id')
+    )
+    op.create_index(op.f('ix_skill_exchange_stats_exchanges_count'), 'skill_exchange_stats', ['exchanges_count'], unique=False)
+    op.create_table('user_exchange_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exchanges_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_exchange_stats_exchanges_count'), 'user_exchange_stats', ['exchanges_count'], unique=False)
+    op.create_table('exchange_status_counts',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+
+    # Заповнюємо з наявних обмінів (те саме робить python -m src.database.rebuild_stats)
+    op.execute("""
+        INSERT INTO skill_exchange_stats (skill_id, exchanges_count)
+        SELECT skill_id, COUNT(*) FROM exchanges GROUP BY skill_id
+    """)
+    op.execute("""
+        INSERT INTO user_exchange_stats (user_id, exchanges_count)
+        SELECT user_id, COUNT(*) FROM (
+            SELECT sender_id AS user_id FROM exchanges
+            UNION ALL
+            SELECT receiver_id AS user_id FROM exchanges
+        ) AS sides GROUP BY user_id
+    """)
+    op.execute("""
+        INSERT INTO exchange_status_counts (status, count)
+        SELECT CAST(status AS VARCHAR(20)), COUNT(*) FROM exchanges
+        WHERE status IS NOT NULL GROUP BY status
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('exchange_status_counts')
+    op.drop_index(op.f('ix_user_exchange_stats_exchanges_count'), table_name='user_exchange_stats')
+    op.drop_table('user_exchange_stats')
+    op.drop_index(op.f('ix_skill_exchange_stats_exchanges_count'), table_name='skill_exchange_stats')
+    op.drop_table('skill_exchange_stats')
@@ -0,0 +1,44 @@
+"""Add exchange cycles
+
+Revision ID: 7b2e5d9c4a18
+Revises: 3f1c9a7b2d40
+Create Date: 2026-10-18 14:03:27.518442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e5d9c4a18'
+down_revision: Union[str, None] = '3f1c9a7b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('exchange_cycles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_exchange_cycles_id'), 'exchange_cycles', ['id'], unique=False)
+    with op.batch_alter_table('exchanges') as batch_op:
+        batch_op.add_column(sa.Column('cycle_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_exchanges_cycle_id', 'exchange_cycles', ['cycle_id'], ['id'], ondelete='CASCADE'
+        )
+        batch_op.create_index(op.f('ix_exchanges_cycle_id'), ['cycle_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('exchanges') as batch_op:
+        batch_op.drop_index(op.f('ix_exchanges_cycle_id'))
+        batch_op.drop_constraint('fk_exchanges_cycle_id', type_='foreignkey')
+        batch_op.drop_column('cycle_id')
+    op.drop_index(op.f('ix_exchange_cycles_id'), table_name='exchange_cycles')
+    op.drop_table('exchange_cycles')
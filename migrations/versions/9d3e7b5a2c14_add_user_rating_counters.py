@@ -0,0 +1,44 @@
+"""Add denormalized rating counters to users
+
+Revision ID: 9d3e7b5a2c14
+Revises: e8b4a6d1f305
+Create Date: 2026-10-18 17:30:51.947203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e7b5a2c14'
+down_revision: Union[str, None] = 'e8b4a6d1f305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ['rating_sum', 'rating_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def upgrade() -> None:
+    for name in COUNTERS:
+        op.add_column('users', sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+
+    # Заповнюємо з наявних відгуків
+    histogram = ", ".join(
+        f"rating_{stars} = (SELECT COUNT(*) FROM reviews r"
+        f" WHERE r.reviewed_id = users.id AND r.rating = {stars})"
+        for stars in range(1, 6)
+    )
+    op.execute(f"""
+        UPDATE users SET
+            rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.reviewed_id = users.id),
+            rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.reviewed_id = users.id),
+            {histogram}
+        WHERE id IN (SELECT reviewed_id FROM reviews)
+    """)
+
+
+def downgrade() -> None:
+    for name in reversed(COUNTERS):
+        op.drop_column('users', name)
@@ -0,0 +1,43 @@
+"""Unique review per exchange and reviewer
+
+Revision ID: a4c9e2f7b813
+Revises: d2f8b4c6a1e9
+Create Date: 2026-10-19 10:12:44.381529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7b813'
+down_revision: Union[str, None] = 'd2f8b4c6a1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дублікати з гонки одночасних POST: лишаємо найперший відгук
+    op.execute("""
+        DELETE FROM reviews
+        WHERE id NOT IN (SELECT MIN(id) FROM reviews GROUP BY exchange_id, reviewer_id)
+    """)
+    # Дублікати вже потрапили в лічильники рейтингу — перераховуємо їх з відгуків
+    histogram = ", ".join(
+        f"rating_{stars} = (SELECT COUNT(*) FROM reviews r"
+        f" WHERE r.reviewed_id = users.id AND r.rating = {stars})"
+        for stars in range(1, 6)
+    )
+    op.execute(f"""
+        UPDATE users SET
+            rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.reviewed_id = users.id),
+            rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.reviewed_id = users.id),
+            {histogram}
+        WHERE rating_count > 0 OR id IN (SELECT reviewed_id FROM reviews)
+    """)
+    op.create_index('ix_reviews_exchange_reviewer', 'reviews', ['exchange_id', 'reviewer_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_exchange_reviewer', table_name='reviews')
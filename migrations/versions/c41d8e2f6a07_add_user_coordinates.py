@@ -0,0 +1,33 @@
+"""Add user coordinates and geo grid cell
+
+Revision ID: c41d8e2f6a07
+Revises: 7b2e5d9c4a18
+Create Date: 2026-10-18 15:21:09.734116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e2f6a07'
+down_revision: Union[str, None] = '7b2e5d9c4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Координати заповнюються при старті застосунку (geocode_missing)
+    op.add_column('users', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('geo_cell', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_users_geo_cell'), 'users', ['geo_cell'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_geo_cell'), table_name='users')
+    op.drop_column('users', 'geo_cell')
+    op.drop_column('users', 'longitude')
+    op.drop_column('users', 'latitude')
@@ -0,0 +1,33 @@
+"""Store idempotency response headers
+
+Revision ID: d2f8b4c6a1e9
+Revises: f3a7d1c9e5b2
+Create Date: 2026-10-18 23:41:27.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8b4c6a1e9'
+down_revision: Union[str, None] = 'f3a7d1c9e5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Записи живуть лише TTL; старі без заголовків повторювати не можна
+    op.execute('DELETE FROM idempotency_keys')
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.add_column(sa.Column('headers', sa.Text(), nullable=True))
+        batch_op.drop_column('content_type')
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM idempotency_keys')
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.add_column(sa.Column('content_type', sa.String(length=100), nullable=True))
+        batch_op.drop_column('headers')
@@ -0,0 +1,51 @@
+"""Add daily exchange event buckets
+
+Revision ID: e8b4a6d1f305
+Revises: 5a9f3c1e7d62
+Create Date: 2026-10-18 16:48:12.602315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4a6d1f305'
+down_revision: Union[str, None] = '5a9f3c1e7d62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('exchange_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('event', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'category', 'event')
+    )
+
+    # Заповнюємо з наявних обмінів так само, як python -m src.database.rebuild_stats
+    if op.get_bind().dialect.name == 'postgresql':
+        day = "CAST({} AT TIME ZONE 'UTC' AS DATE)"
+    else:
+        day = "date({})"
+    op.execute(f"""
+        INSERT INTO exchange_daily_stats (day, category, event, count)
+        SELECT day, category, event, COUNT(*) FROM (
+            SELECT {day.format('e.created_at')} AS day, s.category AS category, 'created' AS event
+            FROM exchanges e JOIN skills s ON s.id = e.skill_id
+            UNION ALL
+            SELECT {day.format('COALESCE(e.updated_at, e.created_at)')}, s.category, CAST(e.status AS VARCHAR(20))
+            FROM exchanges e JOIN skills s ON s.id = e.skill_id
+            WHERE e.status IS NOT NULL AND CAST(e.status AS VARCHAR(20)) <> 'pending'
+        ) AS events
+        WHERE day IS NOT NULL
+        GROUP BY day, category, event
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('exchange_daily_stats')
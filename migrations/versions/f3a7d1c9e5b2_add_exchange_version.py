@@ -0,0 +1,36 @@
+"""Add exchange version and previous status
+
+Revision ID: f3a7d1c9e5b2
+Revises: b6e2c8f4a9d3
+Create Date: 2026-10-18 20:05:13.904126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7d1c9e5b2'
+down_revision: Union[str, None] = 'b6e2c8f4a9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Тип уже створено разом із колонкою status
+exchange_status = postgresql.ENUM(
+    'pending', 'accepted', 'rejected', 'completed', 'cancelled', name='exchangestatus', create_type=False
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('exchanges') as batch_op:
+        batch_op.add_column(sa.Column('previous_status', exchange_status, nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('exchanges') as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('previous_status')
@@ -1,8 +1,13 @@
-
 import os
+import random
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+
+from src.database.pool import engine_options, register_engine
+from src.database.routing import REPLICA_URLS, mark_write, session_info
 
 
 load_dotenv()
@@ -15,27 +20,107 @@ DATABASE_URL = os.getenv(
 )
 
 
-# Створюємо двигун бази даних
-engine = create_engine(DATABASE_URL)
+def to_async_url(url: str) -> str:
+    """Перетворити синхронний URL БД на URL з асинхронним драйвером."""
+    if url.startswith(("postgresql://", "postgresql+psycopg2://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith(("sqlite://", "sqlite+pysqlite://")):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+# Асинхронний URL: asyncpg для Postgres, aiosqlite для локальних запусків
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+
+# Синхронний двигун — для міграцій, створення таблиць та seed-скриптів
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, "primary_sync"))
+
+
+# Асинхронний двигун — для обробки HTTP-запитів
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, "primary", is_async=True)
+)
+
+
+# Двигуни реплік — лише для читання
+replica_engines = [
+    create_async_engine(
+        to_async_url(url), **engine_options(to_async_url(url), f"replica_{i}", is_async=True)
+    )
+    for i, url in enumerate(REPLICA_URLS)
+]
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite за замовчуванням не перевіряє зовнішні ключі, а записи покладаються на них
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 
-# Фабрика сесій для роботи з БД
+for db_engine in [engine, async_engine, *replica_engines]:
+    if db_engine.dialect.name == "sqlite":
+        event.listen(getattr(db_engine, "sync_engine", db_engine), "connect", _enable_sqlite_foreign_keys)
+
+
+register_engine("primary", async_engine)
+register_engine("primary_sync", engine)
+for i, replica in enumerate(replica_engines):
+    register_engine(f"replica_{i}", replica)
+
+
+class RoutingSession(Session):
+    """
+    Сесія, що надсилає читання read-only запитів на репліки,
+    а записи та все інше — на основну БД.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        # writes — SELECT, що пише через data-modifying CTE (див. upsert.execute_with_increments)
+        is_write = (
+            self._flushing
+            or getattr(clause, "is_dml", False)
+            or (clause is not None and clause.get_execution_options().get("writes", False))
+        )
+        if is_write:
+            # Користувач має бачити власні зміни, поки репліки наздоганяють
+            mark_write(self.info)
+        elif self.info.get("read_only") and replica_engines:
+            # Одна репліка на сесію, щоб запит бачив узгоджений знімок
+            replica = self.info.get("replica")
+            if replica is None:
+                replica = self.info["replica"] = random.choice(replica_engines)
+            return replica.sync_engine
+        return async_engine.sync_engine
+
+
+# Фабрика синхронних сесій
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Фабрика асинхронних сесій.
+# expire_on_commit=False: після коміту атрибути не застарівають,
+# тож серіалізація відповіді не робить неявних запитів до БД.
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
 # Базовий клас для моделей
 Base = declarative_base()
 
 
 # Dependency для отримання сесії БД
-def get_db():
+async def get_db(request: Request):
     """
-    Створює нову сесію БД для кожного запиту.
+    Створює нову асинхронну сесію БД для кожного запиту.
+    GET-запити читають з реплік, якщо користувач нещодавно нічого не змінював.
     Автоматично закриває її після використання.
     """
-    db = SessionLocal()
-    try:
+    info = session_info(request) if replica_engines else {}
+    async with AsyncSessionLocal(info=info) as db:
         yield db
-    finally:
-        db.close()
-
@@ -0,0 +1,441 @@
+"""
+Генератор синтетичних даних для навантажувального тестування.
+
+    DATABASE_URL=sqlite:////tmp/load.db python -m src.database.generate \\
+        --users 100000 --exchanges 10000000 --seed 42
+
+Той самий --seed на порожній БД дає той самий набір даних. Рядки пишуться пакетами
+(багаторядкові INSERT, у Postgres з --copy — COPY) і комітяться по одному пакету,
+тож пам'ять залежить від кількості користувачів і навичок, а не обмінів.
+Лічильники статистики та рейтингів рахуються під час генерації, без повторного проходу.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import time
+from array import array
+from bisect import bisect
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, Iterator, List, Sequence
+
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import AsyncSessionLocal, Base, async_engine
+from src.database.models import (
+    Category, Exchange, ExchangeStatus, Review, Skill, SkillLevel, User, skill_user_association,
+    ExchangeDailyStats, ExchangeStatusCount, SkillExchangeStats, UserExchangeStats
+)
+from src.database.upsert import dialect_insert
+from src.repository.stats import CREATED
+from src.schemas import SkillCategory
+from src.services.geo import GAZETTEER_PATH, locate
+
+
+# Скільки рядків в одному INSERT/COPY і одній транзакції
+GENERATE_BATCH_SIZE = int(os.getenv("GENERATE_BATCH_SIZE", "20000"))
+
+# Показник Zipf: чим більший, тим сильніше перекіс до популярних категорій, навичок і міст
+ZIPF_EXPONENT = 1.1
+
+# Частки статусів обмінів
+STATUS_WEIGHTS = {
+    ExchangeStatus.pending: 15,
+    ExchangeStatus.accepted: 15,
+    ExchangeStatus.rejected: 10,
+    ExchangeStatus.completed: 50,
+    ExchangeStatus.cancelled: 10,
+}
+
+# Ймовірність, що учасник завершеного обміну залишить відгук, і розподіл оцінок 1–5
+REVIEW_PROBABILITY = 0.6
+RATING_WEIGHTS = (3, 5, 12, 30, 50)
+
+# Частка навичок, яких власник навчає (решта — ті, яких хоче навчитися)
+TEACH_PROBABILITY = 0.6
+
+FIRST_NAMES = ["Олександр", "Марія", "Іван", "Олена", "Андрій", "Наталія", "Дмитро", "Ірина",
+               "Сергій", "Юлія", "Максим", "Оксана", "Тарас", "Софія", "Богдан", "Анна"]
+LAST_NAMES = ["Петренко", "Коваленко", "Шевченко", "Бондаренко", "Ткаченко", "Кравченко",
+              "Олійник", "Мельник", "Поліщук", "Лисенко", "Савченко", "Руденко"]
+
+TITLES = {
+    SkillCategory.programming: ["Python", "JavaScript", "SQL", "Django", "FastAPI", "React", "Git", "Docker"],
+    SkillCategory.music: ["Гітара", "Фортепіано", "Вокал", "Барабани", "Сольфеджіо", "Укулеле"],
+    SkillCategory.sports: ["Плавання", "Йога", "Біг", "Теніс", "Бокс", "Шахи", "Скелелазіння"],
+    SkillCategory.languages: ["Англійська", "Німецька", "Польська", "Іспанська", "Французька"],
+    SkillCategory.art: ["Малювання", "Акварель", "Фотографія", "Кераміка", "Каліграфія"],
+    SkillCategory.science: ["Математика", "Фізика", "Хімія", "Статистика", "Астрономія"],
+    SkillCategory.cooking: ["Випічка", "Італійська кухня", "Борщ", "Суші", "Кава"],
+    SkillCategory.other: ["Садівництво", "Шиття", "Ремонт", "Водіння", "Публічні виступи"],
+}
+LEVEL_TITLES = {
+    SkillLevel.beginner: "для початківців",
+    SkillLevel.intermediate: "середній рівень",
+    SkillLevel.advanced: "поглиблено",
+    SkillLevel.expert: "для профі",
+}
+MESSAGES = [None, "Привіт! Давай обміняємося знаннями", "Хочу навчитися, можу допомогти натомість",
+            "Маю вільні вечори, коли тобі зручно?", "Цікаво спробувати обмін"]
+
+
+def zipf_cum_weights(count: int, exponent: float = ZIPF_EXPONENT) -> List[float]:
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class WeightedChoice:
+    """Вибір з фіксованими вагами через бінарний пошук по накопичених вагах."""
+
+    def __init__(self, values: Sequence, cum_weights: List[float]):
+        self.values = values
+        self.cum_weights = cum_weights
+        self.total = cum_weights[-1]
+
+    def __call__(self, rng: random.Random):
+        return self.values[bisect(self.cum_weights, rng.random() * self.total)]
+
+
+class Generator:
+    """Детермінований потік рядків; ідентифікатори призначаються явно, починаючи з offsets."""
+
+    def __init__(self, args, offsets: Dict[str, int], category_ids: Dict[str, int]):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.offsets = offsets
+        self.category_ids = category_ids
+        # Дати відраховуються від --until, а не від поточного часу, щоб набір відтворювався
+        self.now = datetime.combine(args.until, datetime.min.time(), tzinfo=timezone.utc)
+        self.start = self.now - timedelta(days=args.days)
+
+        self.categories = WeightedChoice(list(SkillCategory), zipf_cum_weights(len(SkillCategory)))
+        with open(GAZETTEER_PATH, encoding="utf-8", newline="") as file:
+            cities = [row["name"] for row in csv.DictReader(file)]
+        self.rng.shuffle(cities)
+        self.cities = WeightedChoice([(city, locate(city)) for city in cities], zipf_cum_weights(len(cities)))
+        self.statuses = WeightedChoice(list(STATUS_WEIGHTS), list(accumulate(STATUS_WEIGHTS.values())))
+        self.ratings = WeightedChoice(range(1, 6), list(accumulate(RATING_WEIGHTS)))
+
+        # Власник і категорія кожної навички — єдине, що тримається в пам'яті для обмінів
+        self.skill_owner = array("l")
+        self.skill_category: List[str] = []
+        self.teach_skills = array("l")
+
+        # Лічильники, що потім записуються в таблиці статистики та users.rating_*
+        self.by_skill: Counter = Counter()
+        self.by_user: Counter = Counter()
+        self.by_status: Counter = Counter()
+        self.by_day: Counter = Counter()
+        self.ratings_by_user: Dict[int, List[int]] = {}
+
+    def _moment(self, after: datetime, max_days: float) -> datetime:
+        moment = after + timedelta(seconds=int(self.rng.random() * max_days * 86400))
+        return min(moment, self.now)
+
+    def users(self) -> Iterator[dict]:
+        rng, first = self.rng, self.offsets["users"] + 1
+        for user_id in range(first, first + self.args.users):
+            city, place = self.cities(rng)
+            yield {
+                "id": user_id,
+                "username": f"user_{user_id}",
+                "email": f"user_{user_id}@example.com",
+                "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "bio": None if rng.random() < 0.3 else f"Люблю ділитися знаннями, {city}",
+                "location": city,
+                **place,
+                "created_at": self._moment(self.start, self.args.days),
+                "is_active": rng.random() < 0.98,
+            }
+
+    def skills(self) -> Iterator[dict]:
+        rng, first = self.rng, self.offsets["skills"] + 1
+        first_user = self.offsets["users"] + 1
+        for skill_id in range(first, first + self.args.skills):
+            category = self.categories(rng)
+            level = rng.choice(list(SkillLevel))
+            can_teach = rng.random() < TEACH_PROBABILITY
+            owner = rng.randrange(first_user, first_user + self.args.users)
+            self.skill_owner.append(owner)
+            self.skill_category.append(category.value)
+            if can_teach:
+                self.teach_skills.append(skill_id)
+            title = rng.choice(TITLES[category])
+            yield {
+                "id": skill_id,
+                "title": f"{title} ({LEVEL_TITLES[level]})",
+                "description": f"{title}: заняття наживо або онлайн, рівень {level.value}",
+                "category": category.value,
+                "category_id": self.category_ids.get(category.value),
+                "level": level,
+                "can_teach": can_teach,
+                "want_learn": not can_teach,
+                "created_at": self._moment(self.start, self.args.days),
+            }
+
+    def links(self) -> Iterator[dict]:
+        first = self.offsets["skills"] + 1
+        for index, owner in enumerate(self.skill_owner):
+            yield {"user_id": owner, "skill_id": first + index}
+
+    def exchanges(self) -> Iterator[dict]:
+        """Обміни і, для завершених, відгуки; відгуки складаються в self.pending_reviews."""
+        rng, args = self.rng, self.args
+        first_user, first_skill = self.offsets["users"] + 1, self.offsets["skills"] + 1
+        # Популярність навичок теж за Zipf, порядок — випадковий
+        teach_skills = list(self.teach_skills) or [self.offsets["skills"] + 1]
+        rng.shuffle(teach_skills)
+        skills = WeightedChoice(teach_skills, zipf_cum_weights(len(teach_skills), exponent=0.8))
+        self.pending_reviews: List[dict] = []
+        review_id = self.offsets["reviews"]
+
+        for exchange_id in range(self.offsets["exchanges"] + 1, self.offsets["exchanges"] + args.exchanges + 1):
+            skill_id = skills(rng)
+            receiver = self.skill_owner[skill_id - first_skill]
+            sender = rng.randrange(first_user, first_user + args.users)
+            if sender == receiver:
+                sender = first_user + (sender - first_user + 1) % args.users
+            status = self.statuses(rng)
+            created_at = self._moment(self.start, args.days)
+            previous_status, version, updated_at = None, 1, None
+            if status != ExchangeStatus.pending:
+                updated_at = self._moment(created_at, 14)
+                if status == ExchangeStatus.completed or (
+                    status == ExchangeStatus.cancelled and rng.random() < 0.5
+                ):
+                    previous_status, version = ExchangeStatus.accepted, 3
+                else:
+                    previous_status, version = ExchangeStatus.pending, 2
+
+            category = self.skill_category[skill_id - first_skill]
+            self.by_skill[skill_id] += 1
+            self.by_user[sender] += 1
+            self.by_user[receiver] += 1
+            self.by_status[status.value] += 1
+            self.by_day[(created_at.date(), category, CREATED)] += 1
+            if updated_at is not None:
+                self.by_day[(updated_at.date(), category, status.value)] += 1
+
+            yield {
+                "id": exchange_id,
+                "sender_id": sender,
+                "receiver_id": receiver,
+                "skill_id": skill_id,
+                "message": rng.choice(MESSAGES),
+                "status": status,
+                "previous_status": previous_status,
+                "version": version,
+                "hours_proposed": rng.randint(1, 10),
+                "created_at": created_at,
+                "updated_at": updated_at,
+            }
+
+            if status == ExchangeStatus.completed:
+                for reviewer, reviewed in ((sender, receiver), (receiver, sender)):
+                    if rng.random() >= REVIEW_PROBABILITY:
+                        continue
+                    review_id += 1
+                    rating = self.ratings(rng)
+                    counters = self.ratings_by_user.setdefault(reviewed, [0] * 7)
+                    counters[0] += rating
+                    counters[1] += 1
+                    counters[1 + rating] += 1
+                    self.pending_reviews.append({
+                        "id": review_id,
+                        "exchange_id": exchange_id,
+                        "reviewer_id": reviewer,
+                        "reviewed_id": reviewed,
+                        "rating": rating,
+                        "comment": None if rating < 4 else "Дякую, все чудово!",
+                        "created_at": self._moment(updated_at, 3),
+                    })
+
+
+def batched(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Writer:
+    """Запис пакетів: executemany через Core або COPY через asyncpg."""
+
+    def __init__(self, db: AsyncSession, use_copy: bool):
+        self.db = db
+        self.use_copy = use_copy
+
+    async def write(self, table, rows: List[dict]) -> None:
+        if self.use_copy:
+            columns = list(rows[0])
+            connection = await (await self.db.connection()).get_raw_connection()
+            await connection.driver_connection.copy_records_to_table(
+                table.name, columns=columns, records=[_copy_record(row, columns) for row in rows]
+            )
+        else:
+            await self.db.execute(table.insert(), rows)
+        await self.db.commit()
+
+
+def _copy_record(row: dict, columns: List[str]) -> tuple:
+    # COPY не проходить через типи SQLAlchemy, тож Enum передаємо назвою
+    return tuple(
+        row[column].name if isinstance(row[column], (ExchangeStatus, SkillLevel)) else row[column]
+        for column in columns
+    )
+
+
+async def _offsets(db: AsyncSession) -> Dict[str, int]:
+    offsets = {}
+    for name, model in (("users", User), ("skills", Skill), ("exchanges", Exchange), ("reviews", Review)):
+        offsets[name] = (await db.execute(select(func.coalesce(func.max(model.id), 0)))).scalar_one()
+    return offsets
+
+
+async def _ensure_categories(db: AsyncSession) -> Dict[str, int]:
+    stmt = dialect_insert(db, Category.__table__).values([{"name": category.value} for category in SkillCategory])
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=["name"]))
+    await db.commit()
+    return dict((await db.execute(select(Category.name, Category.id))).all())
+
+
+async def _write_counters(db: AsyncSession, generator: Generator, batch_size: int) -> None:
+    # Як increment, але executemany одного скомпільованого upsert: ключів можуть бути мільйони
+    for table, key, counter, deltas in (
+        (SkillExchangeStats.__table__, ("skill_id",), "exchanges_count", generator.by_skill),
+        (UserExchangeStats.__table__, ("user_id",), "exchanges_count", generator.by_user),
+        (ExchangeStatusCount.__table__, ("status",), "count", generator.by_status),
+        (ExchangeDailyStats.__table__, ("day", "category", "event"), "count", generator.by_day),
+    ):
+        stmt = dialect_insert(db, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key), set_={counter: table.c[counter] + stmt.excluded[counter]}
+        )
+        rows = (
+            {**dict(zip(key, value if len(key) > 1 else (value,))), counter: delta}
+            for value, delta in deltas.items()
+        )
+        for batch in batched(rows, batch_size):
+            await db.execute(stmt, batch)
+        await db.commit()
+
+    users = User.__table__
+    stmt = (
+        update(users)
+        .where(users.c.id == bindparam("user_id"))
+        .values({
+            column: users.c[column] + bindparam(column)
+            for column in ("rating_sum", "rating_count", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+        })
+        # Не зачіпати updated_at: це не зміна профілю
+        .values(updated_at=users.c.updated_at)
+    )
+    rows = (
+        {"user_id": user_id, "rating_sum": counters[0], "rating_count": counters[1],
+         **{f"rating_{stars}": counters[1 + stars] for stars in range(1, 6)}}
+        for user_id, counters in generator.ratings_by_user.items()
+    )
+    for batch in batched(rows, batch_size):
+        await db.execute(stmt, batch)
+    await db.commit()
+
+
+async def _reset_sequences(db: AsyncSession) -> None:
+    # Ідентифікатори задані явно, тож послідовності Postgres треба підтягнути до max(id)
+    for table in ("users", "skills", "categories", "exchanges", "reviews"):
+        await db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT coalesce(max(id), 1) FROM {table}))"
+        ))
+    await db.commit()
+
+
+async def generate(args) -> None:
+    """Згенерувати користувачів, навички, обміни та відгуки пакетами."""
+    try:
+        # Як і main.py: таблиці створюються, якщо їх ще немає
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            dialect = db.get_bind().dialect.name
+            if args.copy and dialect != "postgresql":
+                raise SystemExit("--copy підтримується лише для Postgres")
+            if dialect == "sqlite":
+                # Без fsync на кожен коміт пакета; перервану генерацію простіше повторити з нуля
+                await db.execute(text("PRAGMA synchronous=OFF"))
+            generator = Generator(args, await _offsets(db), await _ensure_categories(db))
+            writer = Writer(db, args.copy)
+
+            started = time.perf_counter()
+            stages = (
+                ("користувачів", User.__table__, generator.users),
+                ("навичок", Skill.__table__, generator.skills),
+                ("зв'язків користувач-навичка", skill_user_association, generator.links),
+            )
+            for label, table, rows in stages:
+                await _write_stage(writer, label, table, rows(), args.batch_size, started)
+
+            reviews = 0
+            exchanges = 0
+            for batch in batched(generator.exchanges(), args.batch_size):
+                await writer.write(Exchange.__table__, batch)
+                exchanges += len(batch)
+                # Відгуки пакета пишуться слідом за його обмінами
+                if generator.pending_reviews:
+                    await writer.write(Review.__table__, generator.pending_reviews)
+                    reviews += len(generator.pending_reviews)
+                    generator.pending_reviews.clear()
+                _progress("обмінів", exchanges, started)
+            print(f"\nвідгуків: {reviews}")
+
+            await _write_counters(db, generator, args.batch_size)
+            if dialect == "postgresql":
+                await _reset_sequences(db)
+        print(f"Синтетичні дані згенеровано за {time.perf_counter() - started:.1f} с")
+    finally:
+        await async_engine.dispose()
+
+
+async def _write_stage(writer: Writer, label: str, table, rows: Iterator[dict], size: int, started: float) -> None:
+    written = 0
+    for batch in batched(rows, size):
+        await writer.write(table, batch)
+        written += len(batch)
+        _progress(label, written, started)
+    print()
+
+
+def _progress(label: str, written: int, started: float) -> None:
+    print(f"\r{label}: {written} ({time.perf_counter() - started:.1f} с)", end="", flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетичні дані SkillSwap для навантажувальних тестів")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--skills", type=int, help="за замовчуванням 3 на користувача")
+    parser.add_argument("--exchanges", type=int, help="за замовчуванням 10 на користувача")
+    parser.add_argument("--days", type=int, default=365, help="період, за який розкидані дати")
+    parser.add_argument("--until", type=date.fromisoformat, default=date.today(),
+                        help="кінець періоду, YYYY-MM-DD (за замовчуванням сьогодні)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=GENERATE_BATCH_SIZE)
+    parser.add_argument("--copy", action="store_true", help="писати через COPY (лише Postgres)")
+    args = parser.parse_args(argv)
+    if args.users < 2:
+        parser.error("--users має бути щонайменше 2")
+    args.skills = args.users * 3 if args.skills is None else args.skills
+    args.exchanges = args.users * 10 if args.exchanges is None else args.exchanges
+    if args.exchanges and args.skills < 1:
+        parser.error("для обмінів потрібна хоча б одна навичка")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(generate(parse_args()))
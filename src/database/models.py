@@ -1,12 +1,13 @@
 
 import enum
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime, ForeignKey,
+    Column, Integer, String, Boolean, Date, DateTime, Float, ForeignKey, Index, LargeBinary,
     Table, Text, Enum as SQLEnum
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database.db import Base
+from src.database.search import register_search_ddl
 
 
 # --- Association table ---
@@ -19,14 +20,14 @@ skill_user_association = Table(
 
 
 # --- Enums ---
-class SkillLevel(enum.Enum):
+class SkillLevel(str, enum.Enum):
     beginner = "beginner"
     intermediate = "intermediate"
     advanced = "advanced"
     expert = "expert"
 
 
-class ExchangeStatus(enum.Enum):
+class ExchangeStatus(str, enum.Enum):
     pending = "pending"
     accepted = "accepted"
     rejected = "rejected"
@@ -46,9 +47,22 @@ class User(Base):
     avatar_url = Column(String(255))
     phone = Column(String(20))
     location = Column(String(100))
+    # Координати з офлайн-геокодера та клітинка сітки для пошуку в радіусі;
+    # geo_cell = -1 (UNRESOLVED_CELL) — location не розпізнано
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geo_cell = Column(Integer, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     is_active = Column(Boolean, default=True)
+    # Денормалізований рейтинг: оновлюється разом зі створенням відгуку
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5 = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     skills = relationship("Skill", secondary=skill_user_association, back_populates="users")
@@ -57,6 +71,17 @@ class User(Base):
     given_reviews = relationship("Review", foreign_keys="Review.reviewer_id", back_populates="reviewer")
     received_reviews = relationship("Review", foreign_keys="Review.reviewed_id", back_populates="reviewed")
 
+    @property
+    def rating(self) -> dict:
+        """Середня оцінка, кількість відгуків і гістограма 1–5 з лічильників."""
+        count = self.rating_count or 0
+        return {
+            "user_id": self.id,
+            "average_rating": round(self.rating_sum / count, 2) if count else 0,
+            "total_reviews": count,
+            "histogram": {stars: getattr(self, f"rating_{stars}") or 0 for stars in range(1, 6)}
+        }
+
 
 class Skill(Base):
     __tablename__ = "skills"
@@ -84,8 +109,13 @@ class Exchange(Base):
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     skill_id = Column(Integer, ForeignKey("skills.id"), nullable=False)
+    cycle_id = Column(Integer, ForeignKey("exchange_cycles.id", ondelete="CASCADE"), index=True)
     message = Column(Text)
     status = Column(SQLEnum(ExchangeStatus), default=ExchangeStatus.pending)
+    # Статус до останнього переходу: UPDATE копіює його сам, тож RETURNING віддає старий статус
+    previous_status = Column(SQLEnum(ExchangeStatus))
+    # Лічильник версій для compare-and-swap оновлень
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     hours_proposed = Column(Integer, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -95,10 +125,28 @@ class Exchange(Base):
     receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_exchanges")
     skill = relationship("Skill", back_populates="exchanges")
     reviews = relationship("Review", back_populates="exchange")
+    cycle = relationship("ExchangeCycle", back_populates="exchanges")
+
+
+class ExchangeCycle(Base):
+    """Запропонований кільцевий обмін A→B→C→A; ланки — звичайні обміни з cycle_id."""
+    __tablename__ = "exchange_cycles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    length = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    exchanges = relationship("Exchange", back_populates="cycle", order_by="Exchange.id")
 
 
 class Review(Base):
     __tablename__ = "reviews"
+    # Один відгук на учасника обміну; захищає лічильники рейтингу від гонки двох POST
+    __table_args__ = (
+        Index("ix_reviews_exchange_reviewer", "exchange_id", "reviewer_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exchange_id = Column(Integer, ForeignKey("exchanges.id"), nullable=False)
@@ -113,11 +161,59 @@ class Review(Base):
     reviewer = relationship("User", foreign_keys=[reviewer_id], back_populates="given_reviews")
     reviewed = relationship("User", foreign_keys=[reviewed_id], back_populates="received_reviews")
 
+# --- Статистика: лічильники, що оновлюються разом з обмінами ---
+class SkillExchangeStats(Base):
+    __tablename__ = "skill_exchange_stats"
+
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    exchanges_count = Column(Integer, nullable=False, default=0, index=True)
+
+
+class UserExchangeStats(Base):
+    __tablename__ = "user_exchange_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    exchanges_count = Column(Integer, nullable=False, default=0, index=True)
+
+
+class ExchangeStatusCount(Base):
+    __tablename__ = "exchange_status_counts"
+
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ExchangeDailyStats(Base):
+    """Подієві лічильники за добу: created або новий статус обміну, у розрізі категорії."""
+    __tablename__ = "exchange_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String(50), primary_key=True)
+    event = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class IdempotencyRecord(Base):
+    """Перша відповідь на POST з Idempotency-Key; status_code NULL — запит ще виконується."""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    # JSON-список пар [назва, значення] заголовків першої відповіді
+    headers = Column(Text)
+    body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
 class Category(Base):
     __tablename__ = 'categories'
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
 
-    skills = relationship('Skill', back_populates='category')
+    skills = relationship('Skill')
+
 
+# Повнотекстовий пошук навичок (tsvector у Postgres, FTS5 у SQLite)
+register_search_ddl(Skill.__table__)
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Налаштування пулу з'єднань зі змінних середовища
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+# Межі кошиків гістограми очікування з'єднання, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Лічильники та гістограма часу очікування з'єднання з пулу."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.timeouts = 0
+
+    def observe(self, wait_ms: float) -> None:
+        with self._lock:
+            index = len(WAIT_BUCKETS_MS)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    index = i
+                    break
+            self.buckets[index] += 1
+            self.count += 1
+            self.total_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            # Кумулятивні кошики, як у гістограмах Prometheus
+            cumulative, running = {}, 0
+            for bound, hits in zip(WAIT_BUCKETS_MS, self.buckets):
+                running += hits
+                cumulative[f"le_{bound}ms"] = running
+            cumulative["le_inf"] = running + self.buckets[-1]
+            return {
+                "count": self.count,
+                "total_ms": round(self.total_ms, 3),
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+                "max_ms": round(self.max_ms, 3),
+                "timeouts": self.timeouts,
+                "buckets": cumulative,
+            }
+
+
+# Метрики за іменем пулу (pool_logging_name); переживають dispose()/recreate()
+_metrics: Dict[str, PoolMetrics] = {}
+# Двигуни, про які звітує /health/pool
+_engines: Dict[str, object] = {}
+
+
+def _metrics_for(name: str) -> PoolMetrics:
+    metrics = _metrics.get(name)
+    if metrics is None:
+        metrics = _metrics.setdefault(name, PoolMetrics())
+    return metrics
+
+
+class _TimedPoolMixin:
+    """Вимірює, скільки часу запит чекає на з'єднання з пулу."""
+
+    def connect(self):
+        metrics = _metrics_for(self._orig_logging_name or "default")
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.record_timeout()
+            raise
+        finally:
+            metrics.observe((time.perf_counter() - started) * 1000)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and (
+        parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+    )
+
+
+def engine_options(url: str, name: str, is_async: bool = False) -> dict:
+    """Параметри create_engine()/create_async_engine() для пулу з'єднань."""
+    # In-memory SQLite живе в одному з'єднанні, пул там не налаштовується
+    if _is_memory_sqlite(url):
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+        "pool_logging_name": name,
+    }
+
+
+def register_engine(name: str, engine) -> None:
+    """Додати двигун до звіту про стан пулів."""
+    _engines[name] = engine
+
+
+def pool_status() -> dict:
+    """Поточний стан усіх зареєстрованих пулів з'єднань."""
+    pools = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        info = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            info.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        info["wait"] = _metrics_for(name).snapshot()
+        pools[name] = info
+    return pools
@@ -0,0 +1,18 @@
+import asyncio
+
+from src.database.db import AsyncSessionLocal, async_engine
+from src.repository import stats as repository_stats
+
+
+async def rebuild_stats():
+    """Перерахувати таблиці статистики з таблиці exchanges."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await repository_stats.rebuild(db)
+        print("Статистику обмінів перераховано!")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_stats())
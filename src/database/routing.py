@@ -0,0 +1,156 @@
+import hashlib
+import hmac
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi import Request
+
+from src.utils.auth import SECRET_KEY, verify_token
+
+
+# Репліки для читання, через кому; якщо порожньо — все йде на основну БД
+REPLICA_URLS: List[str] = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+
+# Скільки секунд після запису читання користувача йдуть на основну БД
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+# Скільки ключів користувачів пам'ятати; найстаріші відкидаються першими
+READ_YOUR_WRITES_MAX_KEYS = int(os.getenv("DB_READ_YOUR_WRITES_MAX_KEYS", "100000"))
+
+# HTTP-методи, які не змінюють дані й можуть читати з репліки
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Cookie з часом останнього запису клієнта: на відміну від RecentWriters,
+# її бачить будь-який воркер, на який потрапить наступний запит
+WRITE_COOKIE = "db_written_at"
+
+
+class RecentWriters:
+    """
+    Пам'ятає користувачів, які щойно писали в БД, щоб вони бачили свої зміни.
+    Ключі впорядковані за часом запису, тож прострочені знімаються з початку.
+    """
+
+    def __init__(self, window_seconds: float, max_keys: int = READ_YOUR_WRITES_MAX_KEYS):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._written_at: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_key: Optional[str]) -> None:
+        if not user_key:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._written_at[user_key] = now
+            self._written_at.move_to_end(user_key)
+            while self._written_at:
+                oldest_key, written_at = next(iter(self._written_at.items()))
+                if now - written_at <= self.window_seconds and len(self._written_at) <= self.max_keys:
+                    break
+                del self._written_at[oldest_key]
+
+    def __len__(self) -> int:
+        return len(self._written_at)
+
+    def recently_wrote(self, user_key: Optional[str]) -> bool:
+        if not user_key:
+            return False
+        with self._lock:
+            written_at = self._written_at.get(user_key)
+            if written_at is None:
+                return False
+            if time.monotonic() - written_at > self.window_seconds:
+                del self._written_at[user_key]
+                return False
+            return True
+
+
+recent_writers = RecentWriters(READ_YOUR_WRITES_SECONDS)
+
+
+def request_user_key(request: Request) -> Optional[str]:
+    """Ключ користувача запиту: sub з JWT або, без токена, адреса клієнта."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = verify_token(token)
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    if request.client:
+        return f"client:{request.client.host}"
+    return None
+
+
+def _sign(value: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def write_cookie(written_at: float) -> str:
+    """Значення cookie: unix-час запису і його HMAC, щоб клієнт не міг його підробити."""
+    value = f"{written_at:.3f}"
+    return f"{value}.{_sign(value)}"
+
+
+def cookie_wrote_recently(cookie: Optional[str], window_seconds: float = READ_YOUR_WRITES_SECONDS) -> bool:
+    value, _, signature = (cookie or "").rpartition(".")
+    if not value or not hmac.compare_digest(signature, _sign(value)):
+        return False
+    try:
+        written_at = float(value)
+    except ValueError:
+        return False
+    return time.time() - written_at <= window_seconds
+
+
+def session_info(request: Request) -> dict:
+    """Параметри маршрутизації для сесії поточного запиту."""
+    user_key = request_user_key(request)
+    read_only = (
+        request.method in READ_ONLY_METHODS
+        and not recent_writers.recently_wrote(user_key)
+        and not cookie_wrote_recently(request.cookies.get(WRITE_COOKIE))
+    )
+    return {"read_only": read_only, "user_key": user_key, "request_state": request.state}
+
+
+def mark_write(info: dict) -> None:
+    """Запам'ятати запис сесії: у процесі й у стані запиту, звідки його забере ReadYourWritesMiddleware."""
+    recent_writers.mark(info.get("user_key"))
+    state = info.get("request_state")
+    if state is not None:
+        state.db_written_at = time.time()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Якщо запит писав у БД, ставить підписану cookie з часом запису.
+    Поки вона свіжа, читання клієнта йдуть на основну БД незалежно від воркера.
+    """
+
+    def __init__(self, app, window_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message):
+            written_at = state.get("db_written_at")
+            if message["type"] == "http.response.start" and written_at is not None:
+                cookie = (
+                    f"{WRITE_COOKIE}={write_cookie(written_at)}; Max-Age={math.ceil(self.window_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,104 @@
+import re
+from typing import List
+
+from sqlalchemy import DDL, event, func, literal_column, or_, table, column
+
+
+# --- Postgres: згенерована tsvector-колонка з GIN-індексом ---
+# Конфігурація 'english' дає стемінг англійських слів, 'simple' — точні
+# лексеми для української (у Postgres немає вбудованого українського словника).
+PG_SEARCH_DDL = [
+    """
+    ALTER TABLE skills ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_skills_search_vector ON skills USING GIN (search_vector)",
+]
+
+
+# --- SQLite: тіньова FTS5-таблиця, синхронізована тригерами ---
+# porter стемить англійські слова, unicode61 коректно розбиває кирилицю.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS skills_fts USING fts5(
+        title, description, category,
+        content='skills', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS skills_fts_ai AFTER INSERT ON skills BEGIN
+        INSERT INTO skills_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS skills_fts_ad AFTER DELETE ON skills BEGIN
+        INSERT INTO skills_fts(skills_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS skills_fts_au AFTER UPDATE ON skills BEGIN
+        INSERT INTO skills_fts(skills_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+        INSERT INTO skills_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    "INSERT INTO skills_fts(skills_fts) VALUES ('rebuild')",
+]
+
+
+skills_fts = table("skills_fts", column("rowid"), column("skills_fts"))
+
+
+def register_search_ddl(skills_table) -> None:
+    """Створювати пошукові структури разом із таблицею skills (create_all)."""
+    for statement in PG_SEARCH_DDL:
+        event.listen(skills_table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(skills_table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def search_terms(search: str) -> List[str]:
+    """Нормалізовані слова запиту; синтаксис FTS з вводу користувача відкидається."""
+    return re.findall(r"\w+", search.lower())
+
+
+def apply_search(query, entity, search: str, dialect: str):
+    """
+    Додати до запиту повнотекстовий фільтр і сортування за релевантністю.
+    Кожне слово шукається як префікс, тож "гітар" знаходить "гітара", "гітарі".
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query
+
+    if dialect == "postgresql":
+        vector = literal_column("skills.search_vector")
+        prefix_query = " & ".join(f"{term}:*" for term in terms)
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), prefix_query).op("||")(
+            func.plainto_tsquery(literal_column("'english'::regconfig"), " ".join(terms))
+        )
+        return (
+            query.where(vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc())
+        )
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            query.join(skills_fts, skills_fts.c.rowid == entity.id)
+            .where(skills_fts.c.skills_fts.op("MATCH")(match))
+            .order_by(func.bm25(literal_column("skills_fts")))
+        )
+
+    # Інші СУБД: простий пошук підрядка
+    pattern = f"%{search}%"
+    return query.where(or_(entity.title.ilike(pattern), entity.description.ilike(pattern)))
@@ -0,0 +1,91 @@
+from typing import Callable, Dict, Hashable, List, Sequence, Union
+
+from sqlalchemy import Row, Select, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import FromClause
+
+
+def dialect_insert(db: AsyncSession, table):
+    """INSERT з підтримкою ON CONFLICT для поточної СУБД (Postgres або SQLite)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT не підтримується для {dialect}")
+
+
+async def increment(
+    db: AsyncSession,
+    table,
+    key: Union[str, Sequence[str]],
+    counter: str,
+    deltas: Dict[Hashable, int]
+) -> None:
+    """
+    Атомарно додати deltas[k] до лічильника рядка з ключем k (рядок створюється за потреби).
+    Для складеного ключа key — кортеж назв колонок, а ключі deltas — кортежі значень.
+    Одне багаторядкове INSERT ... ON CONFLICT DO UPDATE на всі ключі,
+    у транзакції сесії, тож лічильники комітяться разом з основними змінами.
+    """
+    columns = [key] if isinstance(key, str) else list(key)
+    rows = [
+        {**dict(zip(columns, value if len(columns) > 1 else (value,))), counter: delta}
+        for value, delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+    stmt = dialect_insert(db, table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=columns,
+        set_={counter: table.c[counter] + stmt.excluded[counter]}
+    )
+    await db.execute(stmt)
+
+
+def increment_from(db: AsyncSession, table, key: Union[str, Sequence[str]], counter: str, rows: Select):
+    """
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE: rows дає колонки ключа і приріст лічильника.
+    rows має бути з GROUP BY (один рядок на ключ) — це ж знімає неоднозначність ON у SQLite.
+    """
+    columns = [key] if isinstance(key, str) else list(key)
+    stmt = dialect_insert(db, table).from_select(columns + [counter], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=columns,
+        set_={counter: table.c[counter] + stmt.excluded[counter]}
+    )
+
+
+async def execute_with_increments(
+    db: AsyncSession,
+    statement,
+    increments: Callable[[FromClause], List]
+) -> List[Row]:
+    """
+    Виконати DML з RETURNING і оновити лічильники з рядків, які він повернув.
+    increments(source) будує increment_from-запити поверх source з колонками RETURNING.
+    Postgres — одним запитом: лічильники йдуть data-modifying CTE поруч з основним DML.
+    SQLite таких CTE не має: рядки RETURNING підставляються літералами,
+    а кожен лічильник оновлюється окремим запитом у тій самій транзакції.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        main = statement.cte("main")
+        query = select(main).execution_options(writes=True)
+        for number, stmt in enumerate(increments(main)):
+            query = query.add_cte(stmt.cte(f"increment_{number}"))
+        return (await db.execute(query)).all()
+
+    rows = (await db.execute(statement)).all()
+    if rows:
+        columns = list(statement.exported_columns)
+        source = union_all(*[
+            select(*[
+                literal(value, column.type).label(column.key)
+                for column, value in zip(columns, row)
+            ])
+            for row in rows
+        ]).subquery("main")
+        for stmt in increments(source):
+            await db.execute(stmt)
+    return rows
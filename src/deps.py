@@ -1,29 +1,68 @@
 
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.database.models import User
+from src.services.geo import NearFilter, gazetteer
+from src.services.principals import Principal, principals
 from src.utils.auth import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """
+    Користувач за JWT. Перевірений токен кешується разом із Principal,
+    тож повторні запити з тим самим токеном не звертаються до БД.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    principal = principals.get(token)
+    if principal is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+        except JWTError:
+            raise credentials_exception
+
+        result = await db.execute(
+            select(User.id, User.username, User.email, User.is_active).where(User.id == int(user_id))
+        )
+        row = result.first()
+        if row is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        principal = Principal(row.id, row.username, row.email, row.is_active is not False)
+        principals.put(token, principal, payload.get("exp"))
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user",
+        )
+    return principal
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
-    return user
 
+def near_param(
+    near: Optional[str] = Query(None, description='Місто ("Київ") або координати ("50.45,30.52")'),
+    radius_km: float = Query(25, gt=0, le=1000, description="Радіус пошуку в км")
+) -> Optional[NearFilter]:
+    """Dependency: фільтр "поруч із" для списків і пошуку збігів."""
+    if near is None:
+        return None
+    center = gazetteer.geocode(near)
+    if center is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Невідоме місце: {near}"
+        )
+    return NearFilter(center, radius_km)
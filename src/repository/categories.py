@@ -1,33 +1,73 @@
+from typing import List, Sequence, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import Category
+from src.database.upsert import dialect_insert
 from src.schemas import CategoryCreate
+from src.utils.bulk import row_result
 
 
-def create_category(db: Session, category: CategoryCreate):
-    db_category = Category(name=category.name)
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+async def create_category(db: AsyncSession, category: CategoryCreate):
+    result = await db.execute(insert(Category).values(name=category.name).returning(Category))
+    db_category = result.scalar_one()
+    await db.commit()
     return db_category
 
-def get_categories(db: Session):
-    return db.query(Category).all()
+async def bulk_create_categories(
+    db: AsyncSession,
+    rows: Sequence[Tuple[int, CategoryCreate]],
+    upsert: bool = False
+) -> List[dict]:
+    result = await db.execute(
+        select(Category.name, Category.id).where(Category.name.in_([category.name for _, category in rows]))
+    )
+    existing = dict(result.all())
 
-def get_category(db: Session, category_id: int):
-    return db.query(Category).filter(Category.id == category_id).first()
+    results, indexes = [], {}
+    for index, category in rows:
+        if category.name in indexes:
+            results.append(row_result(index, 'error', error='Duplicate name in batch'))
+        elif category.name in existing:
+            if upsert:
+                results.append(row_result(index, 'unchanged', id=existing[category.name]))
+            else:
+                results.append(row_result(index, 'error', error='Category already exists'))
+        else:
+            indexes[category.name] = index
 
-def update_category(db: Session, category_id: int, name: str):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    if indexes:
+        stmt = dialect_insert(db, Category.__table__).on_conflict_do_nothing(index_elements=['name'])
+        inserted = await db.execute(
+            stmt.returning(Category.id, Category.name), [{'name': name} for name in indexes]
+        )
+        for category_id, name in inserted:
+            results.append(row_result(indexes.pop(name), 'created', id=category_id))
+        # Created concurrently by another request between the check and the insert
+        for name, index in indexes.items():
+            results.append(row_result(index, 'error', error='Category already exists'))
+        await db.commit()
+    return results
+
+async def get_categories(db: AsyncSession):
+    result = await db.execute(select(Category))
+    return result.scalars().all()
+
+async def get_category(db: AsyncSession, category_id: int):
+    return await db.get(Category, category_id)
+
+async def update_category(db: AsyncSession, category_id: int, name: str):
+    result = await db.execute(
+        update(Category).where(Category.id == category_id).values(name=name).returning(Category)
+    )
+    db_category = result.scalar_one_or_none()
     if db_category:
-        db_category.name = name
-        db.commit()
-        db.refresh(db_category)
+        await db.commit()
     return db_category
 
-def delete_category(db: Session, category_id: int):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+async def delete_category(db: AsyncSession, category_id: int):
+    db_category = await db.get(Category, category_id)
     if db_category:
-        db.delete(db_category)
-        db.commit()
+        await db.delete(db_category)
+        await db.commit()
     return db_category
@@ -1,132 +1,300 @@
+from functools import partial
+from typing import List, Optional, Sequence, Set, Tuple
+from sqlalchemy import insert, select, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
+from src.database.models import Exchange, ExchangeCycle, Skill
+from src.database.upsert import execute_with_increments
+from src.repository import stats as repository_stats
+from src.repository.loading import eager_options
+from src.services.leaderboard import leaderboards
+from src.utils.pagination import paginate
+from src.schemas import (
+    ExchangeCreate, ExchangeUpdate, ExchangeStatus, ExchangeResponse, ExchangeCycleResponse
+)
 
-from src.database.models import Exchange, User, Skill
-from src.schemas import ExchangeCreate, ExchangeUpdate, ExchangeStatus
+
+# Скільки кілець зберігати за один коміт пакетної задачі
+CYCLE_BATCH_SIZE = 1000
 
 
 async def get_exchanges(
-    db: Session,
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[ExchangeStatus] = None,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    after_id: Optional[int] = None
 ) -> List[Exchange]:
     """Отримати список обмінів з фільтрацією."""
-    query = db.query(Exchange)
+    query = select(Exchange).options(*eager_options(Exchange, ExchangeResponse))
 
     if status_filter:
-        query = query.filter(Exchange.status == status_filter.value)
+        query = query.where(Exchange.status == status_filter.value)
 
     if user_id:
-        query = query.filter(
+        query = query.where(
             or_(
                 Exchange.sender_id == user_id,
                 Exchange.receiver_id == user_id
             )
         )
 
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(paginate(query, Exchange.id, skip, limit, after_id))
+    return result.scalars().all()
 
 
-async def get_exchange(db: Session, exchange_id: int) -> Optional[Exchange]:
+async def get_exchange(db: AsyncSession, exchange_id: int) -> Optional[Exchange]:
     """Отримати обмін за ID."""
-    return db.query(Exchange).filter(Exchange.id == exchange_id).first()
+    result = await db.execute(
+        select(Exchange)
+        .options(*eager_options(Exchange, ExchangeResponse))
+        .where(Exchange.id == exchange_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def _load_exchange(db: AsyncSession, exchange_id: int) -> Optional[Exchange]:
+    """Обмін для відповіді після запису: учасники, навичка та її власники одним JOIN-запитом."""
+    result = await db.execute(
+        select(Exchange)
+        .options(
+            joinedload(Exchange.sender),
+            joinedload(Exchange.receiver),
+            joinedload(Exchange.skill).joinedload(Skill.users)
+        )
+        .where(Exchange.id == exchange_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.unique().scalars().first()
 
 
 async def create_exchange(
-    db: Session,
+    db: AsyncSession,
     exchange: ExchangeCreate,
     sender_id: int
 ) -> Optional[Exchange]:
-    """Створити новий запит на обмін."""
-    # Перевіряємо, чи існують користувачі та навичка
-    sender = db.query(User).filter(User.id == sender_id).first()
-    receiver = db.query(User).filter(User.id == exchange.receiver_id).first()
-    skill = db.query(Skill).filter(Skill.id == exchange.skill_id).first()
-
-    if not all([sender, receiver, skill]):
+    """
+    Створити новий запит на обмін одним INSERT ... RETURNING разом з лічильниками.
+    Існування користувачів і навички перевіряють зовнішні ключі: інакше None.
+    """
+    statement = (
+        insert(Exchange.__table__)
+        .values(
+            sender_id=sender_id,
+            receiver_id=exchange.receiver_id,
+            skill_id=exchange.skill_id,
+            message=exchange.message,
+            hours_proposed=exchange.hours_proposed,
+            status=ExchangeStatus.pending.value
+        )
+        .returning(Exchange.id, Exchange.skill_id, Exchange.sender_id, Exchange.receiver_id, Exchange.status)
+    )
+    try:
+        rows = await execute_with_increments(
+            db, statement, partial(repository_stats.exchange_increments, db)
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         return None
+    return await _load_exchange(db, rows[0].id)
 
-    db_exchange = Exchange(
-        sender_id=sender_id,
-        receiver_id=exchange.receiver_id,
-        skill_id=exchange.skill_id,
-        message=exchange.message,
-        hours_proposed=exchange.hours_proposed,
-        status=ExchangeStatus.pending.value
-    )
 
-    db.add(db_exchange)
-    db.commit()
-    db.refresh(db_exchange)
-    return db_exchange
+class ExchangeConflict(Exception):
+    """Обмін уже змінився: статус не дозволяє переходу або версія застаріла."""
+
+    def __init__(self, status: ExchangeStatus, version: int):
+        super().__init__(status, version)
+        self.status = status
+        self.version = version
+
+
+RECEIVER, PARTICIPANT = "receiver", "participant"
+
+# Дозволені переходи: новий статус -> (з яких статусів, хто може перевести)
+TRANSITIONS = {
+    ExchangeStatus.accepted: ({ExchangeStatus.pending}, RECEIVER),
+    ExchangeStatus.rejected: ({ExchangeStatus.pending}, RECEIVER),
+    ExchangeStatus.cancelled: ({ExchangeStatus.pending, ExchangeStatus.accepted}, PARTICIPANT),
+    ExchangeStatus.completed: ({ExchangeStatus.accepted}, PARTICIPANT),
+}
+
+
+def _actor_clause(actor: str, user_id: int):
+    if actor == RECEIVER:
+        return Exchange.receiver_id == user_id
+    return or_(Exchange.sender_id == user_id, Exchange.receiver_id == user_id)
 
 
 async def update_exchange(
-    db: Session,
+    db: AsyncSession,
     exchange_id: int,
     exchange_update: ExchangeUpdate,
     current_user_id: int
 ) -> Optional[Exchange]:
-    """Оновити статус обміну."""
-    db_exchange = db.query(Exchange).filter(Exchange.id == exchange_id).first()
-
-    if not db_exchange:
-        return None
+    """
+    Змінити статус обміну одним compare-and-swap UPDATE: дозволений перехід,
+    право користувача та (якщо передано) версія — умови WHERE, без читання й блокувань.
+    None — обміну немає або користувач не може його змінювати; ExchangeConflict — гонка
+    або недозволений перехід. Переходи в pending не існує — на нього ValueError.
+    """
+    new_status = exchange_update.status
+    if new_status is None:
+        conditions, actor = [], PARTICIPANT
+        values = {}
+    else:
+        if new_status not in TRANSITIONS:
+            raise ValueError(new_status)
+        sources, actor = TRANSITIONS[new_status]
+        conditions = [Exchange.status.in_([source.value for source in sources])]
+        values = {
+            "previous_status": Exchange.status,
+            "status": new_status.value
+        }
+    if exchange_update.version is not None:
+        conditions.append(Exchange.version == exchange_update.version)
+    if exchange_update.message:
+        values["message"] = exchange_update.message
 
-    # Перевіряємо, чи користувач має право оновлювати цей обмін
-    if exchange_update.status in [ExchangeStatus.accepted, ExchangeStatus.rejected]:
-        # Тільки отримувач може прийняти або відхилити
-        if db_exchange.receiver_id != current_user_id:
-            return None
-    elif exchange_update.status == ExchangeStatus.cancelled:
-        # Скасувати може будь-хто з учасників
-        if current_user_id not in [db_exchange.sender_id, db_exchange.receiver_id]:
+    statement = (
+        update(Exchange.__table__)
+        .where(Exchange.id == exchange_id, _actor_clause(actor, current_user_id), *conditions)
+        .values(version=Exchange.version + 1, **values)
+        .returning(
+            Exchange.skill_id, Exchange.previous_status, Exchange.status,
+            Exchange.sender_id, Exchange.receiver_id
+        )
+    )
+    if new_status is None:
+        rows = (await db.execute(statement)).all()
+    else:
+        # Лічильники рахуються з RETURNING: при невдалому CAS рядків немає — й оновлень теж
+        rows = await execute_with_increments(
+            db, statement, partial(repository_stats.status_change_increments, db)
+        )
+    updated = rows[0] if rows else None
+    if updated is None:
+        # Лише на шляху невдачі: розрізняємо "немає/не ваш" і конфлікт
+        current = (await db.execute(
+            select(Exchange.status, Exchange.version)
+            .where(Exchange.id == exchange_id, _actor_clause(actor, current_user_id))
+        )).first()
+        if current is None:
             return None
+        raise ExchangeConflict(ExchangeStatus(current.status), current.version)
 
-    # Оновлюємо статус
-    db_exchange.status = exchange_update.status.value
-    if exchange_update.message:
-        db_exchange.message = exchange_update.message
+    await db.commit()
+
+    # completed — кінцевий статус, тож перехід у нього завжди додає завершений обмін
+    if new_status == ExchangeStatus.completed:
+        leaderboards.add_completed(updated.sender_id)
+        leaderboards.add_completed(updated.receiver_id)
+    return await _load_exchange(db, exchange_id)
+
+
+async def get_user_sent_exchanges(db: AsyncSession, user_id: int) -> List[Exchange]:
+    result = await db.execute(
+        select(Exchange).options(*eager_options(Exchange, ExchangeResponse)).where(Exchange.sender_id == user_id)
+    )
+    return result.scalars().all()
 
-    db.commit()
-    db.refresh(db_exchange)
-    return db_exchange
 
+async def get_user_received_exchanges(db: AsyncSession, user_id: int) -> List[Exchange]:
+    result = await db.execute(
+        select(Exchange).options(*eager_options(Exchange, ExchangeResponse)).where(Exchange.receiver_id == user_id)
+    )
+    return result.scalars().all()
+
+async def get_users_in_open_cycles(db: AsyncSession) -> Set[int]:
+    """Користувачі, чия кільцева пропозиція ще не завершена і ніким не відхилена."""
+    broken = select(Exchange.cycle_id).where(
+        Exchange.cycle_id.is_not(None),
+        Exchange.status.in_([ExchangeStatus.rejected.value, ExchangeStatus.cancelled.value])
+    )
+    result = await db.execute(
+        select(Exchange.sender_id).distinct()
+        .where(
+            Exchange.cycle_id.is_not(None),
+            Exchange.cycle_id.not_in(broken),
+            Exchange.status.in_([ExchangeStatus.pending.value, ExchangeStatus.accepted.value])
+        )
+    )
+    return set(result.scalars())
 
-async def get_user_sent_exchanges(db: Session, user_id: int) -> List[Exchange]:
-    return db.query(Exchange).filter(Exchange.sender_id == user_id).all()
 
+async def create_exchange_cycles(
+    db: AsyncSession,
+    proposals: Sequence[Tuple[float, List[Tuple[int, int, int]]]]
+) -> int:
+    """
+    Зберегти знайдені кільця (оцінка, ланки): ExchangeCycle і по обміну pending на кожну ланку.
+    Кожен отримувач приймає або відхиляє свою ланку звичайним PUT /exchanges/{id}.
+    """
+    for offset in range(0, len(proposals), CYCLE_BATCH_SIZE):
+        created = []
+        for score, legs in proposals[offset:offset + CYCLE_BATCH_SIZE]:
+            exchanges = [
+                Exchange(
+                    sender_id=sender_id,
+                    receiver_id=receiver_id,
+                    skill_id=skill_id,
+                    message=f"Пропозиція кільцевого обміну на {len(legs)} учасників",
+                    status=ExchangeStatus.pending.value
+                )
+                for sender_id, receiver_id, skill_id in legs
+            ]
+            db.add(ExchangeCycle(length=len(legs), score=score, exchanges=exchanges))
+            created.extend(exchanges)
+        await repository_stats.record_exchanges(db, created)
+        await db.commit()
+    return len(proposals)
 
-async def get_user_received_exchanges(db: Session, user_id: int) -> List[Exchange]:
-    return db.query(Exchange).filter(Exchange.receiver_id == user_id).all()
 
-def get_filtered_exchanges(
-    db: Session,
+async def get_user_exchange_cycles(db: AsyncSession, user_id: int) -> List[ExchangeCycle]:
+    """Кільцеві пропозиції, в яких бере участь користувач."""
+    member = select(Exchange.cycle_id).where(
+        Exchange.cycle_id.is_not(None),
+        or_(Exchange.sender_id == user_id, Exchange.receiver_id == user_id)
+    )
+    result = await db.execute(
+        select(ExchangeCycle)
+        .options(*eager_options(ExchangeCycle, ExchangeCycleResponse))
+        .where(ExchangeCycle.id.in_(member))
+        .order_by(ExchangeCycle.score.desc(), ExchangeCycle.id)
+    )
+    return result.scalars().all()
+
+
+async def get_filtered_exchanges(
+    db: AsyncSession,
     from_date=None,
     to_date=None,
     status=None,
     user_id=None,
     sort_order='desc'
 ):
-    query = db.query(Exchange)
+    query = select(Exchange)
 
     if from_date:
-        query = query.filter(Exchange.created_at >= from_date)
+        query = query.where(Exchange.created_at >= from_date)
     if to_date:
-        query = query.filter(Exchange.created_at <= to_date)
+        query = query.where(Exchange.created_at <= to_date)
     if status:
-        query = query.filter(Exchange.status == status)
+        query = query.where(Exchange.status == status)
     if user_id:
-        query = query.filter(Exchange.user_id == user_id)
+        query = query.where(
+            or_(Exchange.sender_id == user_id, Exchange.receiver_id == user_id)
+        )
 
     if sort_order == 'asc':
         query = query.order_by(Exchange.created_at.asc())
     else:
         query = query.order_by(Exchange.created_at.desc())
 
-    return query.all()
+    result = await db.execute(query)
+    return result.scalars().all()
@@ -0,0 +1,52 @@
+import typing
+from functools import lru_cache
+from typing import Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+
+def _nested_model(annotation) -> Tuple[Type[BaseModel], bool]:
+    """Розгорнути Optional/List і повернути (вкладена схема, чи це список)."""
+    is_list = False
+    while typing.get_origin(annotation) is not None:
+        origin = typing.get_origin(annotation)
+        if origin in (list, typing.List, tuple, set):
+            is_list = True
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if not args:
+            return None, is_list
+        annotation = args[0]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, is_list
+
+
+@lru_cache(maxsize=None)
+def eager_options(entity, response_model: Type[BaseModel], _path: tuple = ()) -> tuple:
+    """
+    Опції завантаження для запиту, що наповнює response_model.
+
+    Кожне вкладене поле схеми, яке збігається з relationship моделі,
+    завантажується наперед: many-to-one через joinedload (той самий запит),
+    колекції через selectinload (один додатковий запит на рівень).
+    Так серіалізація відповіді не робить лінивих запитів на кожен рядок.
+    """
+    relationships = inspect(entity).relationships
+    options = []
+    for name, field in response_model.model_fields.items():
+        nested, _ = _nested_model(field.annotation)
+        if nested is None or name not in relationships:
+            continue
+        relationship = relationships[name]
+        target = relationship.mapper.class_
+        # Захист від циклів у схемах (User -> skills -> users -> ...)
+        if (target, nested) in _path:
+            continue
+        attribute = getattr(entity, name)
+        loader = joinedload(attribute) if relationship.direction is MANYTOONE else selectinload(attribute)
+        children = eager_options(target, nested, _path + ((entity, response_model),))
+        options.append(loader.options(*children) if children else loader)
+    return tuple(options)
@@ -1,95 +1,114 @@
+from typing import List, Optional, Sequence
+from sqlalchemy import Text, case, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-
-from src.database.models import Review, Exchange, ExchangeStatus
-from src.schemas import ReviewCreate
+from src.database.models import Review, Exchange, ExchangeStatus, User
+from src.repository.loading import eager_options
+from src.services.leaderboard import leaderboards
+from src.utils.pagination import paginate
+from src.schemas import ReviewCreate, ReviewResponse
 
 
 async def get_reviews(
-    db: Session,
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    after_id: Optional[int] = None
 ) -> List[Review]:
     """Отримати список відгуків."""
-    query = db.query(Review)
+    query = select(Review).options(*eager_options(Review, ReviewResponse))
 
     if user_id:
-        query = query.filter(Review.reviewed_id == user_id)
+        query = query.where(Review.reviewed_id == user_id)
 
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(paginate(query, Review.id, skip, limit, after_id))
+    return result.scalars().all()
 
 
-async def get_review(db: Session, review_id: int) -> Optional[Review]:
+async def get_review(db: AsyncSession, review_id: int) -> Optional[Review]:
     """Отримати відгук за ID."""
-    return db.query(Review).filter(Review.id == review_id).first()
+    result = await db.execute(
+        select(Review)
+        .options(*eager_options(Review, ReviewResponse))
+        .where(Review.id == review_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
 
 async def create_review(
-    db: Session,
+    db: AsyncSession,
     review: ReviewCreate,
     reviewer_id: int
 ) -> Optional[Review]:
-    """Створити новий відгук."""
-    # Перевіряємо, чи існує обмін і чи він завершений
-    exchange = db.query(Exchange).filter(Exchange.id == review.exchange_id).first()
-
-    if not exchange or exchange.status != ExchangeStatus.completed.value:
-        return None
-
-    # Перевіряємо, чи користувач був учасником обміну
-    if reviewer_id not in [exchange.sender_id, exchange.receiver_id]:
-        return None
-
-    # Визначаємо, кого оцінюємо
-    reviewed_id = exchange.receiver_id if reviewer_id == exchange.sender_id else exchange.sender_id
-
-    # Перевіряємо, чи вже є відгук від цього користувача для цього обміну
-    existing_review = db.query(Review).filter(
+    """
+    Створити новий відгук одним INSERT ... SELECT ... RETURNING: обмін завершений,
+    автор — його учасник і ще не залишав відгуку — усе це умови WHERE, без читань наперед.
+    Одночасний дублікат, що проскочив NOT EXISTS, зупиняє унікальний індекс: тоді None.
+    """
+    reviewed = case((Exchange.sender_id == reviewer_id, Exchange.receiver_id), else_=Exchange.sender_id)
+    already_reviewed = select(Review.id).where(
         Review.exchange_id == review.exchange_id,
         Review.reviewer_id == reviewer_id
-    ).first()
-
-    if existing_review:
+    ).exists()
+    try:
+        result = await db.execute(
+            insert(Review.__table__)
+            .from_select(
+                ["exchange_id", "reviewer_id", "reviewed_id", "rating", "comment"],
+                select(
+                    Exchange.id, literal(reviewer_id), reviewed,
+                    literal(review.rating), literal(review.comment, Text)
+                ).where(
+                    Exchange.id == review.exchange_id,
+                    Exchange.status == ExchangeStatus.completed,
+                    or_(Exchange.sender_id == reviewer_id, Exchange.receiver_id == reviewer_id),
+                    ~already_reviewed
+                )
+            )
+            .returning(Review.id, Review.reviewed_id)
+        )
+    except IntegrityError:
+        await db.rollback()
         return None
-
-    db_review = Review(
-        exchange_id=review.exchange_id,
-        reviewer_id=reviewer_id,
-        reviewed_id=reviewed_id,
-        rating=review.rating,
-        comment=review.comment
+    created = result.first()
+    if created is None:
+        return None
+    review_id, reviewed_id = created
+
+    # Лічильники рейтингу — атомарним UPDATE у тій самій транзакції
+    stars = getattr(User, f"rating_{review.rating}")
+    await db.execute(
+        update(User)
+        .where(User.id == reviewed_id)
+        .values(
+            rating_sum=User.rating_sum + review.rating,
+            rating_count=User.rating_count + 1,
+            **{stars.key: stars + 1}
+        )
     )
+    await db.commit()
+    leaderboards.add_review(reviewed_id, review.rating)
+    return await get_review(db, review_id)
 
-    db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
-    return db_review
-
-async def get_user_reviews(db: Session, user_id: int) -> List[Review]:
+async def get_user_reviews(db: AsyncSession, user_id: int) -> List[Review]:
     """Отримати всі відгуки про користувача."""
-    return db.query(Review).filter(Review.reviewed_id == user_id).all()
-
-async def get_user_rating(db: Session, user_id: int) -> Optional[dict]:
-    """Розрахувати середній рейтинг користувача."""
-    result = db.query(
-        func.avg(Review.rating).label('average_rating'),
-        func.count(Review.id).label('total_reviews')
-    ).filter(Review.reviewed_id == user_id).first()
+    result = await db.execute(
+        select(Review).options(*eager_options(Review, ReviewResponse)).where(Review.reviewed_id == user_id)
+    )
+    return result.scalars().all()
 
-    if result and result.total_reviews > 0:
-        return {
-            "user_id": user_id,
-            "average_rating": round(float(result.average_rating), 2),
-            "total_reviews": result.total_reviews
-        }
+async def get_user_rating(db: AsyncSession, user_id: int) -> Optional[dict]:
+    """Рейтинг користувача з денормалізованих лічильників; None, якщо користувача немає."""
+    user = await db.get(User, user_id)
+    return user.rating if user else None
 
-    return {
-        "user_id": user_id,
-        "average_rating": 0,
-        "total_reviews": 0
-    }
 
+async def get_users_ratings(db: AsyncSession, user_ids: Sequence[int]) -> List[dict]:
+    """Рейтинги багатьох користувачів одним запитом, у порядку user_ids."""
+    result = await db.execute(select(User).where(User.id.in_(user_ids)))
+    users = {user.id: user for user in result.scalars()}
+    return [users[user_id].rating for user_id in dict.fromkeys(user_ids) if user_id in users]
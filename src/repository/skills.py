@@ -1,115 +1,326 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import (
+    DateTime, case, delete, func, insert, literal, or_, select, true, type_coerce, union_all, update
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src.database.models import Skill, User
-from src.schemas import SkillCreate, SkillUpdate
+from src.database.models import (
+    Exchange, ExchangeStatus, Skill, User, skill_user_association
+)
+from src.database.search import apply_search
+from src.repository.loading import eager_options
+from src.services.autocomplete import skill_index
+from src.services.geo import NearFilter, near_clause
+from src.services.leaderboard import leaderboards
+from src.services.matching import match_index
+from src.services.ranking import CANDIDATE_POOL, CandidateFeatures, score_candidates, top_k
+from src.services.swap_graph import swap_graph
+from src.utils.bulk import row_result
+from src.utils.pagination import paginate
+from src.schemas import SkillCreate, SkillImport, SkillUpdate, SkillResponse
+
+
+def _index_skill(skill: Skill, user_ids: Optional[List[int]] = None) -> None:
+    """Оновити індекси в пам'яті після зміни навички."""
+    if user_ids is None:
+        user_ids = [user.id for user in skill.users]
+    skill_index.upsert(skill.id, skill.title, skill.category)
+    match_index.upsert(skill.id, skill.title, skill.category, skill.can_teach, skill.want_learn)
+    swap_graph.set_skill(skill.id, skill.title, skill.can_teach, skill.want_learn, user_ids)
+    leaderboards.set_skill(skill.id, skill.category, skill.can_teach, user_ids)
+
+
+def _unindex_skill(skill_id: int) -> None:
+    skill_index.remove(skill_id)
+    match_index.remove(skill_id)
+    swap_graph.remove_skill(skill_id)
+    leaderboards.remove_skill(skill_id)
 
 
 async def get_skills(
-    db: Session,
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
     can_teach: Optional[bool] = None,
     want_learn: Optional[bool] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    after_id: Optional[int] = None,
+    near: Optional[NearFilter] = None
 ) -> List[Skill]:
     """
     Отримати список навичок з фільтрацією та пагінацією.
+    Пошук повнотекстовий, результати впорядковані за релевантністю.
+    near залишає навички користувачів у заданому радіусі.
     """
-    query = db.query(Skill)
+    query = select(Skill).options(*eager_options(Skill, SkillResponse))
 
     if category:
-        query = query.filter(Skill.category == category)
+        query = query.where(Skill.category == category)
     if can_teach is not None:
-        query = query.filter(Skill.can_teach == can_teach)
+        query = query.where(Skill.can_teach == can_teach)
     if want_learn is not None:
-        query = query.filter(Skill.want_learn == want_learn)
+        query = query.where(Skill.want_learn == want_learn)
+    if near:
+        query = query.where(Skill.id.in_(
+            select(skill_user_association.c.skill_id)
+            .join(User, User.id == skill_user_association.c.user_id)
+            .where(near_clause(User, near))
+        ))
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            or_(
-                Skill.title.ilike(search_filter),
-                Skill.description.ilike(search_filter)
-            )
-        )
+        # Релевантність не узгоджується з курсором за id — лише offset-пагінація
+        query = apply_search(query, Skill, search, db.get_bind().dialect.name)
+        result = await db.execute(query.order_by(Skill.id).offset(skip).limit(limit))
+        return result.scalars().all()
 
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(paginate(query, Skill.id, skip, limit, after_id))
+    return result.scalars().all()
 
 
-async def get_skill(db: Session, skill_id: int) -> Optional[Skill]:
+async def get_skill(db: AsyncSession, skill_id: int) -> Optional[Skill]:
     """Отримати навичку за ID."""
-    return db.query(Skill).filter(Skill.id == skill_id).first()
+    result = await db.execute(
+        select(Skill)
+        .options(*eager_options(Skill, SkillResponse))
+        .where(Skill.id == skill_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
 
-async def create_skill(db: Session, skill: SkillCreate, user_id: int) -> Skill:
-    """Створити нову навичку та прив'язати до користувача."""
-    db_skill = Skill(**skill.dict())
-    db.add(db_skill)
-    db.commit()
-    db.refresh(db_skill)
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.skills.append(db_skill)
-        db.commit()
+async def create_skill(db: AsyncSession, skill: SkillCreate, user_id: int) -> Skill:
+    """
+    Створити нову навичку та прив'язати до користувача: INSERT ... RETURNING навички
+    та INSERT ... SELECT зв'язку (неіснуючий користувач просто не прив'язується).
+    """
+    result = await db.execute(insert(Skill).values(**skill.dict()).returning(Skill))
+    db_skill = result.scalar_one()
+    linked = await db.execute(
+        insert(skill_user_association)
+        .from_select(
+            ["user_id", "skill_id"],
+            select(User.id, literal(db_skill.id)).where(User.id == user_id)
+        )
+        .returning(skill_user_association.c.user_id)
+    )
+    owner_ids = list(linked.scalars())
+    await db.commit()
 
+    # Відповідь збирається з RETURNING без повторного читання навички
+    set_committed_value(db_skill, "users", [await db.get(User, user_id)] if owner_ids else [])
+    _index_skill(db_skill, owner_ids)
     return db_skill
 
 
+async def bulk_create_skills(db: AsyncSession, rows: Sequence[Tuple[int, SkillImport]]) -> List[dict]:
+    """
+    Створити пакет навичок одним INSERT ... RETURNING і прив'язати власників
+    одним багаторядковим INSERT у skill_user_association; один commit на пакет.
+    """
+    user_ids = {user_id for _, skill in rows for user_id in skill.user_ids}
+    result = await db.execute(select(User.id).where(User.id.in_(user_ids)))
+    known = set(result.scalars())
+
+    results, accepted = [], []
+    for index, skill in rows:
+        missing = [user_id for user_id in dict.fromkeys(skill.user_ids) if user_id not in known]
+        if missing:
+            results.append(row_result(
+                index, "error", error=f"Користувачів не знайдено: {', '.join(map(str, missing))}"
+            ))
+        else:
+            accepted.append((index, skill))
+    if not accepted:
+        return results
+
+    values = [skill.model_dump(mode="json", exclude={"user_ids"}) for _, skill in accepted]
+    # sort_by_parameter_order: id повертаються в порядку values, тож zip зіставляє їх з рядками
+    inserted = await db.execute(
+        insert(Skill.__table__).returning(Skill.id, sort_by_parameter_order=True), values
+    )
+    skill_ids = list(inserted.scalars())
+    links = [
+        {"user_id": user_id, "skill_id": skill_id}
+        for skill_id, (_, skill) in zip(skill_ids, accepted)
+        for user_id in dict.fromkeys(skill.user_ids)
+    ]
+    if links:
+        await db.execute(insert(skill_user_association), links)
+    await db.commit()
+
+    for skill_id, fields, (index, skill) in zip(skill_ids, values, accepted):
+        _index_skill(Skill(id=skill_id, **fields), list(dict.fromkeys(skill.user_ids)))
+        results.append(row_result(index, "created", id=skill_id))
+    return results
+
+
 async def update_skill(
-    db: Session,
+    db: AsyncSession,
     skill_id: int,
     skill_update: SkillUpdate
 ) -> Optional[Skill]:
-    """Оновити існуючу навичку."""
-    db_skill = db.query(Skill).filter(Skill.id == skill_id).first()
+    """Оновити навичку одним UPDATE ... RETURNING без попереднього читання; власники — selectin-запитом."""
+    update_data = skill_update.dict(exclude_unset=True)
+    if not update_data:
+        return await get_skill(db, skill_id)
+
+    result = await db.execute(
+        update(Skill)
+        .where(Skill.id == skill_id)
+        .values(**update_data)
+        .returning(Skill)
+        .options(*eager_options(Skill, SkillResponse))
+    )
+    db_skill = result.scalar_one_or_none()
     if db_skill:
-        update_data = skill_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_skill, field, value)
-        db.commit()
-        db.refresh(db_skill)
+        await db.commit()
+        _index_skill(db_skill)
     return db_skill
 
 
-async def delete_skill(db: Session, skill_id: int) -> Optional[Skill]:
-    """Видалити навичку."""
-    db_skill = db.query(Skill).filter(Skill.id == skill_id).first()
-    if db_skill:
-        db.delete(db_skill)
-        db.commit()
-    return db_skill
+async def delete_skill(db: AsyncSession, skill_id: int) -> Optional[int]:
+    """Видалити навичку одним DELETE ... RETURNING; зв'язки з користувачами видаляє каскад FK."""
+    result = await db.execute(delete(Skill).where(Skill.id == skill_id).returning(Skill.id))
+    deleted_id = result.scalar_one_or_none()
+    if deleted_id:
+        await db.commit()
+        _unindex_skill(skill_id)
+    return deleted_id
+
 
+def autocomplete_skills(q: str, limit: int = 10) -> List[dict]:
+    """Підказки назв навичок за префіксом з індексу в пам'яті, без запиту до БД."""
+    return skill_index.search(q, limit)
 
-async def find_skill_matches(db: Session, skill_id: int) -> dict:
-    """Знайти відповідності для обміну навичками."""
-    skill = db.query(Skill).filter(Skill.id == skill_id).first()
+
+def _epoch(value) -> Optional[float]:
+    """datetime (або рядок з SQLite) у unix-час; наївний час вважаємо UTC."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def _owner_features(
+    db: AsyncSession,
+    skill_ids: Sequence[int],
+    near: Optional[NearFilter] = None
+) -> Dict[int, tuple]:
+    """
+    Ознаки власника кожної навички одним запитом:
+    (сума і кількість оцінок, рівень, завершені обміни, остання активність, місто).
+    Якщо власників кілька, береться перший за id. З near першу навичку
+    (джерело пошуку) повертаємо завжди, решту — лише з власником поруч.
+    """
+    owners = (
+        select(skill_user_association.c.user_id)
+        .where(skill_user_association.c.skill_id.in_(skill_ids))
+    )
+    sides = union_all(
+        select(Exchange.sender_id.label("user_id"), Exchange.status, Exchange.created_at, Exchange.updated_at)
+        .where(Exchange.sender_id.in_(owners)),
+        select(Exchange.receiver_id.label("user_id"), Exchange.status, Exchange.created_at, Exchange.updated_at)
+        .where(Exchange.receiver_id.in_(owners))
+    ).subquery()
+    activity = (
+        select(
+            sides.c.user_id,
+            func.sum(case((sides.c.status == ExchangeStatus.completed, 1), else_=0)).label("completed"),
+            func.max(func.coalesce(sides.c.updated_at, sides.c.created_at)).label("last_exchange")
+        )
+        .group_by(sides.c.user_id)
+        .subquery()
+    )
+
+    result = await db.execute(
+        select(
+            Skill.id,
+            Skill.level,
+            func.coalesce(User.rating_sum, 0),
+            func.coalesce(User.rating_count, 0),
+            func.coalesce(activity.c.completed, 0),
+            type_coerce(activity.c.last_exchange, DateTime(timezone=True)),
+            User.created_at,
+            User.location
+        )
+        .select_from(Skill)
+        .outerjoin(skill_user_association, skill_user_association.c.skill_id == Skill.id)
+        .outerjoin(User, User.id == skill_user_association.c.user_id)
+        .outerjoin(activity, activity.c.user_id == User.id)
+        .where(Skill.id.in_(skill_ids))
+        .where(or_(Skill.id == skill_ids[0], near_clause(User, near)) if near else true())
+        .order_by(Skill.id, User.id)
+    )
+
+    features = {}
+    for skill_id, level, rating_sum, rating_count, completed, last_exchange, joined, location in result:
+        last_active = max(
+            (stamp for stamp in (_epoch(last_exchange), _epoch(joined)) if stamp is not None),
+            default=None
+        )
+        features.setdefault(skill_id, (
+            rating_sum, rating_count, level.value if level is not None else None,
+            completed, last_active, location
+        ))
+    return features
+
+
+async def find_skill_matches(
+    db: AsyncSession,
+    skill_id: int,
+    limit: int = 50,
+    near: Optional[NearFilter] = None
+) -> dict:
+    """
+    Знайти відповідності для обміну навичками.
+    Кандидати беруться з інвертованого індексу, ранжуються векторно
+    за текстом, рейтингом, рівнем, досвідом, активністю та містом,
+    а навички-переможці з користувачами завантажуються одним пакетом.
+    """
+    skill = await db.get(Skill, skill_id)
     if not skill:
-        return {"matches": []}
-
-    matches = []
-
-    similar_skills = db.query(Skill).filter(
-        Skill.id != skill_id,
-        Skill.title.ilike(f"%{skill.title}%"),
-        Skill.category == skill.category
-    ).all()
-
-    for other_skill in similar_skills:
-        if skill.want_learn and other_skill.can_teach:
-            matches.append({
-                "type": "teacher",
-                "skill": other_skill,
-                "users": other_skill.users
-            })
-        elif skill.can_teach and other_skill.want_learn:
-            matches.append({
-                "type": "student",
-                "skill": other_skill,
-                "users": other_skill.users
-            })
+        return {"skill": None, "matches_count": 0, "matches": []}
+
+    ranked = match_index.matches(skill_id, CANDIDATE_POOL)
+    features = await _owner_features(db, [skill_id] + [candidate_id for _, candidate_id, _ in ranked], near)
+    ranked = [match for match in ranked if match[1] in features]
+
+    own = features.get(skill_id)
+    scores = score_candidates(
+        CandidateFeatures.from_rows(
+            (text_score, *features[candidate_id]) for _, candidate_id, text_score in ranked
+        ),
+        level=skill.level.value,
+        teacher_wanted=bool(skill.want_learn),
+        location=own[5] if own else None,
+        now=time.time()
+    )
+    best = [(ranked[i][0], ranked[i][1], round(float(scores[i]), 4)) for i in top_k(scores, limit)]
+
+    result = await db.execute(
+        select(Skill)
+        .options(*eager_options(Skill, SkillResponse))
+        .where(Skill.id.in_([candidate_id for _, candidate_id, _ in best]))
+    )
+    candidates = {candidate.id: candidate for candidate in result.scalars()}
+
+    matches = [
+        {
+            "type": match_type,
+            "score": score,
+            "skill": candidates[candidate_id],
+            "users": candidates[candidate_id].users
+        }
+        for match_type, candidate_id, score in best
+        if candidate_id in candidates
+    ]
 
     return {
         "skill": skill,
@@ -1,32 +1,268 @@
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from src.database.models import Skill, Exchange, User  # перевір, чи такі моделі є
-
-def get_top_skills(db: Session):
-    return (
-        db.query(Skill.name, func.count(Skill.id).label('count'))
-        .join(Exchange, Exchange.skill_id == Skill.id)
-        .group_by(Skill.id)
-        .order_by(func.count(Skill.id).desc())
-        .limit(10)
-        .all()
+from sqlalchemy import Date, String, cast, delete, func, insert, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import (
+    Skill, Exchange, ExchangeStatus, User,
+    SkillExchangeStats, UserExchangeStats, ExchangeStatusCount, ExchangeDailyStats
+)
+from src.database.upsert import increment, increment_from
+
+
+# Події часових рядів: створення обміну та переходи в кожен зі статусів
+CREATED = "created"
+EVENTS = [CREATED] + [status.value for status in ExchangeStatus if status != ExchangeStatus.pending]
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def _status(value) -> str:
+    return value.value if isinstance(value, ExchangeStatus) else value
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+async def record_exchanges(db: AsyncSession, exchanges: Iterable[Exchange]) -> None:
+    """
+    Врахувати пакет нових обмінів у лічильниках; викликати до commit тієї ж транзакції.
+    Категорії навичок читаються одним запитом.
+    """
+    exchanges = list(exchanges)
+    skill_ids = {exchange.skill_id for exchange in exchanges}
+    result = await db.execute(select(Skill.id, Skill.category).where(Skill.id.in_(skill_ids)))
+    categories = dict(result.all())
+
+    today = _today()
+    by_skill, by_user, by_status, by_day = Counter(), Counter(), Counter(), Counter()
+    for exchange in exchanges:
+        by_skill[exchange.skill_id] += 1
+        by_user[exchange.sender_id] += 1
+        by_user[exchange.receiver_id] += 1
+        by_status[_status(exchange.status or ExchangeStatus.pending)] += 1
+        by_day[(today, categories.get(exchange.skill_id, ""), CREATED)] += 1
+
+    await increment(db, SkillExchangeStats.__table__, "skill_id", "exchanges_count", by_skill)
+    await increment(db, UserExchangeStats.__table__, "user_id", "exchanges_count", by_user)
+    await increment(db, ExchangeStatusCount.__table__, "status", "count", by_status)
+    await increment(db, ExchangeDailyStats.__table__, ("day", "category", "event"), "count", by_day)
+
+
+def exchange_increments(db: AsyncSession, source) -> list:
+    """
+    Лічильники для нових обмінів з source (колонки skill_id, sender_id, receiver_id, status):
+    запити для upsert.execute_with_increments, той самий облік, що й record_exchanges.
+    """
+    sides = union_all(
+        select(source.c.sender_id.label("user_id")),
+        select(source.c.receiver_id.label("user_id"))
+    ).subquery()
+    return [
+        increment_from(
+            db, SkillExchangeStats.__table__, "skill_id", "exchanges_count",
+            select(source.c.skill_id, func.count()).group_by(source.c.skill_id)
+        ),
+        increment_from(
+            db, UserExchangeStats.__table__, "user_id", "exchanges_count",
+            select(sides.c.user_id, func.count()).group_by(sides.c.user_id)
+        ),
+        increment_from(
+            db, ExchangeStatusCount.__table__, "status", "count",
+            select(cast(source.c.status, String), func.count()).group_by(source.c.status)
+        ),
+        increment_from(
+            db, ExchangeDailyStats.__table__, ("day", "category", "event"), "count",
+            select(literal(_today(), Date), Skill.category, literal(CREATED, String), func.count())
+            .join_from(source, Skill, Skill.id == source.c.skill_id)
+            .group_by(Skill.category)
+        ),
+    ]
+
+
+def status_change_increments(db: AsyncSession, source) -> list:
+    """
+    Перенести обміни з source (колонки skill_id, previous_status, status) між лічильниками
+    статусів і врахувати подію дня — запити для upsert.execute_with_increments.
+    """
+    moves = union_all(
+        select(cast(source.c.previous_status, String).label("status"), literal(-1).label("delta")),
+        select(cast(source.c.status, String).label("status"), literal(1).label("delta"))
+    ).subquery()
+    return [
+        increment_from(
+            db, ExchangeStatusCount.__table__, "status", "count",
+            select(moves.c.status, func.sum(moves.c.delta)).group_by(moves.c.status)
+        ),
+        increment_from(
+            db, ExchangeDailyStats.__table__, ("day", "category", "event"), "count",
+            select(literal(_today(), Date), Skill.category, cast(source.c.status, String), func.count())
+            .join_from(source, Skill, Skill.id == source.c.skill_id)
+            .group_by(Skill.category, source.c.status)
+        ),
+    ]
+
+
+async def rebuild(db: AsyncSession) -> None:
+    """Перерахувати всі лічильники з таблиці exchanges (після імпорту, seed чи збою)."""
+    for model in (SkillExchangeStats, UserExchangeStats, ExchangeStatusCount, ExchangeDailyStats):
+        await db.execute(delete(model))
+
+    await db.execute(
+        insert(SkillExchangeStats).from_select(
+            ["skill_id", "exchanges_count"],
+            select(Exchange.skill_id, func.count()).group_by(Exchange.skill_id)
+        )
+    )
+    sides = union_all(
+        select(Exchange.sender_id.label("user_id")),
+        select(Exchange.receiver_id.label("user_id"))
+    ).subquery()
+    await db.execute(
+        insert(UserExchangeStats).from_select(
+            ["user_id", "exchanges_count"],
+            select(sides.c.user_id, func.count()).group_by(sides.c.user_id)
+        )
     )
+    result = await db.execute(select(Exchange.status, func.count()).group_by(Exchange.status))
+    counts = [{"status": _status(status), "count": count} for status, count in result if status]
+    if counts:
+        await db.execute(insert(ExchangeStatusCount), counts)
 
-def get_active_users(db: Session):
-    return (
-        db.query(User.username, func.count(Exchange.id).label('exchanges'))
-        .join(Exchange, Exchange.user_id == User.id)
-        .group_by(User.id)
-        .order_by(func.count(Exchange.id).desc())
-        .limit(10)
-        .all()
+    # Історії переходів немає: created — за датою створення, поточний статус —
+    # за датою останнього оновлення (проміжний accepted у завершених губиться)
+    result = await db.execute(
+        select(Exchange.created_at, Exchange.updated_at, Exchange.status, Skill.category)
+        .join(Skill, Skill.id == Exchange.skill_id)
     )
+    by_day = Counter()
+    for created_at, updated_at, status, category in result:
+        created_day = _day(created_at)
+        by_day[(created_day, category, CREATED)] += 1
+        status = _status(status)
+        if status and status != ExchangeStatus.pending.value:
+            by_day[(_day(updated_at) or created_day, category, status)] += 1
+    rows = [
+        {"day": day, "category": category, "event": event, "count": count}
+        for (day, category, event), count in by_day.items() if day
+    ]
+    if rows:
+        await db.execute(insert(ExchangeDailyStats), rows)
+    await db.commit()
 
-def get_exchange_success_rate(db: Session):
-    total = db.query(func.count(Exchange.id)).scalar()
-    success = db.query(func.count(Exchange.id)).filter(Exchange.status == 'success').scalar()
+
+def _day(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+async def get_top_skills(db: AsyncSession, limit: int = 10) -> List[dict]:
+    """Навички з найбільшою кількістю обмінів (індекс по exchanges_count)."""
+    result = await db.execute(
+        select(Skill.id, Skill.title, SkillExchangeStats.exchanges_count)
+        .join(Skill, Skill.id == SkillExchangeStats.skill_id)
+        .where(SkillExchangeStats.exchanges_count > 0)
+        .order_by(SkillExchangeStats.exchanges_count.desc(), SkillExchangeStats.skill_id)
+        .limit(limit)
+    )
+    return [
+        {"skill_id": skill_id, "title": title, "exchanges": count}
+        for skill_id, title, count in result
+    ]
+
+
+async def get_active_users(db: AsyncSession, limit: int = 10) -> List[dict]:
+    """Користувачі з найбільшою кількістю обмінів (як відправник чи отримувач)."""
+    result = await db.execute(
+        select(User.id, User.username, UserExchangeStats.exchanges_count)
+        .join(User, User.id == UserExchangeStats.user_id)
+        .where(UserExchangeStats.exchanges_count > 0)
+        .order_by(UserExchangeStats.exchanges_count.desc(), UserExchangeStats.user_id)
+        .limit(limit)
+    )
+    return [
+        {"user_id": user_id, "username": username, "exchanges": count}
+        for user_id, username, count in result
+    ]
+
+
+async def get_exchange_success_rate(db: AsyncSession) -> dict:
+    """Частка завершених обмінів, з лічильників статусів (не більше п'яти рядків)."""
+    result = await db.execute(select(ExchangeStatusCount.status, ExchangeStatusCount.count))
+    counts = dict(result.all())
+    total = sum(counts.values())
+    completed = counts.get(ExchangeStatus.completed.value, 0)
     if total == 0:
-        return {'success_rate': 0}
-    return {'success_rate': round((success / total) * 100, 2)}
+        return {'success_rate': 0, 'total': 0, 'completed': 0}
+    return {
+        'success_rate': round((completed / total) * 100, 2),
+        'total': total,
+        'completed': completed
+    }
+
+
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+async def get_timeseries(
+    db: AsyncSession,
+    date_from: date,
+    date_to: date,
+    granularity: str = "day",
+    category: Optional[str] = None,
+    status: Optional[ExchangeStatus] = None
+) -> List[dict]:
+    """
+    Кількість подій обмінів за періоди з добових лічильників.
+    Сума по категоріях рахується в SQL (не більше рядків, ніж днів x подій),
+    тиждень і місяць збираються з днів уже в Python; порожні періоди — нулі.
+    """
+    events = [CREATED if status == ExchangeStatus.pending else status.value] if status else EVENTS
+    query = (
+        select(ExchangeDailyStats.day, ExchangeDailyStats.event, func.sum(ExchangeDailyStats.count))
+        .where(
+            ExchangeDailyStats.day >= date_from,
+            ExchangeDailyStats.day <= date_to,
+            ExchangeDailyStats.event.in_(events)
+        )
+        .group_by(ExchangeDailyStats.day, ExchangeDailyStats.event)
+    )
+    if category:
+        query = query.where(ExchangeDailyStats.category == category)
+
+    buckets: Dict[date, Counter] = {}
+    period = _period_start(date_from, granularity)
+    while period <= date_to:
+        buckets[period] = Counter()
+        period = _next_period(period, granularity)
+
+    for day, event, count in await db.execute(query):
+        day = _day(day) if not isinstance(day, date) else day
+        buckets[_period_start(day, granularity)][event] += int(count)
 
+    return [
+        {"period": period, **{event: counter[event] for event in events}}
+        for period, counter in buckets.items()
+    ]
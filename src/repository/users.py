@@ -1,61 +1,225 @@
-from typing import List, Optional
-
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-
-
-from src.database.models import User, Skill, Exchange
-from src.schemas import UserCreate, UserUpdate
-
-
-async def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    """Отримати список користувачів з пагінацією."""
-    return db.query(User).offset(skip).limit(limit).all()
-
-
-async def get_user(db: Session, user_id: int) -> Optional[User]:
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+
+from src.database.models import User, Skill
+from src.database.upsert import dialect_insert
+from src.repository.loading import eager_options
+from src.services.geo import NearFilter, locate, near_clause
+from src.services.leaderboard import leaderboards
+from src.services.principals import principals
+from src.services.swap_graph import swap_graph
+from src.utils.bulk import row_result
+from src.utils.pagination import paginate
+from src.schemas import UserCreate, UserUpdate, SkillResponse
+
+
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    near: Optional[NearFilter] = None
+) -> List[User]:
+    """Отримати список користувачів з пагінацією, за потреби — лише поруч із точкою."""
+    query = select(User)
+    if near:
+        query = query.where(near_clause(User, near))
+    result = await db.execute(paginate(query, User.id, skip, limit, after_id))
+    return result.scalars().all()
+
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
     """Отримати користувача за його ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.get(User, user_id)
 
 
-async def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Отримати користувача за email."""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-async def get_user_by_username(db: Session, username: str) -> Optional[User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Отримати користувача за username."""
-    return db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: UserCreate) -> Optional[User]:
+    """
+    Створити нового користувача одним INSERT ... RETURNING.
+    Зайнятість email і username перевіряють унікальні індекси: тоді None.
+    """
+    try:
+        result = await db.execute(
+            insert(User).values(**user.dict(), **locate(user.location)).returning(User)
+        )
+        db_user = result.scalar_one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return None
+    return db_user
 
 
-async def create_user(db: Session, user: UserCreate) -> User:
-    """Створити нового користувача."""
-    db_user = User(**user.dict())
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+async def bulk_create_users(
+    db: AsyncSession,
+    rows: Sequence[Tuple[int, UserCreate]],
+    upsert: bool = False
+) -> List[dict]:
+    """
+    Створити (або за upsert — оновити за email) пакет користувачів:
+    один запит на перевірку зайнятих email/username, один INSERT ... RETURNING на всіх.
+    """
+    result = await db.execute(
+        select(User.email, User.username).where(or_(
+            User.email.in_([user.email for _, user in rows]),
+            User.username.in_([user.username for _, user in rows])
+        ))
+    )
+    existing = set()
+    username_owner = {}
+    for email, username in result:
+        existing.add(email)
+        username_owner[username] = email
+
+    results, values, indexes = [], [], {}
+    seen_usernames = set()
+    for index, user in rows:
+        if user.email in indexes:
+            error = "Email повторюється в пакеті"
+        elif user.username in seen_usernames:
+            error = "Username повторюється в пакеті"
+        elif user.email in existing and not upsert:
+            error = "Email вже зареєстрований"
+        elif username_owner.get(user.username, user.email) != user.email:
+            error = "Username вже зайнятий"
+        else:
+            error = None
+        if error:
+            results.append(row_result(index, "error", error=error))
+            continue
+        indexes[user.email] = index
+        seen_usernames.add(user.username)
+        values.append({**user.dict(), **locate(user.location)})
+
+    if values:
+        stmt = dialect_insert(db, User.__table__)
+        if upsert:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["email"],
+                set_={
+                    **{field: stmt.excluded[field] for field in values[0] if field != "email"},
+                    "updated_at": func.now()
+                }
+            )
+        inserted = await db.execute(stmt.returning(User.id, User.email), values)
+        for user_id, email in inserted:
+            status = "updated" if email in existing else "created"
+            results.append(row_result(indexes[email], status, id=user_id))
+        await db.commit()
+        for outcome in results:
+            if outcome["status"] == "updated":
+                principals.invalidate_user(outcome["id"])
+    return results
 
 
 async def update_user(
-    db: Session,
+    db: AsyncSession,
     user_id: int,
     user_update: UserUpdate
 ) -> Optional[User]:
-    """Оновити дані користувача."""
-    db_user = db.query(User).filter(User.id == user_id).first()
+    """Оновити дані користувача одним UPDATE ... RETURNING (без попереднього читання)."""
+    update_data = user_update.dict(exclude_unset=True)
+    if not update_data:
+        return await db.get(User, user_id)
+    if "location" in update_data:
+        update_data.update(locate(update_data["location"]))
+
+    result = await db.execute(
+        update(User).where(User.id == user_id).values(**update_data).returning(User)
+    )
+    db_user = result.scalar_one_or_none()
     if db_user:
-        update_data = user_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        # Кешований Principal (username, is_active) міг застаріти
+        principals.invalidate_user(user_id)
     return db_user
 
 
-async def get_user_skills(db: Session, user_id: int) -> Optional[List]:
+async def deactivate_user(db: AsyncSession, user_id: int) -> bool:
+    """
+    Деактивувати користувача; його токени перестають прийматися одразу в цьому воркері,
+    а сам він зникає з графа обмінів (партнери й кільця).
+    """
+    result = await db.execute(
+        update(User).where(User.id == user_id).values(is_active=False).returning(User.id)
+    )
+    deactivated = result.first() is not None
+    if deactivated:
+        await db.commit()
+        principals.invalidate_user(user_id)
+        swap_graph.remove_user(user_id)
+    return deactivated
+
+
+async def get_user_skills(db: AsyncSession, user_id: int) -> Optional[List]:
     """Отримати всі навички користувача за ID."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(
+        User,
+        user_id,
+        options=[selectinload(User.skills).options(*eager_options(Skill, SkillResponse))]
+    )
     return user.skills if user else None
 
 
+async def get_swap_partners(db: AsyncSession, user_id: int, limit: int = 20) -> Optional[List[dict]]:
+    """
+    Знайти взаємних партнерів: вони навчають того, що хоче користувач,
+    і хочуть того, чого він навчає. Граф у пам'яті, користувачі — одним запитом.
+    """
+    if await db.get(User, user_id) is None:
+        return None
+
+    partners = swap_graph.partners(user_id, limit)
+    result = await db.execute(select(User).where(User.id.in_([p.user_id for p in partners])))
+    users = {user.id: user for user in result.scalars()}
+
+    return [
+        {
+            "user": users[partner.user_id],
+            "score": partner.score,
+            "their_skill_ids": partner.their_skill_ids,
+            "your_skill_ids": partner.your_skill_ids
+        }
+        for partner in partners
+        if partner.user_id in users
+    ]
+
+
+async def get_leaderboard(db: AsyncSession, category: str, skip: int = 0, limit: int = 20) -> List[dict]:
+    """
+    Найкращі вчителі категорії: порядок — зі структури в пам'яті,
+    користувачі сторінки — одним запитом за первинним ключем.
+    """
+    entries = leaderboards.page(category, skip, limit)
+    result = await db.execute(select(User).where(User.id.in_([entry.user_id for entry in entries])))
+    users = {user.id: user for user in result.scalars()}
+
+    return [
+        {
+            "rank": entry.rank,
+            "score": entry.score,
+            "bayesian_rating": round(entry.stats.bayesian_rating, 2),
+            "total_reviews": entry.stats.rating_count,
+            "completed_exchanges": entry.stats.completed,
+            "user": users[entry.user_id]
+        }
+        for entry in entries
+        if entry.user_id in users
+    ]
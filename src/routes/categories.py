@@ -1,42 +1,49 @@
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from src.database.db import get_db
-from src.schemas import Category, CategoryCreate
+from src.schemas import BulkResponse, Category, CategoryCreate
 from src.repository import categories
+from src.utils.bulk import run_bulk
 
 router = APIRouter(
-    prefix='/api/categories',
+    prefix='/categories',
     tags=['Categories']
 )
 
 @router.post('/', response_model=Category)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
-    return categories.create_category(db, category)
+async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_db)):
+    return await categories.create_category(db, category)
+
+@router.post('/bulk', response_model=BulkResponse)
+async def bulk_create_categories(request: Request, upsert: bool = False, db: AsyncSession = Depends(get_db)):
+    return await run_bulk(
+        request, CategoryCreate, lambda rows: categories.bulk_create_categories(db, rows, upsert)
+    )
 
 @router.get('/', response_model=List[Category])
-def list_categories(db: Session = Depends(get_db)):
-    return categories.get_categories(db)
+async def list_categories(db: AsyncSession = Depends(get_db)):
+    return await categories.get_categories(db)
 
 @router.get('/{category_id}', response_model=Category)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = categories.get_category(db, category_id)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
+    db_category = await categories.get_category(db, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail='Category not found')
     return db_category
 
 @router.put('/{category_id}', response_model=Category)
-def update_category(category_id: int, category: CategoryCreate, db: Session = Depends(get_db)):
-    db_category = categories.update_category(db, category_id, category.name)
+async def update_category(category_id: int, category: CategoryCreate, db: AsyncSession = Depends(get_db)):
+    db_category = await categories.update_category(db, category_id, category.name)
     if not db_category:
         raise HTTPException(status_code=404, detail='Category not found')
     return db_category
 
 @router.delete('/{category_id}')
-def delete_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = categories.delete_category(db, category_id)
+async def delete_category(category_id: int, db: AsyncSession = Depends(get_db)):
+    db_category = await categories.delete_category(db, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail='Category not found')
     return {'message': 'Category deleted'}
@@ -1,15 +1,18 @@
 
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
 
 from src.database.db import get_db
-from src.schemas import ExchangeCreate, ExchangeUpdate, ExchangeResponse, ExchangeStatus
+from src.schemas import (
+    ExchangeCreate, ExchangeUpdate, ExchangeResponse, ExchangeStatus, ExchangeCycleResponse
+)
 from src.repository import exchanges as repository_exchanges
 from src import repository
 from src.deps import get_current_user
+from src.utils.pagination import cursor_param, set_next_cursor
 
 
 router = APIRouter(prefix='/exchanges', tags=["exchanges"])
@@ -17,11 +20,13 @@ router = APIRouter(prefix='/exchanges', tags=["exchanges"])
 
 @router.get("/", response_model=List[ExchangeResponse])
 async def read_exchanges(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[ExchangeStatus] = None,
     user_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_param),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отримати список обмінів з фільтрацією.
@@ -29,15 +34,36 @@ async def read_exchanges(
 
     - **status_filter**: фільтр за статусом (pending, accepted, etc.)
     - **user_id**: показати обміни конкретного користувача
+    - **cursor**: курсор із заголовка X-Next-Cursor (замість skip)
     """
     exchanges = await repository_exchanges.get_exchanges(
-        db, skip, limit, status_filter, user_id
+        db, skip, limit, status_filter, user_id, after_id
     )
+    set_next_cursor(response, exchanges, limit)
     return exchanges
 
 
+@router.get("/cycles", response_model=List[ExchangeCycleResponse])
+async def read_exchange_cycles(
+    user_id: int = 1,  # Тимчасово
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Запропоновані кільцеві обміни (A навчає B, B навчає C, C навчає A).
+    Кільця знаходить пакетна задача `python -m src.services.cycles`;
+    кожна ланка — звичайний обмін, який отримувач приймає через PUT /exchanges/{id}.
+    """
+    return await repository_exchanges.get_user_exchange_cycles(db, user_id)
+
+
+@router.get('/my-exchanges')
+def my_exchanges(current_user=Depends(get_current_user)):
+    """Поточний користувач за токеном; оголошено до /{exchange_id}, щоб шлях не сприймався як id."""
+    return {"user_id": current_user.id, "username": current_user.username}
+
+
 @router.get("/{exchange_id}", response_model=ExchangeResponse)
-async def read_exchange(exchange_id: int, db: Session = Depends(get_db)):
+async def read_exchange(exchange_id: int, db: AsyncSession = Depends(get_db)):
     """Отримати деталі обміну."""
     exchange = await repository_exchanges.get_exchange(db, exchange_id)
     if exchange is None:
@@ -52,7 +78,7 @@ async def read_exchange(exchange_id: int, db: Session = Depends(get_db)):
 async def create_exchange(
     exchange: ExchangeCreate,
     sender_id: int = 1,  # Тимчасово, поки немає автентифікації
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Створити запит на обмін навичками."""
     # Перевіряємо, чи не намагається користувач створити обмін сам з собою
@@ -62,7 +88,13 @@ async def create_exchange(
             detail="Не можна створити обмін з самим собою"
         )
 
-    return await repository_exchanges.create_exchange(db, exchange, sender_id)
+    db_exchange = await repository_exchanges.create_exchange(db, exchange, sender_id)
+    if db_exchange is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Користувача або навичку не знайдено"
+        )
+    return db_exchange
 
 
 @router.put("/{exchange_id}", response_model=ExchangeResponse)
@@ -70,12 +102,33 @@ async def update_exchange_status(
     exchange_id: int,
     exchange_update: ExchangeUpdate,
     current_user_id: int = 1,  # Тимчасово
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Оновити статус обміну (прийняти/відхилити)."""
-    exchange = await repository_exchanges.update_exchange(
-        db, exchange_id, exchange_update, current_user_id
-    )
+    """
+    Оновити статус обміну.
+
+    - pending → accepted/rejected (отримувач) або cancelled (будь-хто з учасників)
+    - accepted → completed/cancelled (будь-хто з учасників)
+    - **version**: версія обміну, яку бачив клієнт; якщо його вже змінили — 409
+    """
+    try:
+        exchange = await repository_exchanges.update_exchange(
+            db, exchange_id, exchange_update, current_user_id
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Обмін не можна повернути в статус {exchange_update.status.value}"
+        )
+    except repository_exchanges.ExchangeConflict as conflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Обмін уже змінено: оновіть його та спробуйте ще раз",
+                "status": conflict.status.value,
+                "version": conflict.version
+            }
+        )
     if exchange is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -87,7 +140,7 @@ async def update_exchange_status(
 @router.get("/my/sent", response_model=List[ExchangeResponse])
 async def read_my_sent_exchanges(
     user_id: int = 1,  # Тимчасово
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Отримати надіслані запити на обмін."""
     return await repository_exchanges.get_user_sent_exchanges(db, user_id)
@@ -96,21 +149,21 @@ async def read_my_sent_exchanges(
 @router.get("/my/received", response_model=List[ExchangeResponse])
 async def read_my_received_exchanges(
     user_id: int = 1,  # Тимчасово
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Отримати отримані запити на обмін."""
     return await repository_exchanges.get_user_received_exchanges(db, user_id)
 
 @router.get('/')
-def get_exchanges(
+async def get_exchanges(
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     status: Optional[str] = Query(None),
     user_id: Optional[int] = Query(None),
     sort_order: str = Query('desc', regex='^(asc|desc)$'),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    return repository.exchanges.get_filtered_exchanges(
+    return await repository.exchanges.get_filtered_exchanges(
         db=db,
         from_date=from_date,
         to_date=to_date,
@@ -118,7 +171,3 @@ def get_exchanges(
         user_id=user_id,
         sort_order=sort_order
     )
-
-@router.get('/my-exchanges')
-def my_exchanges(current_user=Depends(get_current_user)):
-    return {"user_id": current_user.id, "username": current_user.username}
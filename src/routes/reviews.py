@@ -1,12 +1,13 @@
 
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.database.db import get_db
-from src.schemas import ReviewCreate, ReviewResponse
+from src.schemas import ReviewCreate, ReviewResponse, UserRating
 from src.repository import reviews as repository_reviews
+from src.utils.pagination import cursor_param, set_next_cursor
 
 
 router = APIRouter(prefix='/reviews', tags=["reviews"])
@@ -14,18 +15,38 @@ router = APIRouter(prefix='/reviews', tags=["reviews"])
 
 @router.get("/", response_model=List[ReviewResponse])
 async def read_reviews(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_param),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Отримати список відгуків."""
-    reviews = await repository_reviews.get_reviews(db, skip, limit, user_id)
+    """
+    Отримати список відгуків.
+
+    - **cursor**: курсор із заголовка X-Next-Cursor (замість skip)
+    """
+    reviews = await repository_reviews.get_reviews(db, skip, limit, user_id, after_id)
+    set_next_cursor(response, reviews, limit)
     return reviews
 
 
+@router.get("/ratings", response_model=List[UserRating])
+async def read_users_ratings(
+    user_ids: List[int] = Query(..., max_length=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Рейтинги кількох користувачів за один запит (для списків).
+
+    - **user_ids**: повторюваний параметр, `?user_ids=1&user_ids=2`
+    """
+    return await repository_reviews.get_users_ratings(db, user_ids)
+
+
 @router.get("/{review_id}", response_model=ReviewResponse)
-async def read_review(review_id: int, db: Session = Depends(get_db)):
+async def read_review(review_id: int, db: AsyncSession = Depends(get_db)):
     """Отримати конкретний відгук."""
     review = await repository_reviews.get_review(db, review_id)
     if review is None:
@@ -40,7 +61,7 @@ async def read_review(review_id: int, db: Session = Depends(get_db)):
 async def create_review(
     review: ReviewCreate,
     reviewer_id: int = 1,  # Тимчасово
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Створити відгук після завершеного обміну."""
     # Перевіряємо, чи існує обмін і чи він завершений
@@ -56,17 +77,17 @@ async def create_review(
 @router.get("/user/{user_id}", response_model=List[ReviewResponse])
 async def read_user_reviews(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Отримати всі відгуки про користувача."""
     reviews = await repository_reviews.get_user_reviews(db, user_id)
     return reviews
 
 
-@router.get("/user/{user_id}/rating")
+@router.get("/user/{user_id}/rating", response_model=UserRating)
 async def get_user_rating(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Отримати середній рейтинг користувача."""
     rating_info = await repository_reviews.get_user_rating(db, user_id)
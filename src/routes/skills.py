@@ -1,11 +1,16 @@
 
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
-from src.schemas import SkillCreate, SkillUpdate, SkillResponse
+from src.schemas import BulkResponse, SkillCreate, SkillImport, SkillUpdate, SkillResponse, SkillSuggestion
 from src.repository import skills as repository_skills
+from src.deps import near_param
+from src.services.geo import NearFilter
+from src.utils.bulk import run_bulk
+from src.utils.pagination import cursor_param, set_next_cursor
 
 
 router = APIRouter(prefix="/skills", tags=["skills"])
@@ -13,13 +18,16 @@ router = APIRouter(prefix="/skills", tags=["skills"])
 
 @router.get("/", response_model=List[SkillResponse])
 async def read_skills(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
     can_teach: Optional[bool] = None,
     want_learn: Optional[bool] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_param),
+    near: Optional[NearFilter] = Depends(near_param),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отримати список навичок з можливістю фільтрації.
@@ -30,15 +38,40 @@ async def read_skills(
     - **category**: фільтр за категорією
     - **can_teach**: показати тільки тих, хто може навчати
     - **want_learn**: показати тільки тих, хто хоче вчитися
-    - **search**: пошук за назвою або описом
+    - **search**: повнотекстовий пошук за назвою або описом (за релевантністю)
+    - **cursor**: курсор із заголовка X-Next-Cursor (замість skip, не для search)
+    - **near**, **radius_km**: лише навички користувачів поруч із містом чи координатами
     """
-    return await repository_skills.get_skills(
-        db, skip, limit, category, can_teach, want_learn, search
+    if search and after_id is not None:
+        # Результати пошуку впорядковані за релевантністю, а курсор — позиція за id
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Курсор не підтримується разом із search, використовуйте skip"
+        )
+    skills = await repository_skills.get_skills(
+        db, skip, limit, category, can_teach, want_learn, search, after_id, near
     )
+    if not search:
+        set_next_cursor(response, skills, limit)
+    return skills
+
+
+@router.get("/autocomplete", response_model=List[SkillSuggestion])
+async def autocomplete_skills(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Підказки для вибору навички під час введення.
+
+    - **q**: початок назви, будь-якого слова назви або категорії
+    - **limit**: максимальна кількість підказок
+    """
+    return repository_skills.autocomplete_skills(q, limit)
 
 
 @router.get("/{skill_id}", response_model=SkillResponse)
-async def read_skill(skill_id: int, db: Session = Depends(get_db)):
+async def read_skill(skill_id: int, db: AsyncSession = Depends(get_db)):
     """Отримати детальну інформацію про навичку."""
     skill = await repository_skills.get_skill(db, skill_id)
     if not skill:
@@ -53,17 +86,26 @@ async def read_skill(skill_id: int, db: Session = Depends(get_db)):
 async def create_skill(
     skill: SkillCreate,
     user_id: int = 1,  # Тимчасово, поки немає автентифікації
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Створити нову навичку."""
     return await repository_skills.create_skill(db, skill, user_id)
 
 
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create_skills(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Імпорт навичок: JSON-масив або NDJSON (Content-Type: application/x-ndjson).
+    Кожен рядок — як у POST /skills плюс **user_ids** власників, до яких прив'язати навичку.
+    """
+    return await run_bulk(request, SkillImport, lambda rows: repository_skills.bulk_create_skills(db, rows))
+
+
 @router.put("/{skill_id}", response_model=SkillResponse)
 async def update_skill(
     skill_id: int,
     skill_update: SkillUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Оновити існуючу навичку."""
     skill = await repository_skills.update_skill(db, skill_id, skill_update)
@@ -76,9 +118,15 @@ async def update_skill(
 
 
 @router.delete("/{skill_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_skill(skill_id: int, db: Session = Depends(get_db)):
+async def delete_skill(skill_id: int, db: AsyncSession = Depends(get_db)):
     """Видалити навичку."""
-    skill = await repository_skills.delete_skill(db, skill_id)
+    try:
+        skill = await repository_skills.delete_skill(db, skill_id)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Навичку не можна видалити: вона використовується в обмінах"
+        )
     if not skill:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -88,9 +136,18 @@ async def delete_skill(skill_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{skill_id}/matches")
-async def find_matches(skill_id: int, db: Session = Depends(get_db)):
-    """Знайти потенційні збіги для обміну навичками."""
-    matches = await repository_skills.find_skill_matches(db, skill_id)
+async def find_matches(
+    skill_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    near: Optional[NearFilter] = Depends(near_param),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Знайти потенційні збіги для обміну навичками, найкращі першими.
+
+    - **near**, **radius_km**: лише кандидати поруч із містом чи координатами
+    """
+    matches = await repository_skills.find_skill_matches(db, skill_id, limit, near)
     if not matches["skill"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
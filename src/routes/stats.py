@@ -1,23 +1,50 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status as status_codes
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
-from src import repository
+from src.repository import stats as repository_stats
+from src.schemas import ExchangeStatus
 
 router = APIRouter(
-    prefix='/api/stats',
+    prefix='/stats',
     tags=['Stats']
 )
 
 @router.get('/top-skills')
-def top_skills(db: Session = Depends(get_db)):
-    return repository.stats.get_top_skills(db)
+async def top_skills(limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    return await repository_stats.get_top_skills(db, limit)
 
 @router.get('/active-users')
-def active_users(db: Session = Depends(get_db)):
-    return repository.stats.get_active_users(db)
+async def active_users(limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    return await repository_stats.get_active_users(db, limit)
 
 @router.get('/exchange-success-rate')
-def exchange_success_rate(db: Session = Depends(get_db)):
-    return repository.stats.get_exchange_success_rate(db)
+async def exchange_success_rate(db: AsyncSession = Depends(get_db)):
+    return await repository_stats.get_exchange_success_rate(db)
 
+@router.get('/timeseries')
+async def timeseries(
+    granularity: str = Query('day', regex='^(day|week|month)$'),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    category: Optional[str] = Query(None),
+    status: Optional[ExchangeStatus] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Обміни за днями, тижнями чи місяцями з добових лічильників.
+
+    - **date_from**, **date_to**: межі (за замовчуванням — останні 90 днів)
+    - **category**: лише навички цієї категорії
+    - **status**: лише одна подія (pending — створені обміни)
+    """
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=90)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status_codes.HTTP_400_BAD_REQUEST,
+            detail="date_from має бути не пізніше за date_to"
+        )
+    return await repository_stats.get_timeseries(db, date_from, date_to, granularity, category, status)
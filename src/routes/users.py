@@ -1,12 +1,19 @@
 
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.database.db import get_db
-from src.schemas import UserCreate, UserUpdate, UserResponse, SkillResponse
+from src.schemas import (
+    UserCreate, UserUpdate, UserResponse, SkillResponse, SwapPartnerResponse,
+    LeaderboardEntryResponse, SkillCategory, BulkResponse
+)
 from src.repository import users as repository_users
+from src.deps import get_current_user, near_param
+from src.services.geo import NearFilter
+from src.utils.bulk import run_bulk
+from src.utils.pagination import cursor_param, set_next_cursor
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -14,16 +21,46 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/", response_model=List[UserResponse])
 async def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_param),
+    near: Optional[NearFilter] = Depends(near_param),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Отримати список користувачів."""
-    return await repository_users.get_users(db, skip, limit)
+    """
+    Отримати список користувачів.
+
+    - **cursor**: курсор із заголовка X-Next-Cursor (замість skip)
+    - **near**, **radius_km**: лише користувачі поруч із містом чи координатами
+    """
+    users = await repository_users.get_users(db, skip, limit, after_id, near)
+    set_next_cursor(response, users, limit)
+    return users
+
+
+@router.get("/leaderboard", response_model=List[LeaderboardEntryResponse])
+async def read_leaderboard(
+    category: SkillCategory,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Найкращі вчителі категорії: байєсівський рейтинг (мало відгуків тягне
+    до середнього) плюс бонус за завершені обміни.
+    """
+    return await repository_users.get_leaderboard(db, category.value, skip, limit)
+
+
+@router.post("/me/deactivate", status_code=status.HTTP_204_NO_CONTENT)
+async def deactivate_me(current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """Деактивувати власний обліковий запис; лише за токеном самого користувача."""
+    await repository_users.deactivate_user(db, current_user.id)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def read_user(user_id: int, db: Session = Depends(get_db)):
+async def read_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Отримати інформацію про користувача."""
     user = await repository_users.get_user(db, user_id)
     if not user:
@@ -35,31 +72,42 @@ async def read_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Створити нового користувача."""
-
-    # Перевіряємо чи існує користувач з таким email
-    if await repository_users.get_user_by_email(db, email=user.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email вже зареєстрований"
-        )
-
-    # Перевіряємо чи username зайнятий
-    if await repository_users.get_user_by_username(db, username=user.username):
+    db_user = await repository_users.create_user(db, user)
+    if db_user is None:
+        # Конфлікт унікальних індексів: з'ясовуємо, що саме зайнято (лише на шляху помилки)
+        if await repository_users.get_user_by_email(db, email=user.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email вже зареєстрований"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username вже зайнятий"
         )
+    return db_user
+
 
-    return await repository_users.create_user(db, user)
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create_users(request: Request, upsert: bool = False, db: AsyncSession = Depends(get_db)):
+    """
+    Імпорт користувачів: JSON-масив або NDJSON (Content-Type: application/x-ndjson).
+
+    - **upsert**: оновлювати наявних користувачів за email замість помилки
+
+    Результати — по рядку на кожен вхідний рядок (index, status, id, error).
+    """
+    return await run_bulk(
+        request, UserCreate, lambda rows: repository_users.bulk_create_users(db, rows, upsert)
+    )
 
 
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Оновити дані користувача."""
     user = await repository_users.update_user(db, user_id, user_update)
@@ -72,7 +120,7 @@ async def update_user(
 
 
 @router.get("/{user_id}/skills", response_model=List[SkillResponse])
-async def read_user_skills(user_id: int, db: Session = Depends(get_db)):
+async def read_user_skills(user_id: int, db: AsyncSession = Depends(get_db)):
     """Отримати всі навички користувача."""
     skills = await repository_users.get_user_skills(db, user_id)
     if skills is None:
@@ -83,4 +131,20 @@ async def read_user_skills(user_id: int, db: Session = Depends(get_db)):
     return skills
 
 
-
+@router.get("/{user_id}/swap-partners", response_model=List[SwapPartnerResponse])
+async def read_swap_partners(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Знайти користувачів для взаємного обміну: вони навчають того, що ви хочете,
+    і хочуть навчитися того, що вмієте ви. Найкращі партнери першими.
+    """
+    partners = await repository_users.get_swap_partners(db, user_id, limit)
+    if partners is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Користувача з ID {user_id} не знайдено"
+        )
+    return partners
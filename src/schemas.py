@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, EmailStr, Field, root_validator
 from enum import Enum
 
@@ -54,15 +54,41 @@ class UserUpdate(BaseModel):
     location: Optional[str] = Field(None, max_length=100)
 
 
+class UserRating(BaseModel):
+    user_id: int
+    average_rating: float
+    total_reviews: int
+    histogram: Dict[int, int]
+
+
 class UserResponse(UserBase):
     id: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime
     is_active: bool
+    rating: Optional[UserRating] = None
 
     class Config:
         from_attributes = True
 
 
+class SwapPartnerResponse(BaseModel):
+    user: UserResponse
+    score: float
+    their_skill_ids: List[int]
+    your_skill_ids: List[int]
+
+
+class LeaderboardEntryResponse(BaseModel):
+    rank: int
+    score: float
+    bayesian_rating: float
+    total_reviews: int
+    completed_exchanges: int
+    user: UserResponse
+
+
 # Skill schemas
 class SkillBase(BaseModel):
     title: str = Field(..., min_length=3, max_length=100)
@@ -75,7 +101,7 @@ class SkillCreate(SkillBase):
     can_teach: bool
     want_learn: bool
 
-    @root_validator
+    @root_validator(skip_on_failure=True)
     def check_teach_and_learn(cls, values):
         can_teach = values.get('can_teach')
         want_learn = values.get('want_learn')
@@ -84,6 +110,11 @@ class SkillCreate(SkillBase):
         return values
 
 
+class SkillImport(SkillCreate):
+    """Рядок пакетного імпорту: навичка та власники, до яких її прив'язати."""
+    user_ids: List[int] = Field(default_factory=list, max_length=100)
+
+
 class SkillUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=3, max_length=100)
     description: Optional[str] = Field(None, min_length=10, max_length=500)
@@ -105,6 +136,12 @@ class SkillResponse(SkillBase):
         from_attributes = True
 
 
+class SkillSuggestion(BaseModel):
+    id: int
+    title: str
+    category: str
+
+
 # Exchange schemas
 class ExchangeBase(BaseModel):
     skill_id: int
@@ -119,13 +156,17 @@ class ExchangeCreate(ExchangeBase):
 class ExchangeUpdate(BaseModel):
     status: Optional[ExchangeStatus] = None
     message: Optional[str] = None
+    # Версія, яку бачив клієнт; якщо обмін уже змінився — 409
+    version: Optional[int] = None
 
 
 class ExchangeResponse(ExchangeBase):
     id: int
     sender_id: int
     receiver_id: int
+    cycle_id: Optional[int] = None
     status: ExchangeStatus
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime]
     sender: 'UserResponse'
@@ -136,6 +177,17 @@ class ExchangeResponse(ExchangeBase):
         from_attributes = True
 
 
+class ExchangeCycleResponse(BaseModel):
+    id: int
+    length: int
+    score: float
+    created_at: datetime
+    exchanges: List[ExchangeResponse]
+
+    class Config:
+        from_attributes = True
+
+
 # Review schemas
 class ReviewBase(BaseModel):
     rating: int = Field(..., ge=1, le=5)
@@ -163,6 +215,7 @@ class ReviewResponse(ReviewBase):
 UserResponse.model_rebuild()
 SkillResponse.model_rebuild()
 ExchangeResponse.model_rebuild()
+ExchangeCycleResponse.model_rebuild()
 ReviewResponse.model_rebuild()
 
 class CategoryBase(BaseModel):
@@ -177,6 +230,16 @@ class Category(CategoryBase):
     class Config:
         orm_mode = True
 
+class BulkRowResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    counts: Dict[str, int]
+    results: List[BulkRowResult]
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
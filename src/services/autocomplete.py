@@ -0,0 +1,100 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Skill
+from src.utils.text import normalize
+
+
+# Вид ключа: початок назви важливіший за початок слова, а той — за категорію
+TITLE, WORD, CATEGORY = 0, 1, 2
+
+# Скільки кандидатів переглядати за префіксом, перш ніж ранжувати
+MAX_CANDIDATES = 200
+
+
+class PrefixIndex:
+    """
+    Відсортований масив ключів (нормалізований текст, вид, id навички).
+    Пошук — bisect до першого ключа з префіксом і послідовний перегляд,
+    тож запит коштує O(log n + k) без звернення до БД.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int, int]] = []
+        self._skills: Dict[int, dict] = {}
+        self._skill_keys: Dict[int, List[Tuple[str, int, int]]] = {}
+
+    def __len__(self):
+        return len(self._skills)
+
+    @staticmethod
+    def _keys_for(skill_id: int, title: str, category: str) -> List[Tuple[str, int, int]]:
+        normalized = normalize(title)
+        keys = {(normalized, TITLE, skill_id)}
+        words = normalized.split(" ")
+        # Кожен наступний суфікс назви: "гра на гітарі" знаходиться за "гіт"
+        for i in range(1, len(words)):
+            keys.add((" ".join(words[i:]), WORD, skill_id))
+        if category:
+            keys.add((normalize(category), CATEGORY, skill_id))
+        return sorted(keys)
+
+    def load(self, rows) -> None:
+        """Побудувати індекс з нуля з рядків (id, title, category)."""
+        keys, skills, skill_keys = [], {}, {}
+        for skill_id, title, category in rows:
+            skills[skill_id] = {"id": skill_id, "title": title, "category": category}
+            skill_keys[skill_id] = self._keys_for(skill_id, title, category)
+            keys.extend(skill_keys[skill_id])
+        keys.sort()
+        self._keys, self._skills, self._skill_keys = keys, skills, skill_keys
+
+    def upsert(self, skill_id: int, title: str, category: str) -> None:
+        self.remove(skill_id)
+        self._skills[skill_id] = {"id": skill_id, "title": title, "category": category}
+        self._skill_keys[skill_id] = self._keys_for(skill_id, title, category)
+        for key in self._skill_keys[skill_id]:
+            insort(self._keys, key)
+
+    def remove(self, skill_id: int) -> None:
+        for key in self._skill_keys.pop(skill_id, ()):
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+        self._skills.pop(skill_id, None)
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+
+        best: Dict[int, int] = {}
+        i = bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and len(best) < MAX_CANDIDATES:
+            key, kind, skill_id = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            if kind < best.get(skill_id, CATEGORY + 1):
+                best[skill_id] = kind
+            i += 1
+
+        ranked = sorted(
+            best,
+            key=lambda skill_id: (
+                best[skill_id], len(self._skills[skill_id]["title"]), self._skills[skill_id]["title"]
+            )
+        )
+        return [self._skills[skill_id] for skill_id in ranked[:limit]]
+
+
+# Індекс процесу; кожен воркер uvicorn тримає власну копію
+skill_index = PrefixIndex()
+
+
+async def build_index(db: AsyncSession) -> None:
+    """Завантажити назви та категорії всіх навичок у індекс."""
+    result = await db.execute(select(Skill.id, Skill.title, Skill.category))
+    skill_index.load(result.all())
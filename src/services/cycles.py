@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import AsyncSessionLocal, async_engine
+from src.repository import exchanges as repository_exchanges
+from src.services.swap_graph import SwapGraph, build_graph
+
+
+# Межі пошуку: довжина кільця, кількість сильних ребер на вершину,
+# скільки користувачів брати з одного постингу теми та кілець на стартову вершину
+MIN_CYCLE_LENGTH = 3
+MAX_CYCLE_LENGTH = 5
+MAX_FANOUT = int(os.getenv("CYCLE_MAX_FANOUT", "16"))
+MAX_POSTING_SCAN = int(os.getenv("CYCLE_MAX_POSTING_SCAN", "200"))
+MAX_CYCLES_PER_START = 3
+
+# Кожен користувач потрапляє не більше ніж в одну нову пропозицію
+MAX_PROPOSALS_PER_USER = 1
+
+Edges = Dict[int, List[Tuple[int, float]]]
+
+
+class Cycle(NamedTuple):
+    users: Tuple[int, ...]
+    score: float
+
+
+def build_edges(graph: SwapGraph, exclude: Set[int] = frozenset()) -> Edges:
+    """Орієнтований граф "u навчає того, що хоче v" з обмеженим степенем виходу."""
+    edges = {}
+    for user_id in graph.users():
+        if user_id in exclude:
+            continue
+        out = [
+            (target, weight)
+            for target, weight in graph.out_neighbors(user_id, MAX_FANOUT, MAX_POSTING_SCAN)
+            if target not in exclude
+        ]
+        if out:
+            edges[user_id] = out
+    return edges
+
+
+def _backward_paths(start: int, incoming: Edges) -> Dict[int, List[Tuple[Tuple[int, ...], float]]]:
+    """Шляхи довжиною 1–2 назад до start: вершина -> [(шлях до start, вага)]."""
+    paths = defaultdict(list)
+    for x, w1 in incoming.get(start, ()):
+        if x <= start:
+            continue
+        paths[x].append(((x,), w1))
+        for y, w2 in incoming.get(x, ()):
+            if y > start and y != x:
+                paths[y].append(((y, x), min(w1, w2)))
+    return paths
+
+
+def find_cycles(
+    edges: Edges,
+    min_length: int = MIN_CYCLE_LENGTH,
+    max_length: int = MAX_CYCLE_LENGTH,
+    per_start: int = MAX_CYCLES_PER_START
+) -> List[Cycle]:
+    """
+    Кільця довжиною min_length..max_length, кожне рівно один раз.
+    Кільце шукається від найменшого id, тож обертання не дублюються.
+    Зустріч посередині: шляхи вперед до 3 ребер з'єднуються зі шляхами
+    назад до 2 ребер, тому робота на вершину обмежена MAX_FANOUT ** 3.
+    Оцінка кільця — найслабше ребро.
+    """
+    incoming: Edges = defaultdict(list)
+    for source, targets in edges.items():
+        for target, weight in targets:
+            incoming[target].append((source, weight))
+    for sources in incoming.values():
+        sources.sort(key=lambda edge: (-edge[1], edge[0]))
+        del sources[MAX_FANOUT:]
+
+    max_forward = max_length - 2
+    cycles = []
+    for start in sorted(edges):
+        backward = _backward_paths(start, incoming)
+        if not backward:
+            continue
+
+        found: Dict[Tuple[int, ...], float] = {}
+        stack = [((start,), float("inf"))]
+        while stack and len(found) < per_start:
+            path, weight = stack.pop()
+            last = path[-1]
+
+            for tail, tail_weight in backward.get(last, ()):
+                length = len(path) - 1 + len(tail)
+                if length < min_length or length > max_length:
+                    continue
+                if any(user_id in path for user_id in tail[1:]):
+                    continue
+                found.setdefault(path + tail[1:], min(weight, tail_weight))
+
+            if len(path) - 1 < max_forward:
+                for target, edge_weight in edges.get(last, ()):
+                    if target > start and target not in path:
+                        stack.append((path + (target,), min(weight, edge_weight)))
+
+        cycles.extend(Cycle(users, round(score, 4)) for users, score in found.items())
+    return cycles
+
+
+def select_cycles(cycles: Iterable[Cycle], per_user: int = MAX_PROPOSALS_PER_USER) -> List[Cycle]:
+    """Жадібно відібрати найсильніші кільця, коротші першими при рівній оцінці."""
+    used = Counter()
+    selected = []
+    for cycle in sorted(cycles, key=lambda c: (-c.score, len(c.users), c.users)):
+        if all(used[user_id] < per_user for user_id in cycle.users):
+            used.update(cycle.users)
+            selected.append(cycle)
+    return selected
+
+
+def cycle_legs(graph: SwapGraph, cycle: Cycle) -> List[Tuple[int, int, int]]:
+    """Ланки кільця як обміни: (хто навчає, кого навчає, навичка)."""
+    legs = []
+    for index, sender_id in enumerate(cycle.users):
+        receiver_id = cycle.users[(index + 1) % len(cycle.users)]
+        skill_ids = graph.matching_skills(sender_id, receiver_id)
+        if not skill_ids:
+            return []
+        legs.append((sender_id, receiver_id, skill_ids[0]))
+    return legs
+
+
+async def run(db: AsyncSession) -> int:
+    """
+    Пакетна задача: побудувати граф з БД, знайти кільця і зберегти їх
+    як пропозиції. Користувачі з відкритою пропозицією пропускаються.
+    """
+    graph = await build_graph(db, SwapGraph())
+    busy = await repository_exchanges.get_users_in_open_cycles(db)
+
+    started = time.perf_counter()
+    cycles = select_cycles(find_cycles(build_edges(graph, busy)))
+    proposals = [(cycle.score, legs) for cycle in cycles if (legs := cycle_legs(graph, cycle))]
+    print(f"Знайдено кілець: {len(proposals)} за {time.perf_counter() - started:.1f} с")
+
+    return await repository_exchanges.create_exchange_cycles(db, proposals)
+
+
+async def main() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            created = await run(db)
+        print(f"Збережено пропозицій кільцевого обміну: {created}")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
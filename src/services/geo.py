@@ -0,0 +1,150 @@
+import csv
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.utils.text import normalize
+
+
+GAZETTEER_PATH = Path(__file__).parent / "data" / "gazetteer.csv"
+
+# Розмір клітинки сітки в градусах (~28 км по широті)
+CELL_DEG = 0.25
+_ROWS = int(180 / CELL_DEG)
+_COLUMNS = int(360 / CELL_DEG)
+
+# Більше клітинок у IN не передаємо — тоді фільтр за смугою широти
+MAX_CELLS = 1000
+
+# geo_cell для location, яку геокодер не розпізнав: такі рядки не геокодуються
+# знову при кожному старті і не потрапляють у жоден пошук поруч
+UNRESOLVED_CELL = -1
+
+KM_PER_DEG = 111.32
+
+# Службові слова, які відкидаються з адреси: "м. Київ", "місто Львів, Україна"
+_NOISE = re.compile(r"^(м\.|м |місто |город |г\. ?|city of )")
+
+Point = Tuple[float, float]
+
+
+class Gazetteer:
+    """Офлайн-геокодер: назви населених пунктів (з варіантами) -> координати."""
+
+    def __init__(self, path: Path = GAZETTEER_PATH):
+        self._places: Dict[str, Point] = {}
+        with open(path, encoding="utf-8", newline="") as file:
+            for row in csv.DictReader(file):
+                point = (float(row["lat"]), float(row["lon"]))
+                for name in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                    self._places[normalize(name)] = point
+
+    def geocode(self, location: Optional[str]) -> Optional[Point]:
+        """Координати для вільного тексту на кшталт "Київ", "м. Львів, Україна" чи "50.45, 30.52"."""
+        text = normalize(location)
+        if not text:
+            return None
+
+        coordinates = re.fullmatch(r"(-?\d+(?:\.\d+)?)\s*[,; ]\s*(-?\d+(?:\.\d+)?)", text)
+        if coordinates:
+            lat, lon = float(coordinates.group(1)), float(coordinates.group(2))
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                return lat, lon
+            return None
+
+        for part in [text, *re.split(r"[,;/()]", text)]:
+            part = _NOISE.sub("", part.strip()).strip()
+            if part in self._places:
+                return self._places[part]
+        return None
+
+
+gazetteer = Gazetteer()
+
+
+class NearFilter(NamedTuple):
+    center: Point
+    radius_km: float
+
+
+def _row(lat: float) -> int:
+    return min(math.floor((lat + 90.0) / CELL_DEG), _ROWS - 1)
+
+
+def _column(lon: float) -> int:
+    return math.floor((lon + 180.0) / CELL_DEG)
+
+
+def cell_of(lat: float, lon: float) -> int:
+    """Номер клітинки сітки CELL_DEG x CELL_DEG, у якій лежить точка."""
+    return _row(lat) * _COLUMNS + _column(lon) % _COLUMNS
+
+
+def _bounds(near: NearFilter) -> Tuple[float, float, float, float]:
+    lat, lon = near.center
+    dlat = near.radius_km / KM_PER_DEG
+    dlon = near.radius_km / (KM_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+    return max(lat - dlat, -90.0), min(lat + dlat, 90.0), lon - dlon, lon + dlon
+
+
+def cells_within(near: NearFilter) -> List[int]:
+    """Клітинки, що перетинають обмежувальний прямокутник кола."""
+    lat_min, lat_max, lon_min, lon_max = _bounds(near)
+    return [
+        row * _COLUMNS + col % _COLUMNS
+        for row in range(_row(lat_min), _row(lat_max) + 1)
+        for col in range(_column(lon_min), _column(lon_max) + 1)
+    ]
+
+
+def near_clause(entity, near: NearFilter):
+    """
+    SQL-умова "точка в радіусі". Індекс по geo_cell відсікає все, крім
+    кількох клітинок навколо, тож запит не сканує всіх користувачів;
+    далі точна перевірка рівнопроміжною проєкцією (похибка мізерна до сотень км).
+    """
+    lat, lon = near.center
+    lat_min, lat_max, _, _ = _bounds(near)
+    cells = cells_within(near)
+    if len(cells) <= MAX_CELLS:
+        candidates = entity.geo_cell.in_(cells)
+    else:
+        candidates = entity.latitude.between(lat_min, lat_max)
+
+    scale = math.cos(math.radians(lat))
+    dx = (entity.longitude - lon) * (KM_PER_DEG * scale)
+    dy = (entity.latitude - lat) * KM_PER_DEG
+    return and_(candidates, dx * dx + dy * dy <= near.radius_km ** 2)
+
+
+def locate(location: Optional[str]) -> dict:
+    """
+    Значення latitude/longitude/geo_cell для моделі User за текстом location.
+    Нерозпізнана location позначається UNRESOLVED_CELL, відсутня — NULL.
+    """
+    point = gazetteer.geocode(location)
+    if point is None:
+        cell = None if location is None else UNRESOLVED_CELL
+        return {"latitude": None, "longitude": None, "geo_cell": cell}
+    return {"latitude": point[0], "longitude": point[1], "geo_cell": cell_of(*point)}
+
+
+async def geocode_missing(db: AsyncSession) -> int:
+    """
+    Догеокодувати користувачів, у яких є location, але ще немає клітинки.
+    Нерозпізнані отримують UNRESOLVED_CELL, тож наступний старт їх не перебирає.
+    """
+    pending = await db.execute(
+        select(User.id, User.location)
+        .where(User.location.is_not(None), User.geo_cell.is_(None))
+    )
+    updates = [{"id": user_id, **locate(location)} for user_id, location in pending]
+    if updates:
+        await db.execute(update(User), updates)
+        await db.commit()
+    return len(updates)
@@ -0,0 +1,166 @@
+import math
+import os
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Exchange, ExchangeStatus, Skill, User, skill_user_association
+from src.utils.text import normalize
+
+
+# Байєсівське згладжування: стільки "уявних" відгуків із середньою PRIOR_MEAN.
+# Пріор фіксований, а не середній по платформі, щоб новий відгук
+# змінював позицію лише одного користувача, а не всіх.
+PRIOR_COUNT = float(os.getenv("LEADERBOARD_PRIOR_COUNT", "5"))
+PRIOR_MEAN = float(os.getenv("LEADERBOARD_PRIOR_MEAN", "3.5"))
+
+# Вага досвіду: додаток log(1 + завершені обміни) до рейтингу
+EXCHANGE_WEIGHT = float(os.getenv("LEADERBOARD_EXCHANGE_WEIGHT", "0.1"))
+
+
+class TeacherStats(NamedTuple):
+    rating_sum: int = 0
+    rating_count: int = 0
+    completed: int = 0
+
+    @property
+    def bayesian_rating(self) -> float:
+        return (self.rating_sum + PRIOR_MEAN * PRIOR_COUNT) / (self.rating_count + PRIOR_COUNT)
+
+    @property
+    def score(self) -> float:
+        return self.bayesian_rating + EXCHANGE_WEIGHT * math.log1p(self.completed)
+
+
+class LeaderboardEntry(NamedTuple):
+    rank: int
+    user_id: int
+    score: float
+    stats: TeacherStats
+
+
+class Leaderboards:
+    """
+    Відсортовані списки вчителів по категоріях: (-оцінка, user_id).
+    Зміна рейтингу чи навичок переставляє лише одного користувача,
+    а сторінка — це зріз списку, тож її вартість не залежить від номера.
+    """
+
+    def __init__(self):
+        self._stats: Dict[int, TeacherStats] = defaultdict(TeacherStats)
+        # skill_id -> (категорія, вчителі); з цього виводиться членство в категоріях
+        self._skills: Dict[int, Tuple[str, frozenset]] = {}
+        self._teaches: Dict[int, Counter] = defaultdict(Counter)
+        self._boards: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        self._keys: Dict[Tuple[str, int], Tuple[float, int]] = {}
+
+    def _place(self, category: str, user_id: int) -> None:
+        board = self._boards[category]
+        old = self._keys.pop((category, user_id), None)
+        if old is not None:
+            del board[bisect_left(board, old)]
+        if self._teaches[user_id][category] > 0:
+            key = (-self._stats[user_id].score, user_id)
+            insort(board, key)
+            self._keys[(category, user_id)] = key
+        elif not board:
+            del self._boards[category]
+
+    def _rescore(self, user_id: int) -> None:
+        for category in list(self._teaches.get(user_id, ())):
+            self._place(category, user_id)
+
+    def set_skill(self, skill_id: int, category: str, can_teach: bool, user_ids: Iterable[int]) -> None:
+        """Замінити внесок навички: вчителями категорії є власники навичок can_teach."""
+        self.remove_skill(skill_id)
+        if not can_teach:
+            return
+        category = normalize(category)
+        users = frozenset(user_ids)
+        self._skills[skill_id] = (category, users)
+        for user_id in users:
+            self._teaches[user_id][category] += 1
+            self._place(category, user_id)
+
+    def remove_skill(self, skill_id: int) -> None:
+        category, users = self._skills.pop(skill_id, (None, ()))
+        for user_id in users:
+            self._teaches[user_id][category] -= 1
+            self._place(category, user_id)
+            if self._teaches[user_id][category] <= 0:
+                del self._teaches[user_id][category]
+
+    def add_review(self, user_id: int, rating: int) -> None:
+        stats = self._stats[user_id]
+        self._stats[user_id] = stats._replace(
+            rating_sum=stats.rating_sum + rating, rating_count=stats.rating_count + 1
+        )
+        self._rescore(user_id)
+
+    def add_completed(self, user_id: int, delta: int = 1) -> None:
+        stats = self._stats[user_id]
+        self._stats[user_id] = stats._replace(completed=max(stats.completed + delta, 0))
+        self._rescore(user_id)
+
+    def load(self, skills, stats: Dict[int, TeacherStats]) -> None:
+        """Побудувати з нуля з рядків (skill_id, категорія, can_teach, user_ids) та статистики."""
+        self.__init__()
+        self._stats.update(stats)
+        for skill_id, category, can_teach, user_ids in skills:
+            self.set_skill(skill_id, category, can_teach, user_ids)
+
+    def categories(self) -> List[Tuple[str, int]]:
+        """Категорії з кількістю вчителів."""
+        return sorted((category, len(board)) for category, board in self._boards.items())
+
+    def page(self, category: str, skip: int = 0, limit: int = 20) -> List[LeaderboardEntry]:
+        board = self._boards.get(normalize(category), [])
+        return [
+            LeaderboardEntry(rank, user_id, round(-negative_score, 4), self._stats[user_id])
+            for rank, (negative_score, user_id) in enumerate(board[skip:skip + limit], start=skip + 1)
+        ]
+
+    def size(self, category: str) -> int:
+        return len(self._boards.get(normalize(category), ()))
+
+
+# Рейтинги процесу; кожен воркер uvicorn тримає власну копію
+leaderboards = Leaderboards()
+
+
+async def build_leaderboards(db: AsyncSession) -> None:
+    """Завантажити навички-вчителів, рейтинги та завершені обміни з БД."""
+    owners = defaultdict(set)
+    for user_id, skill_id in (await db.execute(
+        select(skill_user_association.c.user_id, skill_user_association.c.skill_id)
+        .join(Skill, Skill.id == skill_user_association.c.skill_id)
+        .where(Skill.can_teach.is_(True))
+    )).all():
+        owners[skill_id].add(user_id)
+
+    stats: Dict[int, TeacherStats] = {}
+    for user_id, rating_sum, rating_count in (await db.execute(
+        select(User.id, User.rating_sum, User.rating_count).where(User.rating_count > 0)
+    )).all():
+        stats[user_id] = TeacherStats(rating_sum, rating_count)
+
+    completed = union_all(
+        select(Exchange.sender_id.label("user_id")).where(Exchange.status == ExchangeStatus.completed),
+        select(Exchange.receiver_id.label("user_id")).where(Exchange.status == ExchangeStatus.completed)
+    ).subquery()
+    result = await db.execute(
+        select(completed.c.user_id, func.count()).group_by(completed.c.user_id)
+    )
+    for user_id, count in result:
+        stats[user_id] = stats.get(user_id, TeacherStats())._replace(completed=count)
+
+    result = await db.execute(
+        select(Skill.id, Skill.category, Skill.can_teach).where(Skill.can_teach.is_(True))
+    )
+    leaderboards.load(
+        ((skill_id, category, can_teach, owners.get(skill_id, ())) for skill_id, category, can_teach in result),
+        stats
+    )
@@ -0,0 +1,118 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Skill
+from src.utils.text import normalize, tokens
+
+
+# Надбавка до оцінки, якщо навички з однієї категорії
+CATEGORY_BONUS = 0.25
+
+
+class IndexedSkill(NamedTuple):
+    tokens: frozenset
+    category: str
+    can_teach: bool
+    want_learn: bool
+
+
+class MatchIndex:
+    """
+    Інвертований індекс стемів назв навичок, окремо для тих,
+    хто навчає (teach), і тих, хто хоче вчитися (learn).
+    Кандидати знаходяться перетином постингів, а не скануванням таблиці.
+    """
+
+    def __init__(self):
+        self._teach: Dict[str, Set[int]] = defaultdict(set)
+        self._learn: Dict[str, Set[int]] = defaultdict(set)
+        self._skills: Dict[int, IndexedSkill] = {}
+
+    def __len__(self):
+        return len(self._skills)
+
+    def _postings(self, skill: IndexedSkill) -> List[Dict[str, Set[int]]]:
+        postings = []
+        if skill.can_teach:
+            postings.append(self._teach)
+        if skill.want_learn:
+            postings.append(self._learn)
+        return postings
+
+    def upsert(self, skill_id: int, title: str, category: str, can_teach: bool, want_learn: bool) -> None:
+        self.remove(skill_id)
+        skill = IndexedSkill(frozenset(tokens(title)), normalize(category), bool(can_teach), bool(want_learn))
+        self._skills[skill_id] = skill
+        for postings in self._postings(skill):
+            for token in skill.tokens:
+                postings[token].add(skill_id)
+
+    def remove(self, skill_id: int) -> None:
+        skill = self._skills.pop(skill_id, None)
+        if skill is None:
+            return
+        for postings in self._postings(skill):
+            for token in skill.tokens:
+                posting = postings.get(token)
+                if posting is not None:
+                    posting.discard(skill_id)
+                    if not posting:
+                        del postings[token]
+
+    def load(self, rows) -> None:
+        """Побудувати індекс з нуля з рядків (id, title, category, can_teach, want_learn)."""
+        self.__init__()
+        for row in rows:
+            self.upsert(*row)
+
+    def _idf(self, token: str, postings: Dict[str, Set[int]]) -> float:
+        return math.log(1 + len(self._skills) / (1 + len(postings.get(token, ()))))
+
+    def matches(self, skill_id: int, limit: int = 50) -> List[Tuple[str, int, float]]:
+        """
+        Ранжовані збіги для навички: (тип, id навички, оцінка).
+        Хто хоче вчитися — шукаємо серед teach, хто навчає — серед learn.
+        Оцінка — частка ваги (IDF) спільних слів плюс надбавка за категорію.
+        """
+        skill = self._skills.get(skill_id)
+        if skill is None or not skill.tokens:
+            return []
+
+        if skill.want_learn:
+            match_type, postings = "teacher", self._teach
+        elif skill.can_teach:
+            match_type, postings = "student", self._learn
+        else:
+            return []
+
+        weights = {token: self._idf(token, postings) for token in skill.tokens}
+        total = sum(weights.values()) or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        for token, weight in weights.items():
+            for candidate_id in postings.get(token, ()):
+                if candidate_id != skill_id:
+                    scores[candidate_id] += weight / total
+
+        ranked = []
+        for candidate_id, score in scores.items():
+            if self._skills[candidate_id].category == skill.category:
+                score += CATEGORY_BONUS
+            ranked.append((match_type, candidate_id, round(score, 4)))
+        ranked.sort(key=lambda match: (-match[2], match[1]))
+        return ranked[:limit]
+
+
+# Індекс процесу; кожен воркер uvicorn тримає власну копію
+match_index = MatchIndex()
+
+
+async def build_index(db: AsyncSession) -> None:
+    """Завантажити всі навички в індекс збігів."""
+    result = await db.execute(
+        select(Skill.id, Skill.title, Skill.category, Skill.can_teach, Skill.want_learn)
+    )
+    match_index.load(result.all())
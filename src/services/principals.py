@@ -0,0 +1,77 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+
+# Скільки секунд перевірений токен обслуговується без звернення до БД
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+# Межа кількості токенів у пам'яті
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+
+class Principal(NamedTuple):
+    """Автентифікований користувач: лише поля, потрібні маршрутам."""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+
+
+class PrincipalCache:
+    """
+    LRU з TTL: токен -> Principal. Запис живе не довше за TTL і за exp самого токена.
+    Зміна користувача скидає всі його токени; інші воркери бачать її не пізніше ніж через TTL.
+    """
+
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES, ttl: int = AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._tokens: Dict[int, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[Principal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if time.time() >= expires_at:
+            self._remove(token)
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def put(self, token: str, principal: Principal, token_expires_at: Optional[float] = None) -> None:
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        self._remove(token)
+        self._entries[token] = (expires_at, principal)
+        self._tokens.setdefault(principal.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        for token in self._tokens.pop(user_id, ()):
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens.clear()
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[entry[1].id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Кеш процесу; кожен воркер uvicorn тримає власну копію
+principals = PrincipalCache()
@@ -0,0 +1,133 @@
+import math
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from src.utils.text import normalize
+
+
+class RankingWeights(NamedTuple):
+    text: float
+    rating: float
+    level: float
+    exchanges: float
+    recency: float
+    location: float
+
+
+def _weight(name: str, default: str) -> float:
+    return float(os.getenv(f"MATCH_WEIGHT_{name}", default))
+
+
+# Ваги ознак задаються змінними оточення MATCH_WEIGHT_*
+WEIGHTS = RankingWeights(
+    text=_weight("TEXT", "1.0"),
+    rating=_weight("RATING", "0.6"),
+    level=_weight("LEVEL", "1.0"),
+    exchanges=_weight("EXCHANGES", "0.3"),
+    recency=_weight("RECENCY", "0.3"),
+    location=_weight("LOCATION", "0.4"),
+)
+
+# Скільки кандидатів з інвертованого індексу переранжовувати
+CANDIDATE_POOL = int(os.getenv("MATCH_CANDIDATE_POOL", "1000"))
+
+# Через скільки днів без активності внесок свіжості падає вдвічі
+RECENCY_HALF_LIFE_DAYS = float(os.getenv("MATCH_RECENCY_HALF_LIFE_DAYS", "30"))
+
+# Згладжування рейтингу: стільки "уявних" відгуків із середньою оцінкою
+RATING_PRIOR_COUNT = 3
+RATING_PRIOR_MEAN = 3.0
+
+# Порядкові номери SkillLevel
+LEVELS = {"beginner": 0, "intermediate": 1, "advanced": 2, "expert": 3}
+
+
+class CandidateFeatures(NamedTuple):
+    """Ознаки кандидатів як стовпці однакової довжини (по елементу на кандидата)."""
+    text_score: np.ndarray
+    rating_sum: np.ndarray
+    rating_count: np.ndarray
+    level: np.ndarray
+    completed: np.ndarray
+    last_active: np.ndarray  # unix-час, NaN — активності не було
+    location: np.ndarray  # код міста в places, -1 — не вказано
+    places: dict  # нормалізована назва міста -> код
+
+    @classmethod
+    def from_rows(cls, rows) -> "CandidateFeatures":
+        """Зібрати стовпці з рядків (text_score, rating_sum, rating_count, level, completed, last_active, location)."""
+        rows = list(rows)
+        columns = zip(*rows) if rows else [()] * 7
+        text_score, rating_sum, rating_count, level, completed, last_active, location = columns
+        places = {}
+        codes = [
+            places.setdefault(place, len(places)) if place else -1
+            for place in (normalize(value or "") for value in location)
+        ]
+        return cls(
+            text_score=np.asarray(text_score, dtype=np.float64),
+            rating_sum=np.asarray(rating_sum, dtype=np.float64),
+            rating_count=np.asarray(rating_count, dtype=np.float64),
+            level=np.asarray([LEVELS.get(value, 0) for value in level], dtype=np.int8),
+            completed=np.asarray(completed, dtype=np.float64),
+            last_active=np.asarray(
+                [math.nan if value is None else value for value in last_active], dtype=np.float64
+            ),
+            location=np.asarray(codes, dtype=np.int32),
+            places=places,
+        )
+
+
+def score_candidates(
+    features: CandidateFeatures,
+    *,
+    level: str,
+    teacher_wanted: bool,
+    location: str = "",
+    now: float,
+    weights: RankingWeights = WEIGHTS,
+) -> np.ndarray:
+    """
+    Зважена сума нормалізованих у [0, 1] ознак для всіх кандидатів одразу.
+    teacher_wanted — шукаємо вчителя (рівень кандидата має бути не нижчим)
+    чи учня (рівень кандидата має бути не вищим за наш).
+    """
+    rating = (features.rating_sum + RATING_PRIOR_MEAN * RATING_PRIOR_COUNT) / (
+        features.rating_count + RATING_PRIOR_COUNT
+    )
+    rating = (rating - 1.0) / 4.0
+
+    gap = features.level - LEVELS.get(level, 0)
+    if not teacher_wanted:
+        gap = -gap
+    level_fit = np.clip(1.0 + np.minimum(gap, 0) / 3.0, 0.0, 1.0)
+
+    exchanges = np.log1p(features.completed)
+    top = exchanges.max(initial=0.0)
+    if top > 0:
+        exchanges = exchanges / top
+
+    idle_days = np.maximum(now - features.last_active, 0.0) / 86400.0
+    recency = np.nan_to_num(np.exp2(-idle_days / RECENCY_HALF_LIFE_DAYS), nan=0.0)
+
+    place = features.places.get(normalize(location or ""), -1) if location else -1
+    same_place = (features.location == place) & (place >= 0)
+
+    return (
+        weights.text * features.text_score
+        + weights.rating * rating
+        + weights.level * level_fit
+        + weights.exchanges * exchanges
+        + weights.recency * recency
+        + weights.location * same_place
+    )
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Індекси k найкращих оцінок за спаданням, без повного сортування."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    best = np.argpartition(-scores, k)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
@@ -0,0 +1,198 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Skill, User, skill_user_association
+from src.utils.text import tokens
+
+
+class GraphSkill(NamedTuple):
+    topics: frozenset
+    can_teach: bool
+    want_learn: bool
+    users: frozenset
+
+
+class SwapPartner(NamedTuple):
+    user_id: int
+    score: float
+    their_skill_ids: List[int]
+    your_skill_ids: List[int]
+
+
+class SwapGraph:
+    """
+    Двочастковий граф користувач — тема (стем слова з назви навички)
+    з ребрами двох видів: "навчає" і "хоче вивчити".
+    Партнер для обміну — той, хто навчає те, що я хочу, і хоче того, що навчаю я.
+    """
+
+    def __init__(self):
+        self._skills: Dict[int, GraphSkill] = {}
+        self._teaches: Dict[int, Counter] = defaultdict(Counter)
+        self._wants: Dict[int, Counter] = defaultdict(Counter)
+        self._teachers: Dict[str, Set[int]] = defaultdict(set)
+        self._learners: Dict[str, Set[int]] = defaultdict(set)
+        self._user_skills: Dict[int, Set[int]] = defaultdict(set)
+
+    def _edges(self, skill: GraphSkill):
+        if skill.can_teach:
+            yield self._teaches, self._teachers
+        if skill.want_learn:
+            yield self._wants, self._learners
+
+    def _add(self, skill_id: int, skill: GraphSkill) -> None:
+        self._skills[skill_id] = skill
+        for user_id in skill.users:
+            self._user_skills[user_id].add(skill_id)
+            for by_user, by_topic in self._edges(skill):
+                by_user[user_id].update(skill.topics)
+                for topic in skill.topics:
+                    by_topic[topic].add(user_id)
+
+    def _remove(self, skill_id: int) -> GraphSkill:
+        skill = self._skills.pop(skill_id, None)
+        if skill is None:
+            return None
+        for user_id in skill.users:
+            self._user_skills[user_id].discard(skill_id)
+            if not self._user_skills[user_id]:
+                del self._user_skills[user_id]
+            for by_user, by_topic in self._edges(skill):
+                counter = by_user[user_id]
+                counter.subtract(skill.topics)
+                for topic in skill.topics:
+                    if counter[topic] <= 0:
+                        del counter[topic]
+                        by_topic[topic].discard(user_id)
+                        if not by_topic[topic]:
+                            del by_topic[topic]
+                if not counter:
+                    del by_user[user_id]
+        return skill
+
+    def set_skill(
+        self, skill_id: int, title: str, can_teach: bool, want_learn: bool, user_ids: Iterable[int]
+    ) -> None:
+        """Замінити внесок навички в граф (нова назва, прапорці чи користувачі)."""
+        self._remove(skill_id)
+        self._add(
+            skill_id,
+            GraphSkill(frozenset(tokens(title)), bool(can_teach), bool(want_learn), frozenset(user_ids))
+        )
+
+    def remove_skill(self, skill_id: int) -> None:
+        self._remove(skill_id)
+
+    def link(self, user_id: int, skill_id: int) -> None:
+        """Користувач додав собі навичку."""
+        skill = self._remove(skill_id)
+        if skill is not None:
+            self._add(skill_id, skill._replace(users=skill.users | {user_id}))
+
+    def unlink(self, user_id: int, skill_id: int) -> None:
+        """Користувач прибрав навичку зі свого профілю."""
+        skill = self._remove(skill_id)
+        if skill is not None:
+            self._add(skill_id, skill._replace(users=skill.users - {user_id}))
+
+    def remove_user(self, user_id: int) -> None:
+        """Користувач більше не бере участі в обмінах (деактивований): від'єднати всі його навички."""
+        for skill_id in list(self._user_skills.get(user_id, ())):
+            self.unlink(user_id, skill_id)
+
+    def load(self, skills, links: Dict[int, Set[int]]) -> None:
+        """Побудувати граф з нуля з рядків (id, title, can_teach, want_learn) та зв'язків."""
+        self.__init__()
+        for skill_id, title, can_teach, want_learn in skills:
+            self.set_skill(skill_id, title, can_teach, want_learn, links.get(skill_id, ()))
+
+    def _idf(self, topic: str) -> float:
+        holders = len(self._teachers.get(topic, ())) + len(self._learners.get(topic, ()))
+        return math.log(1 + len(self._user_skills) / (1 + holders))
+
+    def _overlap(self, teacher_id: int, learner_id: int) -> float:
+        taught = self._teaches.get(teacher_id, {})
+        wanted = self._wants.get(learner_id, {})
+        return sum(self._idf(topic) for topic in taught if topic in wanted)
+
+    def matching_skills(self, teacher_id: int, learner_id: int) -> List[int]:
+        """Навички teacher_id, яких хоче навчитися learner_id."""
+        wanted = self._wants.get(learner_id, {})
+        return sorted(
+            skill_id for skill_id in self._user_skills.get(teacher_id, ())
+            if self._skills[skill_id].can_teach and any(t in wanted for t in self._skills[skill_id].topics)
+        )
+
+    def users(self) -> List[int]:
+        return sorted(self._user_skills)
+
+    def out_neighbors(self, user_id: int, limit: int, scan_limit: int) -> List[Tuple[int, float]]:
+        """
+        Найсильніші ребра "user_id навчає того, що хоче v": [(v, вага)].
+        З кожного постингу береться не більше scan_limit користувачів,
+        щоб популярні теми не робили побудову квадратичною. Рівні ваги
+        розбиваються детермінованим хешем пари, а не id, інакше всі ребра
+        стікалися б до кількох користувачів з найменшими id.
+        """
+        weights: Dict[int, float] = defaultdict(float)
+        for topic in self._teaches.get(user_id, {}):
+            idf = self._idf(topic)
+            for learner_id in islice(self._learners.get(topic, ()), scan_limit):
+                if learner_id != user_id:
+                    weights[learner_id] += idf
+        return heapq.nlargest(limit, weights.items(), key=lambda edge: (edge[1], hash((user_id, edge[0]))))
+
+    def partners(self, user_id: int, limit: int = 20) -> List[SwapPartner]:
+        """
+        Взаємні партнери, найкращі першими. Оцінка — середнє геометричне
+        ваги того, що я отримую, і того, що віддаю, тож однобічні пари відпадають.
+        """
+        teachers = set()
+        for topic in self._wants.get(user_id, {}):
+            teachers |= self._teachers.get(topic, set())
+        learners = set()
+        for topic in self._teaches.get(user_id, {}):
+            learners |= self._learners.get(topic, set())
+        candidates = (teachers & learners) - {user_id}
+
+        scored = []
+        for partner_id in candidates:
+            receive = self._overlap(partner_id, user_id)
+            give = self._overlap(user_id, partner_id)
+            scored.append((math.sqrt(receive * give), partner_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        return [
+            SwapPartner(
+                user_id=partner_id,
+                score=round(score, 4),
+                their_skill_ids=self.matching_skills(partner_id, user_id),
+                your_skill_ids=self.matching_skills(user_id, partner_id),
+            )
+            for score, partner_id in scored[:limit]
+        ]
+
+
+# Граф процесу; кожен воркер uvicorn тримає власну копію
+swap_graph = SwapGraph()
+
+
+async def build_graph(db: AsyncSession, graph: SwapGraph = swap_graph) -> SwapGraph:
+    """Побудувати граф з таблиць skills і skill_user_association; неактивні користувачі не входять."""
+    links = defaultdict(set)
+    for user_id, skill_id in (await db.execute(
+        select(skill_user_association.c.user_id, skill_user_association.c.skill_id)
+        .join(User, User.id == skill_user_association.c.user_id)
+        .where(User.is_active.isnot(False))
+    )).all():
+        links[skill_id].add(user_id)
+
+    result = await db.execute(select(Skill.id, Skill.title, Skill.can_teach, Skill.want_learn))
+    graph.load(result.all(), links)
+    return graph
@@ -0,0 +1,106 @@
+import json
+import os
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+
+# Скільки рядків валідується та вставляється одним запитом і комітиться разом
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+Row = Tuple[int, Any]
+
+
+def row_result(index: int, status: str, id: Optional[int] = None, error: Optional[str] = None) -> dict:
+    return {"index": index, "status": status, "id": id, "error": error}
+
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+async def read_records(request: Request) -> AsyncIterator[Row]:
+    """
+    Рядки тіла запиту з їхніми номерами: JSON-масив або NDJSON (один об'єкт у рядку).
+    NDJSON читається потоком, тож великий імпорт не тримається в пам'яті цілком;
+    зламаний рядок стає помилкою цього рядка, а не всього запиту.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        index, buffer = 0, b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, _parse_line(line)
+                    index += 1
+        if buffer.strip():
+            yield index, _parse_line(buffer)
+        return
+
+    try:
+        records = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некоректний JSON")
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Очікується JSON-масив або NDJSON"
+        )
+    for index, record in enumerate(records):
+        yield index, record
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def validated_batches(
+    records: AsyncIterator[Row],
+    model: Type[BaseModel],
+    size: int = BULK_BATCH_SIZE
+) -> AsyncIterator[Tuple[List[Row], List[dict]]]:
+    """Пакети (валідні рядки як моделі, результати-помилки) по size вхідних рядків."""
+    valid, errors, count = [], [], 0
+    async for index, record in records:
+        if isinstance(record, ValueError):
+            errors.append(row_result(index, "error", error=f"Некоректний JSON: {record}"))
+        else:
+            try:
+                valid.append((index, model.model_validate(record)))
+            except ValidationError as e:
+                errors.append(row_result(index, "error", error=_error_message(e)))
+        count += 1
+        if count == size:
+            yield valid, errors
+            valid, errors, count = [], [], 0
+    if count:
+        yield valid, errors
+
+
+async def run_bulk(
+    request: Request,
+    model: Type[BaseModel],
+    handler: Callable[[List[Row]], Awaitable[List[dict]]]
+) -> dict:
+    """
+    Провалідувати тіло пакетами та передати кожен пакет у handler (вставка + commit).
+    Пакети незалежні: помилка в одному рядку не відкочує інші.
+    """
+    results = []
+    async for valid, errors in validated_batches(read_records(request), model):
+        results.extend(errors)
+        if valid:
+            results.extend(await handler(valid))
+    results.sort(key=lambda result: result["index"])
+    return {"counts": dict(Counter(result["status"] for result in results)), "results": results}
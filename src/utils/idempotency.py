@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select, update
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from src.database.db import AsyncSessionLocal
+from src.database.models import IdempotencyRecord
+from src.database.upsert import dialect_insert
+from src.utils.auth import verify_token
+
+
+# memory — LRU у процесі (один воркер), db — таблиця idempotency_keys (кілька воркерів)
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+# Скільки зберігається перша відповідь
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Межа кількості ключів у пам'яті
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# Через скільки секунд незавершений запит (впав воркер) перестає тримати ключ
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+# POST-ендпоінти, які мобільні клієнти повторюють при збоях мережі
+IDEMPOTENT_PATHS = frozenset({"/api/exchanges/", "/api/reviews/", "/api/skills/"})
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    # None — перший запит ще виконується
+    status_code: Optional[int] = None
+    # Заголовки ASGI-відповіді як є (Location, X-Next-Cursor, content-type, ...)
+    headers: Headers = []
+    body: bytes = b""
+
+
+def _dump_headers(headers: Headers) -> str:
+    return json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers])
+
+
+def _load_headers(raw: Optional[str]) -> Headers:
+    return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(raw or "[]")]
+
+
+class MemoryStore:
+    """LRU з TTL у пам'яті процесу."""
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_MAX_ENTRIES, ttl: int = IDEMPOTENCY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def claim(self, key: str, fingerprint: str) -> bool:
+        if await self.get(key) is not None:
+            return False
+        self._put(key, StoredResponse(fingerprint))
+        return True
+
+    async def save(self, key: str, response: StoredResponse) -> None:
+        self._put(key, response)
+
+    async def release(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def _put(self, key: str, response: StoredResponse) -> None:
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class DatabaseStore:
+    """
+    Таблиця idempotency_keys, спільна для всіх воркерів. Ключ захоплюється
+    INSERT ... ON CONFLICT DO NOTHING, тож дублікат з іншого воркера бачить його зайнятим.
+    """
+
+    # Як часто (с) видаляти прострочені ключі
+    PURGE_INTERVAL = 60
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL_SECONDS, lock_seconds: int = IDEMPOTENCY_LOCK_SECONDS):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._purged_at = 0.0
+
+    def _expired(self, now: datetime):
+        return or_(
+            IdempotencyRecord.created_at < now - timedelta(seconds=self.ttl),
+            and_(
+                IdempotencyRecord.status_code.is_(None),
+                IdempotencyRecord.created_at < now - timedelta(seconds=self.lock_seconds)
+            )
+        )
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    IdempotencyRecord.fingerprint, IdempotencyRecord.status_code,
+                    IdempotencyRecord.headers, IdempotencyRecord.body
+                ).where(IdempotencyRecord.key == key, ~self._expired(now))
+            )
+            row = result.first()
+        return StoredResponse(row[0], row[1], _load_headers(row[2]), row[3] or b"") if row else None
+
+    async def claim(self, key: str, fingerprint: str) -> bool:
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            expired = self._expired(now)
+            if time.monotonic() - self._purged_at > self.PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                await db.execute(delete(IdempotencyRecord).where(expired))
+            else:
+                await db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key, expired))
+            stmt = dialect_insert(db, IdempotencyRecord.__table__).values(
+                key=key, fingerprint=fingerprint, created_at=now
+            )
+            result = await db.execute(
+                stmt.on_conflict_do_nothing(index_elements=["key"]).returning(IdempotencyRecord.key)
+            )
+            claimed = result.first() is not None
+            await db.commit()
+        return claimed
+
+    async def save(self, key: str, response: StoredResponse) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key)
+                .values(
+                    status_code=response.status_code,
+                    headers=_dump_headers(response.headers),
+                    body=response.body
+                )
+            )
+            await db.commit()
+
+    async def release(self, key: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key, IdempotencyRecord.status_code.is_(None))
+            )
+            await db.commit()
+
+
+def make_store():
+    if IDEMPOTENCY_BACKEND == "db":
+        return DatabaseStore()
+    return MemoryStore()
+
+
+def _digest(*parts: bytes) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part)
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def _owner(request: Request) -> str:
+    """sub з JWT, якщо запит автентифікований, інакше порожній рядок."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = verify_token(token)
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return ""
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """
+    POST з заголовком Idempotency-Key: перша відповідь (статус, заголовки і тіло) зберігається,
+    повтори отримують її без виклику маршрутів і репозиторіїв.
+    Одночасні дублікати в процесі чекають на перший запит; з іншого воркера — 409.
+    Той самий ключ з іншим тілом — 422. Відповіді 5xx не зберігаються, їх можна повторити.
+    """
+
+    def __init__(self, app, store=None, paths=IDEMPOTENT_PATHS):
+        self.app = app
+        self.store = store or make_store()
+        self.paths = paths
+        self._inflight: Dict[str, asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        idempotency_key = request.headers.get(HEADER)
+        if not idempotency_key:
+            return await self.app(scope, receive, send)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Задовгий Idempotency-Key"}, status_code=400)
+            return await response(scope, receive, send)
+
+        body = await _read_body(receive)
+        # Ключ прив'язаний до користувача з токена, а без токена — лише до шляху:
+        # не до IP, бо мобільний клієнт може повторити запит уже з іншої мережі
+        key = _digest(_owner(request).encode(), scope["path"].encode(), idempotency_key.encode())
+        fingerprint = _digest(scope.get("query_string", b""), body)
+
+        while True:
+            event = self._inflight.get(key)
+            if event is not None:
+                await event.wait()
+            stored = await self.store.get(key)
+            if stored is not None:
+                return await self._respond_stored(stored, fingerprint, scope, receive, send)
+            if key not in self._inflight:
+                break
+
+        self._inflight[key] = asyncio.Event()
+        try:
+            if not await self.store.claim(key, fingerprint):
+                stored = await self.store.get(key)
+                return await self._respond_stored(stored, fingerprint, scope, receive, send)
+            await self._execute(key, fingerprint, body, scope, receive, send)
+        finally:
+            self._inflight.pop(key).set()
+
+    async def _execute(self, key, fingerprint, body, scope, receive, send):
+        started = {}
+        chunks = []
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                started.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await self.store.release(key)
+            raise
+
+        status_code = started.get("status", 500)
+        if status_code >= 500:
+            await self.store.release(key)
+            return
+        headers = [(bytes(name), bytes(value)) for name, value in started.get("headers", [])]
+        await self.store.save(key, StoredResponse(fingerprint, status_code, headers, b"".join(chunks)))
+
+    async def _respond_stored(self, stored, fingerprint, scope, receive, send):
+        if stored is None or stored.status_code is None:
+            response = JSONResponse(
+                {"detail": "Запит з цим Idempotency-Key ще виконується"}, status_code=409
+            )
+        elif stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key уже використано з іншим запитом"}, status_code=422
+            )
+        else:
+            # Заголовки оригінальної відповіді разом із позначкою повтору
+            await send({
+                "type": "http.response.start",
+                "status": stored.status_code,
+                "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+            })
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+        await response(scope, receive, send)
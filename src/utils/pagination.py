@@ -0,0 +1,57 @@
+import base64
+import json
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+
+
+def encode_cursor(last_id: int) -> str:
+    """Закодувати позицію останнього рядка сторінки в непрозорий курсор."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Розкодувати курсор; ValueError, якщо він пошкоджений."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(last_id, int):
+        raise ValueError("invalid cursor")
+    return last_id
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(
+        None, description="Курсор наступної сторінки із заголовка X-Next-Cursor"
+    )
+) -> Optional[int]:
+    """Dependency: ID, після якого починається сторінка (keyset-пагінація)."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некоректний курсор пагінації"
+        )
+
+
+def paginate(query, id_column, skip: int, limit: int, after_id: Optional[int] = None):
+    """
+    Keyset-пагінація за id, якщо передано курсор, інакше — стара offset-пагінація.
+    Глибокі сторінки з курсором коштують стільки ж, скільки перша.
+    """
+    query = query.order_by(id_column)
+    if after_id is not None:
+        return query.where(id_column > after_id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+def set_next_cursor(response: Response, items: Sequence, limit: int) -> None:
+    """Додати X-Next-Cursor, якщо сторінка заповнена і далі можуть бути рядки."""
+    if limit > 0 and len(items) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1].id)
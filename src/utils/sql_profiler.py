@@ -0,0 +1,127 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+
+logger = logging.getLogger("skillswap.sql")
+
+
+# Увімкнути профілювання SQL для кожного HTTP-запиту
+SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Запити, довші за цей поріг (мс), логуються як повільні
+SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+# Скільки однакових запитів за один HTTP-запит вважати ознакою N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+
+class RequestProfile:
+    """SQL-статистика одного HTTP-запиту."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Counter = Counter()
+        self.slow: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+        if elapsed_ms >= SLOW_QUERY_MS:
+            self.slow.append((statement, elapsed_ms))
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Запити, що повторилися не менше threshold разів — ймовірний N+1."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_started_at"].pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, (time.perf_counter() - started_at) * 1000)
+
+
+def _handle_error(context):
+    # Запит з помилкою не доходить до after_cursor_execute — враховуємо його тут:
+    # він теж був походом у БД, а без pop стек зсувається для наступних запитів
+    connection = context.connection
+    if connection is None or not connection.info.get("query_started_at"):
+        return
+    started_at = connection.info["query_started_at"].pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(context.statement, (time.perf_counter() - started_at) * 1000)
+
+
+def instrument_engine(engine) -> None:
+    """Підписати двигун (sync або async) на профілювання запитів."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def start_profile() -> Tuple[RequestProfile, object]:
+    """Почати збір статистики в поточному контексті (для middleware та бенчмарків)."""
+    profile = RequestProfile()
+    return profile, _current_profile.set(profile)
+
+
+def stop_profile(token) -> None:
+    _current_profile.reset(token)
+
+
+class SQLProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Рахує SQL-запити та час у БД для кожного HTTP-запиту,
+    додає їх у заголовки відповіді та логує N+1 і повільні запити.
+    """
+
+    async def dispatch(self, request, call_next):
+        profile, token = start_profile()
+        try:
+            response = await call_next(request)
+        finally:
+            stop_profile(token)
+
+        route = request.scope.get("route")
+        route_name = f"{request.method} {route.path if route else request.url.path}"
+
+        response.headers["X-DB-Query-Count"] = str(profile.count)
+        response.headers["X-DB-Time-Ms"] = f"{profile.total_ms:.2f}"
+
+        repeated = profile.repeated()
+        if repeated:
+            response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+            for statement, times in repeated:
+                logger.warning(
+                    "Можливий N+1 у %s: однаковий запит виконано %d разів",
+                    route_name, times,
+                    extra={"route": route_name, "repeats": times, "statement": statement}
+                )
+        for statement, elapsed_ms in profile.slow:
+            logger.warning(
+                "Повільний запит (%.1f мс) у %s",
+                elapsed_ms, route_name,
+                extra={"route": route_name, "elapsed_ms": elapsed_ms, "statement": statement}
+            )
+        logger.debug(
+            "%s: %d SQL-запитів, %.2f мс у БД",
+            route_name, profile.count, profile.total_ms,
+            extra={"route": route_name, "db_queries": profile.count, "db_time_ms": profile.total_ms}
+        )
+        return response
@@ -0,0 +1,20 @@
+import re
+import unicodedata
+from typing import List
+
+
+# Довжина "стему": грубе відсікання закінчень, щоб "гітара" і "гітарі" збігалися
+STEM_LENGTH = 5
+
+
+def normalize(text: str) -> str:
+    """Нижній регістр, NFKC, уніфіковані апострофи та пробіли."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    for apostrophe in ("’", "ʼ", "`"):
+        text = text.replace(apostrophe, "'")
+    return " ".join(text.split())
+
+
+def tokens(text: str) -> List[str]:
+    """Стеми слів тексту довжиною від двох символів."""
+    return [word[:STEM_LENGTH] for word in re.findall(r"\w+", normalize(text)) if len(word) > 1]
@@ -0,0 +1,48 @@
+"""
+Спільні фікстури: застосунок на тимчасовій SQLite-базі з невеликим
+згенерованим набором даних і HTTP-клієнт через ASGI, без запуску сервера.
+"""
+import os
+import tempfile
+
+# Двигуни БД створюються під час імпорту src.database.db, тож середовище задається до нього
+DATA_DIR = tempfile.mkdtemp(prefix="skillswap-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/primary.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+os.environ["SQL_PROFILER_ENABLED"] = "true"
+os.environ["IDEMPOTENCY_BACKEND"] = "memory"
+
+import httpx
+import pytest
+
+from main import app
+from src.database.db import async_engine
+from src.database.generate import generate, parse_args
+from src.services.principals import principals
+
+
+# Невеликий відтворюваний набір: 30 користувачів, 90 навичок, 300 обмінів
+DATASET_ARGS = ["--users", "30", "--seed", "7", "--until", "2026-01-01"]
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def started_app(anyio_backend):
+    await generate(parse_args(DATASET_ARGS))
+    await app.router.startup()
+    yield app
+    await app.router.shutdown()
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def client(started_app):
+    principals.clear()
+    transport = httpx.ASGITransport(app=started_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http_client:
+        yield http_client
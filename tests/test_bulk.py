@@ -0,0 +1,51 @@
+"""Пакетний імпорт: помилка в одному рядку не відкочує решту, звіт — по кожному рядку."""
+import json
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+def skill(title: str, **fields) -> dict:
+    return {
+        "title": title, "description": "Навичка з пакетного імпорту", "category": "music",
+        "level": "beginner", "can_teach": True, "want_learn": False, "user_ids": [1], **fields,
+    }
+
+
+async def test_bulk_skills_partial_failure(client):
+    rows = [
+        skill("Імпорт арфа"),
+        skill("x"),  # закоротка назва
+        skill("Імпорт банджо", user_ids=[999_999]),  # немає такого власника
+        skill("Імпорт цимбали"),
+    ]
+    response = await client.post("/api/skills/bulk", json=rows)
+    assert response.status_code == 200, response.text
+    report = response.json()
+
+    assert report["counts"] == {"created": 2, "error": 2}
+    results = report["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["status"] for result in results] == ["created", "error", "error", "created"]
+    assert "title" in results[1]["error"]
+    assert "999999" in results[2]["error"]
+
+    # Id з RETURNING належать саме своїм рядкам
+    for index in (0, 3):
+        created = (await client.get(f"/api/skills/{results[index]['id']}")).json()
+        assert created["title"] == rows[index]["title"]
+        assert [user["id"] for user in created["users"]] == [1]
+
+
+async def test_bulk_ndjson_reports_broken_line(client):
+    lines = [json.dumps(skill("Імпорт сопілка")), "{not json", json.dumps(skill("Імпорт ліра"))]
+    response = await client.post(
+        "/api/skills/bulk", content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created", "error", "created"]
+    assert results[1]["error"].startswith("Некоректний JSON")
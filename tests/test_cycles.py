@@ -0,0 +1,104 @@
+"""Пошук кілець обміну на малих графах з відомими циклами."""
+from collections import Counter
+
+from src.services.cycles import Cycle, build_edges, cycle_legs, find_cycles, select_cycles
+from src.services.swap_graph import SwapGraph
+
+
+def ring(*users, weight: float = 1.0) -> dict:
+    """Ребра кільця users[0] -> users[1] -> ... -> users[0]."""
+    return {user: [(users[(i + 1) % len(users)], weight)] for i, user in enumerate(users)}
+
+
+def merge(*graphs) -> dict:
+    edges = {}
+    for graph in graphs:
+        for source, targets in graph.items():
+            edges.setdefault(source, []).extend(targets)
+    return edges
+
+
+def users_of(cycles) -> list:
+    return sorted(cycle.users for cycle in cycles)
+
+
+def test_triangle_found_once_from_smallest_id():
+    cycles = find_cycles(ring(3, 1, 2))
+    assert cycles == [Cycle((1, 2, 3), 1.0)]
+
+
+def test_two_cycles_need_lower_min_length():
+    assert find_cycles(ring(1, 2)) == []
+    assert users_of(find_cycles(ring(1, 2), min_length=2)) == [(1, 2)]
+
+
+def test_four_cycle_respects_max_length():
+    edges = ring(1, 2, 3, 4)
+    assert users_of(find_cycles(edges)) == [(1, 2, 3, 4)]
+    assert find_cycles(edges, max_length=3) == []
+
+
+def test_length_limits_five_and_six():
+    assert users_of(find_cycles(ring(1, 2, 3, 4, 5))) == [(1, 2, 3, 4, 5)]
+    assert find_cycles(ring(1, 2, 3, 4, 5, 6)) == []
+
+
+def test_acyclic_graph_has_no_cycles():
+    edges = {1: [(2, 1.0), (3, 1.0)], 2: [(3, 1.0), (4, 1.0)], 3: [(4, 1.0)]}
+    assert find_cycles(edges, min_length=2) == []
+
+
+def test_each_cycle_exactly_once_in_mixed_graph():
+    edges = merge(ring(10, 11), ring(20, 21, 22), ring(30, 31, 32, 33), ring(40, 41, 42, 43, 44))
+    cycles = find_cycles(edges, min_length=2, per_start=10)
+    counts = Counter(cycle.users for cycle in cycles)
+    assert counts == Counter({
+        (10, 11): 1, (20, 21, 22): 1, (30, 31, 32, 33): 1, (40, 41, 42, 43, 44): 1
+    })
+
+
+def test_shared_vertex_is_not_repeated_inside_a_cycle():
+    # Дві петлі через вершину 1: 1-2-3 і 1-4-5-6; обхід вісімкою не є кільцем
+    edges = merge(ring(1, 2, 3), ring(1, 4, 5, 6))
+    cycles = find_cycles(edges, per_start=10)
+    assert users_of(cycles) == [(1, 2, 3), (1, 4, 5, 6)]
+    assert all(len(set(cycle.users)) == len(cycle.users) for cycle in cycles)
+
+
+def test_both_directions_are_distinct_cycles():
+    edges = merge(ring(1, 2, 3), ring(1, 3, 2))
+    assert users_of(find_cycles(edges, per_start=10)) == [(1, 2, 3), (1, 3, 2)]
+
+
+def test_score_is_weakest_edge():
+    edges = {1: [(2, 3.0)], 2: [(3, 0.5)], 3: [(1, 2.0)]}
+    assert find_cycles(edges) == [Cycle((1, 2, 3), 0.5)]
+
+
+def test_per_start_limit():
+    # Від вершини 1 через кожну з 2..6 назад до 1 — п'ять трикутників
+    edges = {1: [(v, 1.0) for v in range(2, 7)], **{v: [(100, 1.0)] for v in range(2, 7)}, 100: [(1, 1.0)]}
+    assert len(find_cycles(edges, per_start=10)) == 5
+    assert len(find_cycles(edges, per_start=2)) == 2
+
+
+def test_select_cycles_uses_each_user_once():
+    cycles = [Cycle((1, 2, 3), 2.0), Cycle((3, 4, 5), 3.0), Cycle((6, 7, 8), 1.0)]
+    assert select_cycles(cycles) == [Cycle((3, 4, 5), 3.0), Cycle((6, 7, 8), 1.0)]
+
+
+def test_build_edges_excludes_busy_users():
+    graph = SwapGraph()
+    graph.set_skill(1, "Гітара", True, False, [1])
+    graph.set_skill(2, "Гітара", False, True, [2])
+    graph.set_skill(3, "Плавання", True, False, [2])
+    graph.set_skill(4, "Плавання", False, True, [3])
+    graph.set_skill(5, "Шахи", True, False, [3])
+    graph.set_skill(6, "Шахи", False, True, [1])
+
+    edges = build_edges(graph)
+    assert {source: [target for target, _ in out] for source, out in edges.items()} == {1: [2], 2: [3], 3: [1]}
+    cycle, = find_cycles(edges)
+    assert cycle_legs(graph, cycle) == [(1, 2, 1), (2, 3, 3), (3, 1, 5)]
+
+    assert find_cycles(build_edges(graph, exclude={2})) == []
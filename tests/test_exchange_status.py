@@ -0,0 +1,60 @@
+"""Compare-and-swap оновлення статусу обміну: застаріла версія і недозволені переходи."""
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+SENDER_ID = 1
+RECEIVER_ID = 2
+
+
+@pytest.fixture
+async def exchange(client):
+    response = await client.post(
+        "/api/exchanges/", params={"sender_id": SENDER_ID},
+        json={"skill_id": 1, "receiver_id": RECEIVER_ID, "message": "Тестовий обмін"}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def update_status(client, exchange_id: int, user_id: int, **body):
+    return await client.put(
+        f"/api/exchanges/{exchange_id}", params={"current_user_id": user_id}, json=body
+    )
+
+
+async def test_version_increments_on_transition(client, exchange):
+    assert exchange["status"] == "pending"
+    response = await update_status(client, exchange["id"], RECEIVER_ID, status="accepted", version=1)
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "accepted"
+    assert response.json()["version"] == 2
+
+
+async def test_stale_version_conflict(client, exchange):
+    accepted = await update_status(client, exchange["id"], RECEIVER_ID, status="accepted", version=1)
+    assert accepted.status_code == 200, accepted.text
+
+    # Відправник досі бачить версію 1
+    response = await update_status(client, exchange["id"], SENDER_ID, status="cancelled", version=1)
+    assert response.status_code == 409
+    detail = response.json()["detail"]
+    assert detail["status"] == "accepted"
+    assert detail["version"] == 2
+
+
+async def test_transition_from_wrong_status_conflict(client, exchange):
+    response = await update_status(client, exchange["id"], SENDER_ID, status="completed")
+    assert response.status_code == 409
+    assert response.json()["detail"]["status"] == "pending"
+
+
+async def test_transition_back_to_pending_is_rejected(client, exchange):
+    response = await update_status(client, exchange["id"], RECEIVER_ID, status="pending")
+    assert response.status_code == 400
+
+    unchanged = await client.get(f"/api/exchanges/{exchange['id']}")
+    assert unchanged.json()["status"] == "pending"
+    assert unchanged.json()["version"] == 1
@@ -0,0 +1,51 @@
+"""Геокодування location: нерозпізнані адреси позначаються і не перебираються повторно."""
+import pytest
+from sqlalchemy import insert, select
+
+from src.database.db import AsyncSessionLocal
+from src.database.models import User
+from src.services.geo import UNRESOLVED_CELL, geocode_missing, locate
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_locate_marks_unresolved():
+    assert locate("м. Київ, Україна")["geo_cell"] >= 0
+    assert locate("Атлантида") == {"latitude": None, "longitude": None, "geo_cell": UNRESOLVED_CELL}
+    assert locate(None)["geo_cell"] is None
+
+
+async def test_geocode_missing_runs_once_per_user(started_app):
+    async with AsyncSessionLocal() as db:
+        # Рядки, записані до появи координат: location є, geo_cell ще NULL
+        result = await db.execute(
+            insert(User).returning(User.id),
+            [
+                {"username": "geo_kyiv", "email": "geo_kyiv@example.com", "location": "Київ"},
+                {"username": "geo_nowhere", "email": "geo_nowhere@example.com", "location": "Атлантида"},
+            ]
+        )
+        kyiv_id, nowhere_id = result.scalars().all()
+        await db.commit()
+
+        assert await geocode_missing(db) == 2
+        assert await geocode_missing(db) == 0
+
+        cells = dict((await db.execute(
+            select(User.id, User.geo_cell).where(User.id.in_([kyiv_id, nowhere_id]))
+        )).all())
+    assert cells[kyiv_id] >= 0
+    assert cells[nowhere_id] == UNRESOLVED_CELL
+
+
+async def test_unresolved_user_is_not_near_anything(client):
+    response = await client.post("/api/users/", json={
+        "username": "geo_api_nowhere", "email": "geo_api_nowhere@example.com", "location": "Ельдорадо"
+    })
+    assert response.status_code == 201, response.text
+    created_id = response.json()["id"]
+
+    nearby = await client.get("/api/users/", params={"near": "Київ", "radius_km": 1000, "limit": 1000})
+    assert nearby.status_code == 200
+    assert created_id not in {user["id"] for user in nearby.json()}
@@ -0,0 +1,86 @@
+"""Повтори POST з Idempotency-Key: збережена відповідь, область ключа і зміна тіла."""
+import httpx
+import pytest
+from starlette.responses import JSONResponse
+
+from src.utils.auth import create_access_token
+from src.utils.idempotency import DatabaseStore, IdempotencyMiddleware, MemoryStore
+
+
+pytestmark = pytest.mark.anyio
+
+
+SKILL = {
+    "title": "Ідемпотентна навичка",
+    "description": "Навичка для перевірки повторів запиту",
+    "category": "programming",
+    "level": "beginner",
+    "can_teach": True,
+    "want_learn": False,
+}
+
+
+async def create_skill(client, key: str, body: dict = SKILL, **headers):
+    return await client.post("/api/skills/", json=body, headers={"Idempotency-Key": key, **headers})
+
+
+async def test_replay_returns_first_response(client):
+    first = await create_skill(client, "replay")
+    assert first.status_code == 201, first.text
+
+    replay = await create_skill(client, "replay")
+    assert replay.status_code == 201
+    assert replay.content == first.content
+    assert replay.headers["content-type"] == first.headers["content-type"]
+    assert replay.headers["idempotent-replayed"] == "true"
+    # Маршрут не викликався
+    assert replay.headers["x-db-query-count"] == "0"
+
+
+async def test_same_key_with_other_body_is_rejected(client):
+    first = await create_skill(client, "mismatch")
+    assert first.status_code == 201, first.text
+
+    response = await create_skill(client, "mismatch", {**SKILL, "title": "Інша навичка"})
+    assert response.status_code == 422
+    assert "idempotent-replayed" not in response.headers
+
+
+async def test_key_is_scoped_by_authenticated_user(client):
+    anonymous = await create_skill(client, "scoped")
+    token = create_access_token({"sub": "3"})
+    authenticated = await create_skill(client, "scoped", Authorization=f"Bearer {token}")
+    assert authenticated.status_code == 201
+    assert "idempotent-replayed" not in authenticated.headers
+    assert authenticated.json()["id"] != anonymous.json()["id"]
+
+    replay = await create_skill(client, "scoped", Authorization=f"Bearer {token}")
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json()["id"] == authenticated.json()["id"]
+
+
+@pytest.mark.parametrize("store_class", [MemoryStore, DatabaseStore])
+async def test_replay_keeps_original_headers(started_app, store_class):
+    calls = []
+
+    async def endpoint(scope, receive, send):
+        calls.append(scope["path"])
+        response = JSONResponse(
+            {"call": len(calls)}, status_code=201,
+            headers={"Location": "/api/items/42", "X-Next-Cursor": "abc"}
+        )
+        await response(scope, receive, send)
+
+    app = IdempotencyMiddleware(endpoint, store=store_class(), paths=frozenset({"/items"}))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http_client:
+        headers = {"Idempotency-Key": f"headers-{store_class.__name__}"}
+        first = await http_client.post("/items", json={"name": "item"}, headers=headers)
+        replay = await http_client.post("/items", json={"name": "item"}, headers=headers)
+
+    assert calls == ["/items"]
+    assert replay.status_code == 201
+    assert replay.json() == {"call": 1}
+    assert replay.headers["location"] == "/api/items/42"
+    assert replay.headers["x-next-cursor"] == "abc"
+    assert replay.headers["content-length"] == first.headers["content-length"]
@@ -0,0 +1,70 @@
+"""Індекс збігів у пам'яті проти повного перебору навичок з БД."""
+import pytest
+from sqlalchemy import select
+
+from src.database.db import AsyncSessionLocal
+from src.database.models import Skill
+from src.services.matching import match_index
+from src.utils.text import tokens
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def skills_from_db() -> dict:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Skill.id, Skill.title, Skill.can_teach, Skill.want_learn))
+        return {row.id: row for row in result}
+
+
+def expected_candidates(skills: dict, skill_id: int) -> set:
+    """Навички протилежної ролі зі спільним словом у назві — те, що мав би знайти SQL-пошук."""
+    skill = skills[skill_id]
+    words = set(tokens(skill.title))
+    if skill.want_learn:
+        wanted = lambda other: other.can_teach
+    elif skill.can_teach:
+        wanted = lambda other: other.want_learn
+    else:
+        return set()
+    return {
+        other.id for other in skills.values()
+        if other.id != skill_id and wanted(other) and words & set(tokens(other.title))
+    }
+
+
+async def test_index_matches_full_scan(started_app):
+    skills = await skills_from_db()
+    for skill_id in sorted(skills)[:40]:
+        found = {candidate_id for _, candidate_id, _ in match_index.matches(skill_id, limit=len(skills))}
+        assert found == expected_candidates(skills, skill_id), skill_id
+
+
+async def test_matches_endpoint_returns_only_indexed_candidates(client):
+    skills = await skills_from_db()
+    learner_id = next(
+        skill_id for skill_id in sorted(skills)
+        if skills[skill_id].want_learn and expected_candidates(skills, skill_id)
+    )
+    response = await client.get(f"/api/skills/{learner_id}/matches")
+    assert response.status_code == 200, response.text
+    matches = response.json()["matches"]
+    assert matches
+    assert {match["skill"]["id"] for match in matches} <= expected_candidates(skills, learner_id)
+    assert all(match["type"] == "teacher" and match["skill"]["can_teach"] for match in matches)
+
+
+async def test_created_skill_is_matched(client):
+    skills = await skills_from_db()
+    learner_id = next(skill_id for skill_id in sorted(skills) if skills[skill_id].want_learn)
+    title = skills[learner_id].title
+    response = await client.post("/api/skills/", params={"user_id": 4}, json={
+        "title": title, "description": "Нова навичка того ж змісту", "category": "other",
+        "level": "expert", "can_teach": True, "want_learn": False,
+    })
+    assert response.status_code == 201, response.text
+    created_id = response.json()["id"]
+
+    found = {candidate_id for _, candidate_id, _ in match_index.matches(learner_id, limit=10_000)}
+    assert created_id in found
+    assert found == expected_candidates(await skills_from_db(), learner_id)
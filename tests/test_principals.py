@@ -0,0 +1,133 @@
+"""
+Кеш автентифікованих користувачів: повторний запит з тим самим токеном не йде в БД,
+а деактивація чи зміна користувача одразу скидає його токени.
+"""
+import time
+
+import pytest
+
+from src.database.db import AsyncSessionLocal
+from src.repository import users as repository_users
+from src.schemas import UserUpdate
+from src.services.principals import Principal, PrincipalCache, principals
+from src.utils.auth import create_access_token
+
+
+pytestmark = pytest.mark.anyio
+
+
+QUERY_COUNT_HEADER = "x-db-query-count"
+ME_URL = "/api/exchanges/my-exchanges"
+
+
+@pytest.fixture
+async def user(client):
+    """Окремий користувач: деактивація не зачіпає згенерованих, якими користуються інші тести."""
+    suffix = time.time_ns()
+    response = await client.post(
+        "/api/users/", json={"username": f"principal{suffix}", "email": f"principal{suffix}@example.com"}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def auth(user: dict) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user['id'])})}"}
+
+
+async def test_cached_principal_skips_database(client, user):
+    headers = auth(user)
+    first = await client.get(ME_URL, headers=headers)
+    assert first.status_code == 200, first.text
+    assert first.json() == {"user_id": user["id"], "username": user["username"]}
+    assert first.headers[QUERY_COUNT_HEADER] == "1"
+
+    second = await client.get(ME_URL, headers=headers)
+    assert second.status_code == 200
+    assert second.headers[QUERY_COUNT_HEADER] == "0"
+
+
+async def test_deactivated_user_is_rejected_on_next_request(client, user):
+    headers = auth(user)
+    assert (await client.get(ME_URL, headers=headers)).status_code == 200
+    assert principals.get(headers["Authorization"].split()[1]) is not None
+
+    async with AsyncSessionLocal() as db:
+        assert await repository_users.deactivate_user(db, user["id"])
+
+    response = await client.get(ME_URL, headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Inactive user"
+
+
+async def test_updated_user_is_reloaded(client, user):
+    headers = auth(user)
+    assert (await client.get(ME_URL, headers=headers)).status_code == 200
+
+    async with AsyncSessionLocal() as db:
+        await repository_users.update_user(db, user["id"], UserUpdate(full_name="Нове ім'я"))
+
+    # Кешований Principal скинуто: токен знову перевіряється по БД
+    response = await client.get(ME_URL, headers=headers)
+    assert response.status_code == 200
+    assert response.headers[QUERY_COUNT_HEADER] == "1"
+
+
+def principal(user_id: int) -> Principal:
+    return Principal(user_id, f"user{user_id}", f"user{user_id}@example.com", True)
+
+
+def test_evicts_least_recently_used_at_limit():
+    cache = PrincipalCache(max_entries=2, ttl=60)
+    cache.put("a", principal(1))
+    cache.put("b", principal(2))
+    # Звернення до "a" робить найстарішим "b"
+    assert cache.get("a") == principal(1)
+
+    cache.put("c", principal(3))
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == principal(1)
+    assert cache.get("c") == principal(3)
+
+    # Витіснений токен не лишає слідів в індексі користувачів
+    cache.invalidate_user(2)
+    assert len(cache) == 2
+
+
+def test_put_same_token_does_not_grow():
+    cache = PrincipalCache(max_entries=2, ttl=60)
+    for _ in range(3):
+        cache.put("a", principal(1))
+    cache.put("b", principal(2))
+    assert len(cache) == 2
+    assert cache.get("a") == principal(1)
+
+
+def test_invalidate_user_drops_all_tokens():
+    cache = PrincipalCache(max_entries=10, ttl=60)
+    cache.put("a", principal(1))
+    cache.put("b", principal(1))
+    cache.put("c", principal(2))
+
+    cache.invalidate_user(1)
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == principal(2)
+    assert len(cache) == 1
+
+
+def test_entry_expires_with_ttl_or_token(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = PrincipalCache(max_entries=10, ttl=60)
+    cache.put("ttl", principal(1))
+    # Токен спливає раніше за TTL кешу
+    cache.put("exp", principal(2), token_expires_at=now[0] + 10)
+
+    now[0] += 10
+    assert cache.get("exp") is None
+    assert cache.get("ttl") == principal(1)
+
+    now[0] += 50
+    assert cache.get("ttl") is None
+    assert len(cache) == 0
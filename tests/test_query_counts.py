@@ -0,0 +1,139 @@
+"""
+Кількість SQL-запитів на ендпоїнт не залежить від кількості рядків у відповіді:
+зростання числа означає ліниве завантаження (N+1) під час серіалізації.
+Запити рахує SQLProfilerMiddleware у заголовку X-DB-Query-Count.
+"""
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql
+
+from src.database.db import async_engine
+from src.database.models import Exchange
+from src.database.upsert import execute_with_increments
+from src.repository import stats as repository_stats
+
+
+pytestmark = pytest.mark.anyio
+
+
+QUERY_COUNT_HEADER = "x-db-query-count"
+
+
+async def query_count(client, url: str) -> int:
+    response = await client.get(url)
+    assert response.status_code == 200, response.text
+    return int(response.headers[QUERY_COUNT_HEADER])
+
+
+@pytest.mark.parametrize("url, expected", [
+    # Навички: рядки + selectinload власників
+    ("/api/skills/?limit=5", 2),
+    ("/api/skills/?limit=100", 2),
+    ("/api/skills/?category=music", 2),
+    ("/api/skills/?search=python", 2),
+    # Обміни: рядки з joinedload учасників і навички + selectinload власників навички
+    ("/api/exchanges/?limit=5", 2),
+    ("/api/exchanges/?limit=100", 2),
+    # Користувачі: рейтинг денормалізований у рядку users
+    ("/api/users/?limit=5", 1),
+    ("/api/users/?limit=100", 1),
+])
+async def test_list_query_count(client, url, expected):
+    assert await query_count(client, url) == expected
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/api/skills/{}", 2),
+    ("/api/exchanges/{}", 2),
+    ("/api/users/{}", 1),
+])
+async def test_detail_query_count(client, path, expected):
+    counts = {await query_count(client, path.format(object_id)) for object_id in (1, 2, 3)}
+    assert counts == {expected}
+
+
+async def test_list_query_count_does_not_grow_with_page(client):
+    for url in ("/api/skills/", "/api/exchanges/", "/api/users/"):
+        small = await query_count(client, f"{url}?limit=1")
+        large = await query_count(client, f"{url}?limit=100")
+        assert small == large, url
+
+
+async def test_failed_statement_is_counted(client):
+    existing = (await client.get("/api/users/1")).json()
+    response = await client.post(
+        "/api/users/", json={"username": existing["username"], "email": "fresh-user@example.com"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username вже зайнятий"
+    # INSERT, що впав на унікальному індексі, + перевірка email на шляху помилки
+    assert response.headers[QUERY_COUNT_HEADER] == "2"
+
+
+def write_query_counts(dialect: str) -> dict:
+    """
+    Postgres: запис разом з лічильниками — один запит (data-modifying CTE), + JOIN-завантаження.
+    SQLite таких CTE не має: кожен лічильник — окремий upsert (4 при створенні, 2 при переході).
+    """
+    if dialect == "postgresql":
+        return {"create": 2, "update": 2}
+    return {"create": 1 + 4 + 1, "update": 1 + 2 + 1}
+
+
+async def test_write_query_count(client):
+    expected = write_query_counts(async_engine.dialect.name)
+
+    created = await client.post(
+        "/api/exchanges/", params={"sender_id": 1},
+        json={"skill_id": 1, "receiver_id": 2, "message": "Лічильник запитів"}
+    )
+    assert created.status_code == 201, created.text
+    assert int(created.headers[QUERY_COUNT_HEADER]) == expected["create"]
+    # Відповідь з одного JOIN-запиту: учасники й власники навички на місці
+    body = created.json()
+    assert body["sender"]["id"] == 1 and body["receiver"]["id"] == 2
+    assert body["skill"]["id"] == 1 and body["skill"]["users"]
+
+    updated = await client.put(
+        f"/api/exchanges/{body['id']}", params={"current_user_id": 2},
+        json={"status": "accepted", "version": 1}
+    )
+    assert updated.status_code == 200, updated.text
+    assert int(updated.headers[QUERY_COUNT_HEADER]) == expected["update"]
+    assert updated.json()["status"] == "accepted"
+    assert updated.json()["skill"]["users"] == body["skill"]["users"]
+
+
+class RecordingSession:
+    """Сесія-заглушка з діалектом Postgres: запам'ятовує запити замість виконання."""
+
+    def __init__(self):
+        self.statements = []
+        self.dialect = postgresql.dialect()
+
+    def get_bind(self):
+        return self
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: [])
+
+
+async def test_postgres_write_with_counters_is_one_statement():
+    db = RecordingSession()
+    statement = (
+        insert(Exchange.__table__)
+        .values(sender_id=1, receiver_id=2, skill_id=1, status="pending")
+        .returning(Exchange.id, Exchange.skill_id, Exchange.sender_id, Exchange.receiver_id, Exchange.status)
+    )
+    await execute_with_increments(db, statement, partial(repository_stats.exchange_increments, db))
+
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=db.dialect))
+    assert sql.count("INSERT INTO") == 5
+    assert sql.count("ON CONFLICT") == 4
+    # SELECT з DML-CTE має йти на основну БД, а не на репліку
+    assert db.statements[0].get_execution_options()["writes"] is True
@@ -0,0 +1,75 @@
+"""
+Маршрутизація читань на репліку: друга SQLite-база — копія основної,
+розбіжність між ними показує, з якої бази прочитано рядок.
+"""
+import shutil
+import sqlite3
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database import db as database
+from src.database import routing
+from tests.conftest import DATA_DIR
+
+
+pytestmark = pytest.mark.anyio
+
+
+USER_ID = 5
+REPLICA_NAME = "Прочитано з репліки"
+
+
+@pytest.fixture
+async def replica(started_app, monkeypatch):
+    path = f"{DATA_DIR}/replica.db"
+    shutil.copyfile(f"{DATA_DIR}/primary.db", path)
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE users SET full_name = ? WHERE id = ?", (REPLICA_NAME, USER_ID))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    # Свіжий облік записів, щоб попередні тести не впливали на маршрутизацію
+    writers = routing.RecentWriters(window_seconds=60)
+    monkeypatch.setattr(database, "replica_engines", [engine])
+    monkeypatch.setattr(routing, "recent_writers", writers)
+    yield engine
+    await engine.dispose()
+
+
+async def full_name(client) -> str:
+    response = await client.get(f"/api/users/{USER_ID}")
+    assert response.status_code == 200, response.text
+    return response.json()["full_name"]
+
+
+async def test_get_reads_from_replica(client, replica):
+    assert await full_name(client) == REPLICA_NAME
+
+
+async def test_writer_reads_own_writes_from_primary(client, replica, started_app):
+    response = await client.put(f"/api/users/{USER_ID}", json={"full_name": "Оновлено"})
+    assert response.status_code == 200, response.text
+
+    # Той самий клієнт у вікні read-your-writes читає основну базу
+    assert await full_name(client) == "Оновлено"
+
+    # Інший клієнт і далі читає репліку, яка ще не наздогнала
+    transport = httpx.ASGITransport(app=started_app, client=("10.0.0.2", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as other:
+        assert await full_name(other) == REPLICA_NAME
+
+
+async def test_read_your_writes_across_workers(client, replica, monkeypatch):
+    # Запис обробляє «воркер» A з власним RecentWriters
+    response = await client.put(f"/api/users/{USER_ID}", json={"full_name": "Записано на A"})
+    assert response.status_code == 200, response.text
+    assert routing.WRITE_COOKIE in response.cookies
+
+    # Наступне читання потрапляє на «воркер» B, який про запис не знає
+    monkeypatch.setattr(routing, "recent_writers", routing.RecentWriters(window_seconds=60))
+    assert await full_name(client) == "Записано на A"
+
+    # З підробленою cookie B відправляє читання на репліку
+    client.cookies.clear()
+    client.cookies.set(routing.WRITE_COOKIE, "9999999999.000.forged")
+    assert await full_name(client) == REPLICA_NAME
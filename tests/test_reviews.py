@@ -0,0 +1,65 @@
+"""Відгуки: один на учасника обміну, лічильники рейтингу без подвійного обліку."""
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from src.database.db import AsyncSessionLocal
+from src.database.models import Review
+
+
+pytestmark = pytest.mark.anyio
+
+
+SENDER_ID = 5
+RECEIVER_ID = 6
+
+
+@pytest.fixture
+async def completed_exchange(client):
+    response = await client.post(
+        "/api/exchanges/", params={"sender_id": SENDER_ID}, json={"skill_id": 1, "receiver_id": RECEIVER_ID}
+    )
+    assert response.status_code == 201, response.text
+    exchange_id = response.json()["id"]
+    for user_id, status in ((RECEIVER_ID, "accepted"), (SENDER_ID, "completed")):
+        response = await client.put(
+            f"/api/exchanges/{exchange_id}", params={"current_user_id": user_id}, json={"status": status}
+        )
+        assert response.status_code == 200, response.text
+    return exchange_id
+
+
+async def rating(client, user_id: int) -> dict:
+    return (await client.get(f"/api/reviews/user/{user_id}/rating")).json()
+
+
+async def test_concurrent_duplicate_reviews_count_once(client, completed_exchange):
+    before = await rating(client, RECEIVER_ID)
+    responses = await asyncio.gather(*[
+        client.post(
+            "/api/reviews/", params={"reviewer_id": SENDER_ID},
+            json={"exchange_id": completed_exchange, "rating": 4}
+        )
+        for _ in range(5)
+    ])
+    assert sorted(response.status_code for response in responses) == [201, 400, 400, 400, 400]
+
+    after = await rating(client, RECEIVER_ID)
+    assert after["total_reviews"] == before["total_reviews"] + 1
+    assert after["histogram"]["4"] == before["histogram"]["4"] + 1
+
+
+async def test_unique_index_rejects_duplicate_row(client, completed_exchange):
+    response = await client.post(
+        "/api/reviews/", params={"reviewer_id": RECEIVER_ID},
+        json={"exchange_id": completed_exchange, "rating": 5}
+    )
+    assert response.status_code == 201, response.text
+
+    # Те, що лишилося б після гонки, яку NOT EXISTS не помітив
+    row = {"exchange_id": completed_exchange, "reviewer_id": RECEIVER_ID, "reviewed_id": SENDER_ID, "rating": 5}
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(IntegrityError):
+            await db.execute(insert(Review), [row])
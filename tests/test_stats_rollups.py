@@ -0,0 +1,110 @@
+"""
+Лічильники статистики, що оновлюються разом з обмінами, мають збігатися
+з перерахунком rebuild() з таблиці exchanges.
+"""
+from datetime import date, datetime, timezone
+
+import pytest
+
+from src.database.db import AsyncSessionLocal
+from src.repository import stats as repository_stats
+
+
+pytestmark = pytest.mark.anyio
+
+
+SENDER_ID = 3
+RECEIVER_ID = 4
+
+# Початок періоду часового ряду: раніше за будь-які згенеровані дані
+SERIES_FROM = date(2024, 1, 1)
+
+
+async def rollups() -> dict:
+    async with AsyncSessionLocal() as db:
+        return {
+            "success_rate": await repository_stats.get_exchange_success_rate(db),
+            "top_skills": await repository_stats.get_top_skills(db, 100),
+            "active_users": await repository_stats.get_active_users(db, 100),
+        }
+
+
+async def timeseries(category=None) -> list:
+    today = datetime.now(timezone.utc).date()
+    async with AsyncSessionLocal() as db:
+        return await repository_stats.get_timeseries(db, SERIES_FROM, today, "day", category)
+
+
+async def rebuild() -> None:
+    async with AsyncSessionLocal() as db:
+        await repository_stats.rebuild(db)
+
+
+async def create_exchange(client, skill_id: int) -> int:
+    response = await client.post(
+        "/api/exchanges/", params={"sender_id": SENDER_ID},
+        json={"skill_id": skill_id, "receiver_id": RECEIVER_ID}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def move(client, exchange_id: int, user_id: int, status: str, expected: int = 200, **body) -> None:
+    response = await client.put(
+        f"/api/exchanges/{exchange_id}", params={"current_user_id": user_id},
+        json={"status": status, **body}
+    )
+    assert response.status_code == expected, response.text
+
+
+async def run_lifecycle(client) -> int:
+    """Обміни в усіх кінцевих станах; повертає, скільки проміжних accepted губить rebuild()."""
+    completed, cancelled_after_accept, accepted, rejected, cancelled, _pending = [
+        await create_exchange(client, skill_id) for skill_id in (1, 2, 3, 1, 2, 3)
+    ]
+    for exchange_id in (completed, cancelled_after_accept, accepted):
+        await move(client, exchange_id, RECEIVER_ID, "accepted")
+    await move(client, completed, SENDER_ID, "completed")
+    await move(client, cancelled_after_accept, SENDER_ID, "cancelled")
+    await move(client, rejected, RECEIVER_ID, "rejected")
+    await move(client, cancelled, SENDER_ID, "cancelled")
+
+    # Відхилені переходи не змінюють лічильники
+    await move(client, rejected, SENDER_ID, "completed", expected=409)
+    await move(client, completed, SENDER_ID, "cancelled", expected=409)
+    await move(client, accepted, SENDER_ID, "completed", expected=409, version=1)
+    return 2
+
+
+@pytest.fixture
+async def rebuilt(started_app):
+    """Стартовий стан, узгоджений з rebuild(), щоб розбіжність давали лише інкрементні оновлення."""
+    await rebuild()
+
+
+async def test_status_and_count_rollups_match_rebuild(client, rebuilt):
+    before = await rollups()
+    await run_lifecycle(client)
+    incremental = await rollups()
+    await rebuild()
+
+    assert incremental == await rollups()
+    assert incremental["success_rate"]["total"] == before["success_rate"]["total"] + 6
+    assert incremental["success_rate"]["completed"] == before["success_rate"]["completed"] + 1
+
+
+async def test_timeseries_matches_rebuild(client, rebuilt):
+    lost_accepted = await run_lifecycle(client)
+    incremental = {category: await timeseries(category) for category in (None, "programming", "music")}
+    assert incremental[None][-1]["created"] >= 6
+    await rebuild()
+
+    for category, series in incremental.items():
+        rebuilt_series = await timeseries(category)
+        assert [row["period"] for row in series] == [row["period"] for row in rebuilt_series]
+        for events, rebuilt_events in zip(series, rebuilt_series):
+            assert {**events, "accepted": None} == {**rebuilt_events, "accepted": None}
+
+    # rebuild() бачить лише поточний статус: accepted перед completed/cancelled він не відновлює
+    total = lambda series, event: sum(row[event] for row in series)
+    assert total(incremental[None], "accepted") == total(await timeseries(), "accepted") + lost_accepted
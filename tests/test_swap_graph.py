@@ -0,0 +1,87 @@
+"""Граф обмінів у пам'яті оновлюється разом із навичками та користувачами, без перезапуску."""
+from itertools import count
+
+import pytest
+
+from src.services.cycles import build_edges, find_cycles
+from src.services.swap_graph import swap_graph
+from src.utils.auth import create_access_token
+
+
+pytestmark = pytest.mark.anyio
+
+_suffix = count()
+
+
+def topic(base: str) -> str:
+    """Унікальне слово: стемер обрізає слова, тож відмінність має бути на початку."""
+    prefix = "".join(chr(ord("a") + int(digit)) for digit in str(next(_suffix)))
+    return f"{prefix}{base}"
+
+
+async def create_user(client, name: str) -> int:
+    username = f"{name}_{next(_suffix)}"
+    response = await client.post("/api/users/", json={"username": username, "email": f"{username}@example.com"})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def create_skill(client, user_id: int, title: str, teach: bool) -> int:
+    response = await client.post("/api/skills/", params={"user_id": user_id}, json={
+        "title": title, "description": "Навичка для перевірки графа", "category": "other",
+        "level": "beginner", "can_teach": teach, "want_learn": not teach,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture
+async def ring(client):
+    """A навчає B, B навчає C, C навчає A — теми вигадані, щоб не перетинатися з набором даних."""
+    users = [await create_user(client, f"ring_{name}") for name in ("alpha", "beta", "gamma")]
+    topics = [topic(base) for base in ("zorblax", "quintor", "vexmir")]
+    for index, user_id in enumerate(users):
+        await create_skill(client, user_id, topics[index], teach=True)
+        await create_skill(client, users[(index + 1) % 3], topics[index], teach=False)
+    return users
+
+
+def ring_cycles(users) -> list:
+    return [cycle for cycle in find_cycles(build_edges(swap_graph)) if set(cycle.users) & set(users)]
+
+
+async def test_created_skills_form_a_cycle(ring):
+    cycles = ring_cycles(ring)
+    assert [cycle.users for cycle in cycles] == [tuple(ring)]
+
+
+async def test_edited_skill_breaks_the_cycle(client, ring):
+    skill_id = swap_graph.matching_skills(ring[0], ring[1])[0]
+    response = await client.put(f"/api/skills/{skill_id}", json={"title": topic("plumbix")})
+    assert response.status_code == 200, response.text
+    assert ring_cycles(ring) == []
+
+
+async def test_deleted_skill_breaks_the_cycle(client, ring):
+    skill_id = swap_graph.matching_skills(ring[1], ring[2])[0]
+    response = await client.delete(f"/api/skills/{skill_id}")
+    assert response.status_code == 204
+    assert ring_cycles(ring) == []
+
+
+async def test_deactivated_user_leaves_partners_and_cycles(client):
+    first = await create_user(client, "swap_first")
+    second = await create_user(client, "swap_second")
+    given, received = topic("glimmer"), topic("thornwe")
+    await create_skill(client, first, given, teach=True)
+    await create_skill(client, second, given, teach=False)
+    await create_skill(client, second, received, teach=True)
+    await create_skill(client, first, received, teach=False)
+
+    partners = (await client.get(f"/api/users/{first}/swap-partners")).json()
+    assert [partner["user"]["id"] for partner in partners] == [second]
+
+    token = create_access_token({"sub": str(second)})
+    response = await client.post("/api/users/me/deactivate", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 204
+    assert (await client.get(f"/api/users/{first}/swap-partners")).json() == []